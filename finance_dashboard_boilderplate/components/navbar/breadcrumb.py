@@ -1,15 +1,27 @@
 import reflex as rx
-from ...routes import get_breadcrumbs
+from ...routes import registry
 
-def breadcrumbs() -> rx.Component:
-    """Create breadcrumbs based on the current route."""
-    current_path = rx.State.router.page.path
-    breadcrumb_items = get_breadcrumbs(current_path)
-    
+def breadcrumb_trail(path: str) -> rx.Component:
+    """Create the breadcrumb links for a route path."""
     return rx.hstack(
         *[
-            rx.link(item["title"], href=item["path"])
-            for item in breadcrumb_items
+            rx.link(title, href=href)
+            for title, href in registry.breadcrumbs(path)
         ],
         display=["none", "none", "flex"],
-        )
\ No newline at end of file
+        )
+
+def breadcrumbs() -> rx.Component:
+    """Create breadcrumbs based on the current route.
+    
+    Every route's trail is precompiled by the route registry and the
+    frontend picks one by path, so navigating costs no server round trip.
+    """
+    return rx.match(
+        rx.State.router.page.path,
+        *[
+            (path, breadcrumb_trail(path))
+            for path in registry.breadcrumb_trails
+        ],
+        breadcrumb_trail("/"),
+    )
\ No newline at end of file
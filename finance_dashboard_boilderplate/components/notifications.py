@@ -1,4 +1,34 @@
 import reflex as rx
+from ..states.notifications_state import NotificationsState
+
+def notification_item(item: rx.Var) -> rx.Component:
+    """Create a single notification row."""
+    return rx.menu.item(
+        rx.hstack(
+            rx.box(
+                width="8px",
+                height="8px",
+                border_radius="50%",
+                background_color=rx.cond(item["read"], "transparent", rx.color("accent", 9)),
+                flex_shrink="0",
+            ),
+            rx.vstack(
+                rx.text(
+                    item["title"],
+                    size="2",
+                    weight=rx.cond(item["read"], "regular", "bold"),
+                ),
+                rx.text(item["time"], size="1", color=rx.color("gray", 10)),
+                spacing="0",
+                align="start",
+            ),
+            align="center",
+            spacing="2",
+        ),
+        on_select=NotificationsState.mark_read(item["id"]),
+        height="auto",
+        padding_y="6px",
+    )
 
 def notifications_dropdown() -> rx.Component:
     """Create a notifications dropdown."""
@@ -6,17 +36,43 @@ def notifications_dropdown() -> rx.Component:
         rx.menu.trigger(
             rx.button(
                 rx.icon("bell"),
+                rx.cond(
+                    NotificationsState.unread_count > 0,
+                    rx.badge(NotificationsState.unread_count, color_scheme="red", variant="solid", radius="full"),
+                ),
                 variant="ghost",
-                size="sm",
-                radius="small"
+                size="2",
+                radius="small",
+                on_mount=NotificationsState.watch_notifications,
             ),
         ),
         rx.menu.content(
-            rx.menu.item("New Feature: Budget Tracking"),
-            rx.menu.item("Account Alert: Unusual Activity"),
-            rx.menu.item("Payment Due: Credit Card"),
-            rx.menu.item("Investment Update: +5% Growth"),
-            rx.menu.item("New Offer: Higher Interest Savings"),
+            rx.hstack(
+                rx.text("Notifications", size="2", weight="bold"),
+                rx.spacer(),
+                rx.cond(
+                    NotificationsState.unread_count > 0,
+                    rx.link("Mark all read", size="1", on_click=NotificationsState.mark_all_read),
+                ),
+                padding_x="8px",
+                padding_y="4px",
+                width="100%",
+            ),
+            rx.menu.separator(),
+            rx.cond(
+                NotificationsState.items.length() > 0,
+                rx.foreach(NotificationsState.items, notification_item),
+                rx.text("No notifications", size="2", color=rx.color("gray", 10), padding="8px"),
+            ),
+            rx.cond(
+                NotificationsState.has_more,
+                rx.menu.item(
+                    "Load more",
+                    on_select=NotificationsState.load_more.prevent_default,
+                    justify_content="center",
+                ),
+            ),
             width="300px",
         ),
-    )
\ No newline at end of file
+        on_open_change=NotificationsState.set_open,
+    )
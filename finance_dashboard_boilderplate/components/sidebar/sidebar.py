@@ -1,8 +1,19 @@
 import reflex as rx
 from .state import State
-from ...routes import get_sidebar_routes, is_route_active
+from ...routes import Route, get_sidebar_routes, registry
 from .sidebar_item import sidebar_item
 
+def route_item(route: Route) -> rx.Component:
+    """Create the sidebar item for a route."""
+    # Paths on which this route is active, precomputed by the route registry
+    active_on = list(registry.active_on[route.get_full_path()])
+    return sidebar_item(
+        route.icon,
+        route.title,
+        route.get_full_path(),
+        is_active=rx.Var.create(active_on).contains(rx.State.router.page.path),
+    )
+
 def sidebar() -> rx.Component:
     """Create the sidebar component."""
     # Get sidebar routes
@@ -28,7 +39,7 @@ def sidebar() -> rx.Component:
                 border_bottom="1px solid var(--border)",
             ),
             rx.vstack(
-                *[sidebar_item(route) for route in main_routes],
+                *[route_item(route) for route in main_routes],
                 width="100%",
                 spacing="1",
                 align_items="flex-start",
@@ -37,7 +48,7 @@ def sidebar() -> rx.Component:
                 flex="1",
             ),
             rx.vstack(
-                *[sidebar_item(route) for route in footer_routes],
+                *[route_item(route) for route in footer_routes],
                 width="100%",
                 spacing="1",
                 align_items="flex-start",
@@ -1,20 +1,20 @@
 import reflex as rx
 
-def sidebar_item(icon: str, text: str, href: str, is_active: bool = False) -> rx.Component:
+def sidebar_item(icon: str, text: str, href: str, is_active: bool | rx.Var[bool] = False) -> rx.Component:
     """Create a sidebar navigation item."""
     return rx.link(
         rx.flex(
             rx.icon(
                 icon,
-                color="var(--muted-foreground)" if not is_active else "var(--primary)",
+                color=rx.cond(is_active, "var(--primary)", "var(--muted-foreground)"),
                 font_size="1.2em",
             ),
             rx.text(text, margin_left="3", display=["none", "none", "block"]),
             align_items="center",
             padding="2",
             border_radius="md",
-            background="var(--accent)" if is_active else "transparent",
-            color="var(--primary)" if is_active else "var(--muted-foreground)",
+            background=rx.cond(is_active, "var(--accent)", "transparent"),
+            color=rx.cond(is_active, "var(--primary)", "var(--muted-foreground)"),
             _hover={
                 "background": "var(--accent)",
                 "color": "var(--primary)",
@@ -2,8 +2,10 @@
 
 import reflex as rx
 
-from rxconfig import config
 from . import styles
+from .routes import register_pages
+from .services.http_client import http_client_lifespan
+from .services.live_updates import transactions_webhook
 
 class State(rx.State):
     """The app state."""
@@ -11,30 +13,6 @@ class State(rx.State):
     ...
 
 
-def index() -> rx.Component:
-    # Welcome Page (Index)
-    return rx.container(
-        rx.color_mode.button(position="top-right"),
-        rx.vstack(
-            rx.heading("Welcome to Reflex!", size="9"),
-            rx.text(
-                "Get started by editing ",
-                rx.code(f"{config.app_name}/{config.app_name}.py"),
-                size="5",
-            ),
-            rx.link(
-                rx.button("Check out our docs!"),
-                href="https://reflex.dev/docs/getting-started/introduction/",
-                is_external=True,
-            ),
-            spacing="5",
-            justify="center",
-            min_height="85vh",
-        ),
-        rx.logo(),
-    )
-
-
 app = rx.App(
     head_components=[
         rx.el.meta(
@@ -45,4 +23,13 @@ app = rx.App(
     stylesheets=styles.BASE,
     style=styles.base_style,
 )
-app.add_page(index)
+
+# Pages are added from the route table; each page module is imported
+# only when that page is compiled.
+register_pages(app)
+
+# Pooled API connections are closed on shutdown
+app.register_lifespan_task(http_client_lifespan)
+
+# The bank feed pushes new transactions to open dashboards through here
+app.api.add_api_route("/webhooks/transactions", transactions_webhook, methods=["POST"])
@@ -1,5 +1,166 @@
 import reflex as rx
 
+from ..states import InvoicesState
+
+
+def aging_card(bucket: rx.Var) -> rx.Component:
+    """Create a card summarizing one aging bucket; clicking it filters the table."""
+    return rx.card(
+        rx.vstack(
+            rx.text(bucket["bucket"], size="2", color="var(--muted-foreground)"),
+            rx.heading(bucket["amount"], size="5"),
+            rx.text(bucket["count"], " invoices", size="2"),
+            spacing="1",
+        ),
+        on_click=InvoicesState.select_bucket(bucket["bucket"]),
+        cursor="pointer",
+        border=rx.cond(
+            InvoicesState.filter_bucket == bucket["bucket"],
+            "2px solid var(--accent-9)",
+            "none",
+        ),
+        flex="1",
+    )
+
+
+def sort_header(title: str, key: str) -> rx.Component:
+    """Create a column header that sorts the table on the server."""
+    return rx.table.column_header_cell(
+        rx.flex(
+            rx.text(title),
+            rx.cond(
+                InvoicesState.sort_key == key,
+                rx.cond(
+                    InvoicesState.sort_descending,
+                    rx.icon("arrow-down", size=14),
+                    rx.icon("arrow-up", size=14),
+                ),
+            ),
+            align_items="center",
+            spacing="1",
+        ),
+        on_click=InvoicesState.sort_by(key),
+        cursor="pointer",
+    )
+
+
+def invoice_row(invoice: rx.Var) -> rx.Component:
+    """Create a single table row."""
+    return rx.table.row(
+        rx.table.cell("INV-", invoice["id"]),
+        rx.table.cell(invoice["customer"]),
+        rx.table.cell(invoice["issue_date"]),
+        rx.table.cell(invoice["due_date"]),
+        rx.table.cell(
+            rx.badge(
+                invoice["status"],
+                color_scheme=rx.match(
+                    invoice["status"],
+                    ("paid", "green"),
+                    ("open", "blue"),
+                    ("void", "gray"),
+                    "orange",
+                ),
+            ),
+        ),
+        rx.table.cell(
+            rx.cond(invoice["days_overdue"].to(int) > 0, invoice["days_overdue"], ""),
+            color="var(--red-11)",
+        ),
+        rx.table.cell(invoice["amount"], text_align="right"),
+    )
+
+
+def filters() -> rx.Component:
+    """Create the filter bar."""
+    return rx.flex(
+        rx.select(
+            InvoicesState.statuses,
+            value=rx.cond(InvoicesState.filter_status, InvoicesState.filter_status, "All"),
+            on_change=InvoicesState.set_filter_status,
+        ),
+        rx.select(
+            InvoicesState.customers,
+            value=rx.cond(InvoicesState.filter_customer, InvoicesState.filter_customer, "All"),
+            on_change=InvoicesState.set_filter_customer,
+        ),
+        rx.input(
+            placeholder="Min amount",
+            type="number",
+            value=InvoicesState.filter_min_amount,
+            on_change=InvoicesState.set_filter_min_amount,
+            debounce_timeout=300,
+        ),
+        rx.input(
+            placeholder="Max amount",
+            type="number",
+            value=InvoicesState.filter_max_amount,
+            on_change=InvoicesState.set_filter_max_amount,
+            debounce_timeout=300,
+        ),
+        spacing="3",
+        wrap="wrap",
+    )
+
+
+def pager() -> rx.Component:
+    """Create the previous/next page controls."""
+    return rx.flex(
+        rx.text(
+            "Page ", InvoicesState.page_number,
+            " · ", InvoicesState.total_count, " invoices",
+            " · ", InvoicesState.total_amount, " total",
+            color="var(--muted-foreground)",
+        ),
+        rx.spacer(),
+        rx.button(
+            rx.icon("chevron-left"),
+            on_click=InvoicesState.previous_page,
+            disabled=InvoicesState.page_number <= 1,
+            variant="soft",
+        ),
+        rx.button(
+            rx.icon("chevron-right"),
+            on_click=InvoicesState.next_page,
+            disabled=~InvoicesState.has_next_page,
+            variant="soft",
+        ),
+        align_items="center",
+        spacing="2",
+        width="100%",
+    )
+
 
 def index() -> rx.Component:
-    return rx.heading("Invoices")
\ No newline at end of file
+    return rx.vstack(
+        rx.heading("Invoices"),
+        rx.flex(
+            rx.foreach(InvoicesState.aging, aging_card),
+            spacing="3",
+            width="100%",
+            wrap="wrap",
+        ),
+        filters(),
+        rx.cond(
+            InvoicesState.is_loading,
+            rx.center(rx.spinner(), width="100%", padding="6"),
+            rx.table.root(
+                rx.table.header(
+                    rx.table.row(
+                        sort_header("Invoice", "id"),
+                        sort_header("Customer", "customer"),
+                        sort_header("Issued", "issue_date"),
+                        sort_header("Due", "due_date"),
+                        rx.table.column_header_cell("Status"),
+                        rx.table.column_header_cell("Days overdue"),
+                        sort_header("Amount", "amount"),
+                    ),
+                ),
+                rx.table.body(rx.foreach(InvoicesState.rows, invoice_row)),
+                width="100%",
+            ),
+        ),
+        pager(),
+        spacing="4",
+        width="100%",
+    )
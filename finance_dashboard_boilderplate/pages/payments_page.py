@@ -1,5 +1,120 @@
 import reflex as rx
 
+from ..states import PaymentsState
+
+
+def stat_card(title: str, count: rx.Var, amount: rx.Var, view: str) -> rx.Component:
+    """Create a card summarizing one reconciliation outcome; clicking it shows the list."""
+    return rx.card(
+        rx.vstack(
+            rx.text(title, size="2", color="var(--muted-foreground)"),
+            rx.heading(count, size="5"),
+            rx.text(amount, size="2"),
+            spacing="1",
+        ),
+        on_click=PaymentsState.set_view(view),
+        cursor="pointer",
+        border=rx.cond(PaymentsState.view == view, "2px solid var(--accent-9)", "none"),
+        flex="1",
+    )
+
+
+def summary_cards() -> rx.Component:
+    """Create the row of reconciliation summary cards."""
+    summary = PaymentsState.summary
+    return rx.flex(
+        stat_card(
+            "Matched",
+            summary["matched_by_reference"].to(int) + summary["matched_by_amount"].to(int),
+            summary["matched_amount"],
+            "matched",
+        ),
+        stat_card(
+            "Unmatched payments",
+            summary["unmatched_payments"],
+            summary["unmatched_payment_amount"],
+            "unmatched payments",
+        ),
+        stat_card(
+            "Unpaid invoices",
+            summary["unpaid_invoices"],
+            summary["unpaid_invoice_amount"],
+            "unpaid invoices",
+        ),
+        stat_card(
+            "Unmatched deposits",
+            summary["unmatched_deposits"],
+            summary["unmatched_deposit_amount"],
+            "unmatched deposits",
+        ),
+        spacing="3",
+        width="100%",
+        wrap="wrap",
+    )
+
+
+def payment_row(row: rx.Var) -> rx.Component:
+    """Create a single table row."""
+    return rx.table.row(
+        rx.table.cell(row["date"]),
+        rx.table.cell(row["party"]),
+        rx.table.cell(row["reference"]),
+        rx.table.cell(row["note"], color="var(--muted-foreground)"),
+        rx.table.cell(row["amount"], text_align="right"),
+    )
+
+
+def actions() -> rx.Component:
+    """Create the view picker and the button that applies the matches."""
+    return rx.flex(
+        rx.select(
+            PaymentsState.views,
+            value=PaymentsState.view,
+            on_change=PaymentsState.set_view,
+        ),
+        rx.spacer(),
+        rx.cond(
+            PaymentsState.applied_count > 0,
+            rx.text(PaymentsState.applied_count, " invoices marked paid", color="var(--green-11)"),
+        ),
+        rx.button(
+            rx.icon("check-check", size=16),
+            "Mark matched invoices paid",
+            on_click=PaymentsState.mark_invoices_paid,
+            disabled=PaymentsState.is_loading,
+        ),
+        align_items="center",
+        spacing="3",
+        width="100%",
+    )
+
 
 def index() -> rx.Component:
-    return rx.heading("Payment")
\ No newline at end of file
+    return rx.vstack(
+        rx.heading("Payments"),
+        summary_cards(),
+        actions(),
+        rx.cond(
+            PaymentsState.is_loading,
+            rx.center(rx.spinner(), width="100%", padding="6"),
+            rx.table.root(
+                rx.table.header(
+                    rx.table.row(
+                        rx.table.column_header_cell("Date"),
+                        rx.table.column_header_cell("From"),
+                        rx.table.column_header_cell("Reference"),
+                        rx.table.column_header_cell("Match"),
+                        rx.table.column_header_cell("Amount", text_align="right"),
+                    ),
+                ),
+                rx.table.body(rx.foreach(PaymentsState.rows, payment_row)),
+                width="100%",
+            ),
+        ),
+        rx.text(
+            "Showing the first ", PaymentsState.row_limit, " rows",
+            color="var(--muted-foreground)",
+        ),
+        spacing="4",
+        width="100%",
+    )
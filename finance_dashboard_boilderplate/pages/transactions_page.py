@@ -1,5 +1,175 @@
 import reflex as rx
 
+from ..states import ImportState, TransactionsState
+
+# Rows have a fixed height so the scroll area can be sized without measuring them.
+ROW_HEIGHT = "44px"
+VISIBLE_ROWS = 12
+
+
+def sort_header(title: str, key: str) -> rx.Component:
+    """Create a column header that sorts the table on the server."""
+    return rx.table.column_header_cell(
+        rx.flex(
+            rx.text(title),
+            rx.cond(
+                TransactionsState.sort_key == key,
+                rx.cond(
+                    TransactionsState.sort_descending,
+                    rx.icon("arrow-down", size=14),
+                    rx.icon("arrow-up", size=14),
+                ),
+            ),
+            align_items="center",
+            spacing="1",
+        ),
+        on_click=TransactionsState.sort_by(key),
+        cursor="pointer",
+    )
+
+
+def transaction_row(transaction: rx.Var) -> rx.Component:
+    """Create a single table row."""
+    return rx.table.row(
+        rx.table.cell(transaction["date"]),
+        rx.table.cell(transaction["description"]),
+        rx.table.cell(transaction["category"]),
+        rx.table.cell(
+            transaction["amount"],
+            color=rx.cond(transaction["amount"].to(float) < 0, "var(--red-11)", "var(--green-11)"),
+            text_align="right",
+        ),
+        height=ROW_HEIGHT,
+    )
+
+
+def filters() -> rx.Component:
+    """Create the filter bar."""
+    return rx.flex(
+        rx.input(
+            placeholder="Search descriptions",
+            value=TransactionsState.filter_search,
+            on_change=TransactionsState.set_filter_search,
+            debounce_timeout=300,
+        ),
+        rx.select(
+            TransactionsState.categories,
+            value=rx.cond(TransactionsState.filter_category, TransactionsState.filter_category, "All"),
+            on_change=TransactionsState.set_filter_category,
+        ),
+        rx.input(
+            type="date",
+            value=TransactionsState.filter_start_date,
+            on_change=TransactionsState.set_filter_start_date,
+        ),
+        rx.input(
+            type="date",
+            value=TransactionsState.filter_end_date,
+            on_change=TransactionsState.set_filter_end_date,
+        ),
+        spacing="3",
+        wrap="wrap",
+    )
+
+
+def pager() -> rx.Component:
+    """Create the previous/next page controls."""
+    return rx.flex(
+        rx.text(
+            "Page ", TransactionsState.page_number,
+            " · ", TransactionsState.total_count, " transactions",
+            color="var(--muted-foreground)",
+        ),
+        rx.spacer(),
+        rx.button(
+            rx.icon("chevron-left"),
+            on_click=TransactionsState.previous_page,
+            disabled=TransactionsState.page_number <= 1,
+            variant="soft",
+        ),
+        rx.button(
+            rx.icon("chevron-right"),
+            on_click=TransactionsState.next_page,
+            disabled=~TransactionsState.has_next_page,
+            variant="soft",
+        ),
+        align_items="center",
+        spacing="2",
+        width="100%",
+    )
+
+
+def import_panel() -> rx.Component:
+    """Create the bank export upload and its progress."""
+    return rx.flex(
+        rx.upload(
+            rx.button(rx.icon("upload"), "Import CSV, OFX or Parquet", variant="soft"),
+            id="transactions_import",
+            accept={
+                "text/csv": [".csv"],
+                "application/x-ofx": [".ofx", ".qfx"],
+                "application/vnd.apache.parquet": [".parquet"],
+            },
+            max_files=1,
+            on_drop=ImportState.handle_upload(rx.upload_files(upload_id="transactions_import")),
+            border="none",
+            padding="0",
+            disabled=ImportState.is_importing,
+        ),
+        rx.cond(
+            ImportState.is_importing,
+            rx.flex(
+                rx.text(ImportState.import_file_name, size="2"),
+                rx.progress(value=ImportState.import_percent, width="200px"),
+                align_items="center",
+                spacing="2",
+            ),
+        ),
+        rx.cond(
+            ImportState.rows_read > 0,
+            rx.text(
+                ImportState.rows_imported, " imported · ",
+                ImportState.duplicates, " duplicates · ",
+                ImportState.rejected, " rejected",
+                title=ImportState.rejection_summary,
+                size="2",
+                color="var(--muted-foreground)",
+            ),
+        ),
+        rx.cond(
+            ImportState.import_error,
+            rx.text(ImportState.import_error, size="2", color="var(--red-11)"),
+        ),
+        align_items="center",
+        spacing="3",
+        wrap="wrap",
+    )
+
 
 def index() -> rx.Component:
-    return rx.heading("Transactions")
\ No newline at end of file
+    return rx.vstack(
+        rx.heading("Transactions"),
+        import_panel(),
+        filters(),
+        rx.scroll_area(
+            rx.table.root(
+                rx.table.header(
+                    rx.table.row(
+                        sort_header("Date", "date"),
+                        sort_header("Description", "description"),
+                        sort_header("Category", "category"),
+                        sort_header("Amount", "amount"),
+                    ),
+                ),
+                rx.table.body(
+                    rx.foreach(TransactionsState.rows, transaction_row),
+                ),
+                width="100%",
+            ),
+            height=f"calc({ROW_HEIGHT} * {VISIBLE_ROWS})",
+            type="auto",
+        ),
+        pager(),
+        spacing="4",
+        width="100%",
+    )
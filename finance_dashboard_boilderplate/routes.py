@@ -1,6 +1,15 @@
-from typing import Dict, List, Optional, Callable
+import functools
+import importlib
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Callable, Tuple, Union
 import reflex as rx
 
+# A page component, or a lazy "module:function" reference inside the pages package
+ComponentRef = Union[Callable[[], rx.Component], str]
+
+# An event handler, or a lazy "module:State.handler" reference inside the states package
+EventRef = Union[rx.event.EventHandler, str]
+
 class Route:
     """A class representing a route in the application."""
     
@@ -9,12 +18,13 @@ class Route:
         path: str,
         title: str,
         icon: str,
-        component: Callable[[], rx.Component],
+        component: ComponentRef,
         requires_auth: bool = True,
         is_sidebar_item: bool = True,
         is_header_item: bool = False,
         children: List["Route"] = None,
         parent: Optional[str] = None,
+        on_load: Optional[List[EventRef]] = None,
     ):
         """Initialize a route.
         
@@ -22,12 +32,16 @@ class Route:
             path: The URL path for the route.
             title: The display title for the route.
             icon: The icon name for the route.
-            component: The component function to render for this route.
+            component: The component function to render for this route, or a
+                "module:function" reference into the pages package that is
+                only imported when the page compiles.
             requires_auth: Whether authentication is required to access this route.
             is_sidebar_item: Whether this route should appear in the sidebar.
             is_header_item: Whether this route should appear in the header.
             children: List of child routes.
             parent: The parent route path (if this is a child route).
+            on_load: Event handlers (or "module:State.handler" references into
+                the states package) to run when the page loads.
         """
         self.path = path
         self.title = title
@@ -38,16 +52,22 @@ class Route:
         self.is_header_item = is_header_item
         self.children = children or []
         self.parent = parent
-        
+        self.on_load = on_load or []
+        self._full_path: Optional[str] = None
+    
     def is_active(self, current_path: str) -> bool:
         """Check if this route is active based on the current path.
         
         Args:
             current_path: The current URL path.
-            
+        
         Returns:
             True if this route is active, False otherwise.
         """
+        # Registered routes use the registry's memoized active sets
+        if self._full_path is not None:
+            return self._full_path in registry.get_active_paths(current_path)
+        
         # Exact match
         if current_path == self.path:
             return True
@@ -61,7 +81,7 @@ class Route:
         # but only if this path is not just "/"
         if self.path != "/" and current_path.startswith(self.path + "/"):
             return True
-            
+        
         return False
     
     def get_full_path(self) -> str:
@@ -70,32 +90,261 @@ class Route:
         Returns:
             The full path.
         """
+        # Set by the RouteRegistry when the route table is indexed
+        if self._full_path is not None:
+            return self._full_path
         if self.parent:
-            parent_route = next((r for r in routes if r.path == self.parent), None)
-            if parent_route:
-                return f"{parent_route.get_full_path()}{self.path}"
+            return f"{self.parent}{self.path}"
         return self.path
+    
+    def load_component(self) -> Callable[[], rx.Component]:
+        """Import the page component if it is a lazy reference.
+        
+        Returns:
+            The component function.
+        """
+        if isinstance(self.component, str):
+            self.component = _resolve(self.component, ".pages")
+        return self.component
+    
+    def load_on_load(self) -> List[rx.event.EventHandler]:
+        """Resolve the page's on_load references to event handlers.
+        
+        Returns:
+            The event handlers to run when the page loads.
+        """
+        return [
+            _resolve(handler, ".states") if isinstance(handler, str) else handler
+            for handler in self.on_load
+        ]
+
 
+def _resolve(reference: str, package: str) -> Any:
+    """Import a "module:attr.attr" reference relative to a subpackage."""
+    module_name, _, attr_path = reference.partition(":")
+    target = importlib.import_module(f"{package}.{module_name}", __package__)
+    for attr in attr_path.split("."):
+        target = getattr(target, attr)
+    return target
+
+
+class _RouteTrieNode:
+    """A node in the path segment trie used to resolve dynamic routes."""
+    
+    __slots__ = ("children", "param", "param_node", "route")
+    
+    def __init__(self):
+        self.children: Dict[str, "_RouteTrieNode"] = {}
+        self.param: Optional[str] = None
+        self.param_node: Optional["_RouteTrieNode"] = None
+        self.route: Optional[Route] = None
+
+
+class RouteRegistry:
+    """An immutable index over the route table, built once at import time.
+    
+    Static paths resolve with a single dict lookup. Paths with dynamic
+    segments (``/invoices/[id]``) resolve through a segment trie, in time
+    proportional to the number of segments rather than the number of routes.
+    """
+    
+    def __init__(self, routes: List[Route]):
+        """Build the registry.
+        
+        Args:
+            routes: The top-level routes, with their children.
+        """
+        by_path: Dict[str, Route] = {}
+        by_child_path: Dict[str, Route] = {}
+        parents: Dict[str, Optional[Route]] = {}
+        self._trie = _RouteTrieNode()
+        
+        def add(route: Route, parent: Optional[Route]):
+            full_path = f"{parent._full_path}{route.path}" if parent else route.path
+            if full_path in by_path:
+                raise ValueError(f"Duplicate route path: {full_path}")
+            route._full_path = full_path
+            by_path[full_path] = route
+            parents[full_path] = parent
+            if parent is not None:
+                by_child_path.setdefault(route.path, route)
+            self._insert(full_path, route)
+            for child in route.children:
+                add(child, route)
+        
+        for route in routes:
+            add(route, None)
+        
+        self.routes: Tuple[Route, ...] = tuple(routes)
+        self.by_path: Mapping[str, Route] = MappingProxyType(by_path)
+        self.parents: Mapping[str, Optional[Route]] = MappingProxyType(parents)
+        self._by_child_path: Mapping[str, Route] = MappingProxyType(by_child_path)
+        
+        # Precompile breadcrumbs and active sets for every registered path;
+        # other concrete paths are computed once and memoized
+        self.breadcrumb_trails: Mapping[str, Tuple[Tuple[str, str], ...]] = MappingProxyType(
+            {path: self._build_breadcrumbs(path) for path in by_path}
+        )
+        self.active_paths: Mapping[str, FrozenSet[str]] = MappingProxyType(
+            {path: self._build_active_paths(path) for path in by_path}
+        )
+        active_on: Dict[str, List[str]] = {path: [] for path in by_path}
+        for current_path, active in self.active_paths.items():
+            for path in active:
+                active_on[path].append(current_path)
+        self.active_on: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {path: tuple(paths) for path, paths in active_on.items()}
+        )
+        self._breadcrumbs_cache = functools.lru_cache(maxsize=1024)(self._build_breadcrumbs)
+        self._active_paths_cache = functools.lru_cache(maxsize=1024)(self._build_active_paths)
+        
+        self.sidebar_routes: Tuple[Route, ...] = tuple(r for r in routes if r.is_sidebar_item)
+        self.header_routes: Tuple[Route, ...] = tuple(r for r in routes if r.is_header_item)
+        self.auth_required_routes: Tuple[Route, ...] = tuple(r for r in routes if r.requires_auth)
+        self.public_routes: Tuple[Route, ...] = tuple(r for r in routes if not r.requires_auth)
+    
+    @staticmethod
+    def _segments(path: str) -> List[str]:
+        """Split a path into its non-empty segments."""
+        return [segment for segment in path.split("/") if segment]
+    
+    def _insert(self, full_path: str, route: Route):
+        """Add a route to the segment trie."""
+        node = self._trie
+        for segment in self._segments(full_path):
+            if segment.startswith("[") and segment.endswith("]"):
+                param = segment[1:-1]
+                if node.param_node is None:
+                    node.param_node = _RouteTrieNode()
+                    node.param = param
+                elif node.param != param:
+                    raise ValueError(f"Conflicting dynamic segments [{node.param}] and [{param}] in {full_path}")
+                node = node.param_node
+            else:
+                node = node.children.setdefault(segment, _RouteTrieNode())
+        node.route = route
+    
+    def _match(self, node: _RouteTrieNode, segments: List[str], index: int, params: Dict[str, str]) -> Optional[Route]:
+        """Match segments against the trie, preferring static segments."""
+        if index == len(segments):
+            return node.route
+        child = node.children.get(segments[index])
+        if child is not None:
+            route = self._match(child, segments, index + 1, params)
+            if route is not None:
+                return route
+        if node.param_node is not None:
+            params[node.param] = segments[index]
+            route = self._match(node.param_node, segments, index + 1, params)
+            if route is not None:
+                return route
+            del params[node.param]
+        return None
+    
+    def resolve(self, path: str) -> Optional[Tuple[Route, Dict[str, str]]]:
+        """Find the route for a concrete path, along with its dynamic parameters.
+        
+        Args:
+            path: The URL path, e.g. ``/invoices/42``.
+        
+        Returns:
+            The route and a dict of parameter values, or None if nothing matches.
+        """
+        route = self.by_path.get(path)
+        if route is not None:
+            return route, {}
+        params: Dict[str, str] = {}
+        route = self._match(self._trie, self._segments(path), 0, params)
+        if route is not None:
+            return route, params
+        return None
+    
+    def get(self, path: str) -> Optional[Route]:
+        """Get a route by its path.
+        
+        Args:
+            path: A full path, a concrete path of a dynamic route, or a child route's own path.
+        
+        Returns:
+            The Route object if found, None otherwise.
+        """
+        resolved = self.resolve(path)
+        if resolved is not None:
+            return resolved[0]
+        return self._by_child_path.get(path)
+    
+    @staticmethod
+    def _prefixes(path: str) -> List[Tuple[str, str]]:
+        """Get each segment of a path with the path up to and including it."""
+        prefixes = []
+        current = ""
+        for part in path.strip("/").split("/"):
+            if part:
+                current += f"/{part}"
+                prefixes.append((part, current))
+        return prefixes
+    
+    def _build_breadcrumbs(self, path: str) -> Tuple[Tuple[str, str], ...]:
+        """Build the (title, path) breadcrumb trail for a path."""
+        trail = [("Home", "/")]
+        for part, current in self._prefixes(path):
+            route = self.get(current)
+            # If we can't find a route, use the path segment as the title
+            trail.append((route.title if route else part.capitalize(), current))
+        return tuple(trail)
+    
+    def _build_active_paths(self, path: str) -> FrozenSet[str]:
+        """Build the set of route full paths that are active on a path."""
+        if path == "/":
+            return frozenset(["/"]) if "/" in self.by_path else frozenset()
+        active = set()
+        for _, current in self._prefixes(path):
+            resolved = self.resolve(current)
+            if resolved is not None:
+                active.add(resolved[0].get_full_path())
+        return frozenset(active)
+    
+    def breadcrumbs(self, path: str) -> Tuple[Tuple[str, str], ...]:
+        """Get the breadcrumb trail for a path.
+        
+        Args:
+            path: A route path (including dynamic ones like ``/invoices/[id]``) or a concrete URL path.
+        
+        Returns:
+            (title, path) pairs from Home to the current page.
+        """
+        trail = self.breadcrumb_trails.get(path)
+        if trail is None:
+            trail = self._breadcrumbs_cache(path)
+        return trail
+    
+    def get_active_paths(self, path: str) -> FrozenSet[str]:
+        """Get the full paths of every route that is active on a path.
+        
+        A route is active on its own path and on any path below it.
+        
+        Args:
+            path: A route path or a concrete URL path.
+        
+        Returns:
+            The full paths of the active routes.
+        """
+        active = self.active_paths.get(path)
+        if active is None:
+            active = self._active_paths_cache(path)
+        return active
+    
+    def parent(self, route: Route) -> Optional[Route]:
+        """Get the parent of a registered route.
+        
+        Args:
+            route: The route.
+        
+        Returns:
+            The parent Route, or None for top-level routes.
+        """
+        return self.parents[route.get_full_path()]
 
-# Import page components
-from .pages import (
-    dashboard_page,
-    analytics_page,
-    settings_page,
-    organization_page,
-    projects_page,
-    transactions_page,
-    invoices_page,
-    payments_page,
-    members_page,
-    permissions_page,
-    chat_page,
-    meetings_page,
-    help_page,
-    login_page,
-    register_page,
-    forgot_password_page,
-)
 
 # Define all routes
 routes: List[Route] = [
@@ -103,91 +352,99 @@ routes: List[Route] = [
         path="/",
         title="Dashboard",
         icon="home",
-        component=dashboard_page.index,
+        component="dashboard_page:index",
         requires_auth=True,
+        on_load=[
+            "dashboard_state:DashboardState.fetch_dashboard_data",
+            "dashboard_state:DashboardState.watch_live_updates",
+        ],
     ),
     Route(
         path="/analytics",
         title="Analytics",
         icon="bar-chart-2",
-        component=analytics_page.index,
+        component="analytics_page:index",
         requires_auth=True,
+        on_load=["analysis_state:AnalyticsState.fetch_analytics_data"],
     ),
     Route(
         path="/organization",
         title="Organization",
         icon="building",
-        component=organization_page.index,
+        component="organization_page:index",
         requires_auth=True,
     ),
     Route(
         path="/projects",
         title="Projects",
         icon="folder",
-        component=projects_page.index,
+        component="projects_page:index",
         requires_auth=True,
     ),
     Route(
         path="/transactions",
         title="Transactions",
         icon="wallet",
-        component=transactions_page.index,
+        component="transactions_page:index",
         requires_auth=True,
+        on_load=["transactions_state:TransactionsState.load_transactions"],
     ),
     Route(
         path="/invoices",
         title="Invoices",
         icon="receipt",
-        component=invoices_page.index,
+        component="invoices_page:index",
         requires_auth=True,
+        on_load=["invoices_state:InvoicesState.load_invoices"],
     ),
     Route(
         path="/payments",
         title="Payments",
         icon="credit-card",
-        component=payments_page.index,
+        component="payments_page:index",
         requires_auth=True,
+        on_load=["payments_state:PaymentsState.load_payments"],
     ),
     Route(
         path="/members",
         title="Members",
         icon="users",
-        component=members_page.index,
+        component="members_page:index",
         requires_auth=True,
     ),
     Route(
         path="/permissions",
         title="Permissions",
         icon="shield",
-        component=permissions_page.index,
+        component="permissions_page:index",
         requires_auth=True,
     ),
     Route(
         path="/chat",
         title="Chat",
         icon="message-square",
-        component=chat_page.index,
+        component="chat_page:index",
         requires_auth=True,
     ),
     Route(
         path="/meetings",
         title="Meetings",
         icon="video",
-        component=meetings_page.index,
+        component="meetings_page:index",
         requires_auth=True,
     ),
     Route(
         path="/settings",
         title="Settings",
         icon="settings",
-        component=settings_page.index,
+        component="settings_page:index",
         requires_auth=True,
         children=[
             Route(
                 path="/account",
                 title="Account",
                 icon="user",
-                component=settings_page.account_settings,
+                component="settings_page:account_settings",
                 parent="/settings",
                 is_sidebar_item=False,
             ),
@@ -195,7 +452,7 @@ routes: List[Route] = [
                 path="/security",
                 title="Security",
                 icon="lock",
-                component=settings_page.security_settings,
+                component="settings_page:security_settings",
                 parent="/settings",
                 is_sidebar_item=False,
             ),
@@ -203,7 +460,7 @@ routes: List[Route] = [
                 path="/preferences",
                 title="Preferences",
                 icon="sliders",
-                component=settings_page.preferences_settings,
+                component="settings_page:preferences_settings",
                 parent="/settings",
                 is_sidebar_item=False,
             ),
@@ -211,16 +468,18 @@ routes: List[Route] = [
                 path="/notifications",
                 title="Notifications",
                 icon="bell",
-                component=settings_page.notifications_settings,
+                component="settings_page:notifications_settings",
                 parent="/settings",
+                on_load=["user_state:UserState.load_settings"],
                 is_sidebar_item=False,
             ),
             Route(
                 path="/privacy",
                 title="Privacy",
                 icon="eye",
-                component=settings_page.privacy_settings,
+                component="settings_page:privacy_settings",
                 parent="/settings",
+                on_load=["user_state:UserState.load_settings"],
                 is_sidebar_item=False,
             ),
         ],
@@ -229,7 +488,7 @@ routes: List[Route] = [
         path="/help",
         title="Help",
         icon="help-circle",
-        component=help_page.index,
+        component="help_page:index",
         requires_auth=True,
     ),
     # Authentication routes
@@ -237,7 +496,7 @@ routes: List[Route] = [
         path="/login",
         title="Login",
         icon="log-in",
-        component=login_page.index,
+        component="login_page:index",
         requires_auth=False,
         is_sidebar_item=False,
     ),
@@ -245,7 +504,7 @@ routes: List[Route] = [
         path="/register",
         title="Register",
         icon="user-plus",
-        component=register_page.index,
+        component="register_page:index",
         requires_auth=False,
         is_sidebar_item=False,
     ),
@@ -253,34 +512,26 @@ routes: List[Route] = [
         path="/forgot-password",
         title="Forgot Password",
         icon="key",
-        component=forgot_password_page.index,
+        component="forgot_password_page:index",
         requires_auth=False,
         is_sidebar_item=False,
     ),
 ]
 
+# Index the route table once; lookups below never scan it
+registry = RouteRegistry(routes)
+
 # Helper functions
 def get_route_by_path(path: str) -> Optional[Route]:
     """Get a route by its path.
     
     Args:
         path: The path to look for.
-        
+    
     Returns:
         The Route object if found, None otherwise.
     """
-    # First check for exact matches
-    for route in routes:
-        if route.path == path:
-            return route
-    
-    # Then check for child routes
-    for route in routes:
-        for child in route.children:
-            if child.path == path or route.path + child.path == path:
-                return child
-    
-    return None
+    return registry.get(path)
 
 def get_sidebar_routes() -> List[Route]:
     """Get all routes that should appear in the sidebar.
@@ -288,7 +539,7 @@ def get_sidebar_routes() -> List[Route]:
     Returns:
         A list of Route objects.
     """
-    return [route for route in routes if route.is_sidebar_item]
+    return list(registry.sidebar_routes)
 
 def get_header_routes() -> List[Route]:
     """Get all routes that should appear in the header.
@@ -296,7 +547,7 @@ def get_header_routes() -> List[Route]:
     Returns:
         A list of Route objects.
     """
-    return [route for route in routes if route.is_header_item]
+    return list(registry.header_routes)
 
 def get_auth_required_routes() -> List[Route]:
     """Get all routes that require authentication.
@@ -304,7 +555,7 @@ def get_auth_required_routes() -> List[Route]:
     Returns:
         A list of Route objects.
     """
-    return [route for route in routes if route.requires_auth]
+    return list(registry.auth_required_routes)
 
 def get_public_routes() -> List[Route]:
     """Get all routes that don't require authentication.
@@ -312,7 +563,7 @@ def get_public_routes() -> List[Route]:
     Returns:
         A list of Route objects.
     """
-    return [route for route in routes if not route.requires_auth]
+    return list(registry.public_routes)
 
 def is_route_active(path: str, current_path: str) -> bool:
     """Check if a route is active based on the current path.
@@ -320,7 +571,7 @@ def is_route_active(path: str, current_path: str) -> bool:
     Args:
         path: The route path to check.
         current_path: The current URL path.
-        
+    
     Returns:
         True if the route is active, False otherwise.
     """
@@ -334,27 +585,39 @@ def get_breadcrumbs(current_path: str) -> List[Dict[str, str]]:
     
     Args:
         current_path: The current URL path.
-        
+    
     Returns:
         A list of breadcrumb items with 'title' and 'path' keys.
     """
-    breadcrumbs = [{"title": "Home", "path": "/"}]
+    return [{"title": title, "path": path} for title, path in registry.breadcrumbs(current_path)]
+
+def register_pages(app: rx.App):
+    """Add every route in the route table to the app.
     
-    if current_path == "/":
-        return breadcrumbs
+    Page modules are not imported here; each page's component is imported
+    when the page is compiled. Routes that require authentication get the
+    auth check and login guard ahead of their own on_load handlers.
     
-    # Split the path and build breadcrumbs
-    parts = current_path.strip("/").split("/")
-    current = ""
+    Args:
+        app: The app to add the pages to.
+    """
+    from .states.auth_state import AuthState
     
-    for part in parts:
-        current += f"/{part}"
-        route = get_route_by_path(current)
-        
-        if route:
-            breadcrumbs.append({"title": route.title, "path": current})
-        else:
-            # If we can't find a route, use the path segment as the title
-            breadcrumbs.append({"title": part.capitalize(), "path": current})
+    for full_path, route in registry.by_path.items():
+        on_load = route.load_on_load()
+        if route.requires_auth:
+            on_load = [AuthState.check_auth_on_load, AuthState.require_login, *on_load]
+        app.add_page(
+            _lazy_page(route),
+            route=full_path,
+            title=route.title,
+            on_load=on_load or None,
+        )
+
+def _lazy_page(route: Route) -> Callable[[], rx.Component]:
+    """Wrap a route's component so its module is imported on first render."""
+    def page() -> rx.Component:
+        return route.load_component()()
     
-    return breadcrumbs
\ No newline at end of file
+    page.__name__ = f"{route.title.lower().replace(' ', '_')}_page"
+    return page
\ No newline at end of file
@@ -0,0 +1,105 @@
+from .aggregation import AnalyticsEngine
+from .auth_sessions import (
+    Session,
+    SessionCache,
+    TokenRefresher,
+    TokenService,
+    session_cache,
+    token_refresher,
+    token_service,
+)
+from .budget import BudgetEngine, budget_engine_for
+from .cache import CacheStats, DataCache, data_cache, org_key
+from .currency import (
+    LedgerConversions,
+    RateTable,
+    conversions_for,
+    convert_records,
+    currency_code,
+    currency_label,
+)
+from .data_sources import DataSource, FakeDataSource, HttpDataSource, get_data_source, set_data_source
+from .executor import JobCancelled, JobContext, JobExecutor, SharedDataset, analytics_executor
+from .goals import GoalProjection, GoalProjector, goal_projector, simulate_goal
+from .http_client import HttpClient, http_client
+from .importer import ImportProgress, import_file, prepare_import, write_batch
+from .invoices import InvoiceIndexes, InvoiceStore
+from .ledger import Ledger, LedgerView, StringDictionary
+from .live_updates import is_client_connected, live_topic, publish_resync, publish_transactions
+from .loader import SectionResult, load_sections
+from .notifications import Notification, NotificationService, notification_service
+from .pubsub import LocalBroker, Subscription, broker
+from .reconciliation import Payments, ReconciliationResult, reconcile
+from .rollups import DailyBitmaps, DailySeries, RollupStore
+from .single_flight import FlightStats, SingleFlight
+from .settings_store import SettingsStore, settings_store
+
+__all__ = [
+    "AnalyticsEngine",
+    "Session",
+    "SessionCache",
+    "TokenRefresher",
+    "TokenService",
+    "session_cache",
+    "token_refresher",
+    "token_service",
+    "BudgetEngine",
+    "budget_engine_for",
+    "CacheStats",
+    "DataCache",
+    "data_cache",
+    "org_key",
+    "LedgerConversions",
+    "RateTable",
+    "conversions_for",
+    "convert_records",
+    "currency_code",
+    "currency_label",
+    "DataSource",
+    "FakeDataSource",
+    "HttpDataSource",
+    "get_data_source",
+    "set_data_source",
+    "JobCancelled",
+    "JobContext",
+    "JobExecutor",
+    "SharedDataset",
+    "analytics_executor",
+    "GoalProjection",
+    "GoalProjector",
+    "goal_projector",
+    "simulate_goal",
+    "HttpClient",
+    "http_client",
+    "ImportProgress",
+    "import_file",
+    "prepare_import",
+    "write_batch",
+    "InvoiceIndexes",
+    "InvoiceStore",
+    "Ledger",
+    "LedgerView",
+    "StringDictionary",
+    "is_client_connected",
+    "live_topic",
+    "publish_resync",
+    "publish_transactions",
+    "SectionResult",
+    "load_sections",
+    "Notification",
+    "NotificationService",
+    "notification_service",
+    "LocalBroker",
+    "Subscription",
+    "broker",
+    "Payments",
+    "ReconciliationResult",
+    "reconcile",
+    "DailyBitmaps",
+    "DailySeries",
+    "RollupStore",
+    "FlightStats",
+    "SingleFlight",
+    "SettingsStore",
+    "settings_store",
+]
@@ -0,0 +1,284 @@
+"""Vectorized group-by aggregations for the analytics page."""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .ledger import Ledger, from_epoch_days, to_epoch_days
+
+PERIODS = ("day", "week", "month")
+
+# Largest (period x key) bitmap used for distinct counts before falling back to sorting.
+MAX_BITMAP_CELLS = 64_000_000
+
+
+def day_range(start_date: str, end_date: str) -> Tuple[int, int]:
+    """Convert an inclusive date range to epoch days.
+
+    Args:
+        start_date: The first date, formatted as ``YYYY-MM-DD``.
+        end_date: The last date, formatted as ``YYYY-MM-DD``.
+
+    Returns:
+        The first and last epoch day.
+    """
+    start_day, end_day = to_epoch_days([start_date, end_date]).tolist()
+    if end_day < start_day:
+        raise ValueError(f"End date {end_date} is before start date {start_date}")
+    return start_day, end_day
+
+
+def period_starts(start_day: int, end_day: int, period: str) -> np.ndarray:
+    """Get the offset of the first day of every period in a range.
+
+    Periods are clipped to the range, so the first one starts at offset 0
+    even if the range begins mid-week or mid-month. Weeks start on Monday.
+
+    Args:
+        start_day: The first epoch day.
+        end_day: The last epoch day.
+        period: One of ``PERIODS``.
+
+    Returns:
+        The sorted offsets (from ``start_day``) where each period begins.
+    """
+    days = np.arange(start_day, end_day + 1)
+    if period == "day":
+        return np.arange(len(days))
+    if period == "week":
+        # 1970-01-01 was a Thursday
+        keys = (days + 3) // 7
+    elif period == "month":
+        keys = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+
+
+def daily_sum(days: np.ndarray, values: np.ndarray, start_day: int, end_day: int) -> np.ndarray:
+    """Sum values per day over a range.
+
+    Args:
+        days: The epoch day of every value.
+        values: The values to sum.
+        start_day: The first epoch day.
+        end_day: The last epoch day.
+
+    Returns:
+        One total per day in the range.
+    """
+    mask = (days >= start_day) & (days <= end_day)
+    return np.bincount(days[mask] - start_day, weights=values[mask], minlength=end_day - start_day + 1)
+
+
+def distinct_per_period(
+    days: np.ndarray, keys: np.ndarray, start_day: int, end_day: int, period: str
+) -> np.ndarray:
+    """Count distinct keys per period over a range.
+
+    Args:
+        days: The epoch day of every event.
+        keys: The non-negative integer key (for example a user id) of every event.
+        start_day: The first epoch day.
+        end_day: The last epoch day.
+        period: One of ``PERIODS``.
+
+    Returns:
+        One distinct count per period in the range.
+    """
+    starts = period_starts(start_day, end_day, period)
+    mask = (days >= start_day) & (days <= end_day)
+    # Map each day offset to its period with a lookup table
+    period_of_day = np.repeat(
+        np.arange(len(starts)), np.diff(np.append(starts, end_day - start_day + 1))
+    )
+    buckets = period_of_day[days[mask] - start_day]
+    keys = keys[mask]
+    width = int(keys.max(initial=0)) + 1
+    if len(starts) * width <= MAX_BITMAP_CELLS:
+        # Mark (period, key) cells in a bitmap, which avoids sorting
+        seen = np.zeros((len(starts), width), dtype=bool)
+        seen[buckets, keys] = True
+        return seen.sum(axis=1)
+    # Encode (period, key) pairs as one int64 so np.unique can dedupe them
+    pairs = np.unique(buckets.astype(np.int64) * width + keys)
+    return np.bincount(pairs // width, minlength=len(starts))
+
+
+def first_seen(days: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Get the first epoch day each distinct key appears.
+
+    Args:
+        days: The epoch day of every event.
+        keys: The non-negative integer key of every event.
+
+    Returns:
+        The first day of every distinct key, in key order.
+    """
+    never = np.iinfo(np.int64).max
+    first = np.full(int(keys.max(initial=-1)) + 1, never, dtype=np.int64)
+    np.minimum.at(first, keys, days)
+    return first[first != never]
+
+
+def rollup(daily: np.ndarray, start_day: int, end_day: int, period: str) -> np.ndarray:
+    """Sum a daily series into periods.
+
+    Args:
+        daily: One value per day in the range.
+        start_day: The first epoch day.
+        end_day: The last epoch day.
+        period: One of ``PERIODS``.
+
+    Returns:
+        One total per period.
+    """
+    if len(daily) == 0:
+        return daily
+    return np.add.reduceat(daily, period_starts(start_day, end_day, period))
+
+
+def period_labels(start_day: int, end_day: int, period: str) -> List[str]:
+    """Get the first date of every period in a range.
+
+    Args:
+        start_day: The first epoch day.
+        end_day: The last epoch day.
+        period: One of ``PERIODS``.
+
+    Returns:
+        Dates formatted as ``YYYY-MM-DD``.
+    """
+    return from_epoch_days(period_starts(start_day, end_day, period) + start_day)
+
+
+class AnalyticsEngine:
+    """Aggregates raw revenue and activity events into chart series."""
+
+    def __init__(
+        self,
+        revenue_days: np.ndarray,
+        revenue_amounts: np.ndarray,
+        event_days: np.ndarray,
+        event_user_ids: np.ndarray,
+    ):
+        """Initialize the engine.
+
+        Args:
+            revenue_days: The epoch day of every revenue item.
+            revenue_amounts: The amount of every revenue item.
+            event_days: The epoch day of every user activity event.
+            event_user_ids: The user id of every activity event.
+        """
+        self.revenue_days = np.asarray(revenue_days, dtype=np.int32)
+        self.revenue_amounts = np.asarray(revenue_amounts, dtype=np.float64)
+        self.event_days = np.asarray(event_days, dtype=np.int32)
+        self.event_user_ids = np.asarray(event_user_ids, dtype=np.int64)
+        self._signup_days: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_ledger(
+        cls,
+        ledger: Ledger,
+        event_days: Optional[np.ndarray] = None,
+        event_user_ids: Optional[np.ndarray] = None,
+    ) -> "AnalyticsEngine":
+        """Build an engine whose revenue is the inflows of a ledger.
+
+        Args:
+            ledger: The transactions to aggregate.
+            event_days: The epoch day of every user activity event.
+            event_user_ids: The user id of every activity event.
+
+        Returns:
+            A new engine.
+        """
+        inflows = ledger.amounts > 0
+        return cls(
+            ledger.dates[inflows],
+            ledger.amounts[inflows],
+            event_days if event_days is not None else np.empty(0, dtype=np.int32),
+            event_user_ids if event_user_ids is not None else np.empty(0, dtype=np.int64),
+        )
+
+    @property
+    def signup_days(self) -> np.ndarray:
+        """The first activity day of every user, sorted."""
+        if self._signup_days is None:
+            self._signup_days = np.sort(first_seen(self.event_days, self.event_user_ids))
+        return self._signup_days
+
+    def add_revenue(self, days: np.ndarray, amounts: np.ndarray):
+        """Append revenue items.
+
+        The arrays are replaced rather than grown in place, so arrays already
+        handed out don't change.
+
+        Args:
+            days: The epoch day of every item.
+            amounts: The amount of every item.
+        """
+        self.revenue_days = np.concatenate((self.revenue_days, np.asarray(days, dtype=np.int32)))
+        self.revenue_amounts = np.concatenate((self.revenue_amounts, np.asarray(amounts, dtype=np.float64)))
+
+    def revenue(self, start_date: str, end_date: str, period: str = "day") -> List[Dict[str, Any]]:
+        """Get total revenue per period.
+
+        Args:
+            start_date: The first date, formatted as ``YYYY-MM-DD``.
+            end_date: The last date, formatted as ``YYYY-MM-DD``.
+            period: One of ``PERIODS``.
+
+        Returns:
+            Dicts with ``date`` and ``revenue`` keys.
+        """
+        start_day, end_day = day_range(start_date, end_date)
+        daily = daily_sum(self.revenue_days, self.revenue_amounts, start_day, end_day)
+        totals = rollup(daily, start_day, end_day, period).round(2).tolist()
+        labels = period_labels(start_day, end_day, period)
+        return [{"date": label, "revenue": total} for label, total in zip(labels, totals)]
+
+    def user_activity(self, start_date: str, end_date: str, period: str = "day") -> List[Dict[str, Any]]:
+        """Get active and new users per period.
+
+        Args:
+            start_date: The first date, formatted as ``YYYY-MM-DD``.
+            end_date: The last date, formatted as ``YYYY-MM-DD``.
+            period: One of ``PERIODS``.
+
+        Returns:
+            Dicts with ``date``, ``active_users`` and ``new_users`` keys.
+        """
+        start_day, end_day = day_range(start_date, end_date)
+        active = distinct_per_period(self.event_days, self.event_user_ids, start_day, end_day, period)
+        signups = daily_sum(self.signup_days, np.ones(len(self.signup_days)), start_day, end_day)
+        new = rollup(signups, start_day, end_day, period).astype(np.int64)
+        labels = period_labels(start_day, end_day, period)
+        return [
+            {"date": label, "active_users": active_users, "new_users": new_users}
+            for label, active_users, new_users in zip(labels, active.tolist(), new.tolist())
+        ]
+
+    def account_growth(self, start_date: str, end_date: str, period: str = "month") -> List[Dict[str, Any]]:
+        """Get the cumulative number of accounts at the end of each period.
+
+        Args:
+            start_date: The first date, formatted as ``YYYY-MM-DD``.
+            end_date: The last date, formatted as ``YYYY-MM-DD``.
+            period: One of ``PERIODS``.
+
+        Returns:
+            Dicts with ``month`` (or ``date``) and ``accounts`` keys.
+        """
+        start_day, end_day = day_range(start_date, end_date)
+        starts = period_starts(start_day, end_day, period) + start_day
+        ends = np.append(starts[1:] - 1, end_day)
+        accounts = np.searchsorted(self.signup_days, ends, side="right").tolist()
+        if period == "month":
+            labels = [
+                month.strftime("%b %Y")
+                for month in starts.astype("datetime64[D]").astype(object)
+            ]
+            return [{"month": label, "accounts": count} for label, count in zip(labels, accounts)]
+        labels = from_epoch_days(starts)
+        return [{"date": label, "accounts": count} for label, count in zip(labels, accounts)]
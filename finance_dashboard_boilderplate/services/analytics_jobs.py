@@ -0,0 +1,149 @@
+"""Analytics queries that run in the job executor's worker processes.
+
+The raw revenue and activity events are published once as a shared
+dataset. Each worker builds its own rollups from the shared arrays on
+first use and answers date-range queries from them, so neither building
+nor querying runs on the app's event loop.
+
+The events are append-only. Inflows of new ledger rows are added as
+revenue and the dataset is republished before the next query; workers
+fold in only the rows added since their last job.
+"""
+
+import functools
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .aggregation import AnalyticsEngine
+from .cache import data_cache
+from .executor import JobContext, analytics_executor
+from .ledger import to_epoch_days
+from .rollups import RollupStore
+
+EVENTS_DATASET = "analytics_events"
+
+# Columns of the events dataset.
+EVENT_COLUMNS = ("revenue_days", "revenue_amounts", "event_days", "event_user_ids")
+
+# Guards the engine's events and whether the workers have the latest of them.
+_events_lock = threading.Lock()
+_published = False
+
+# This worker's rollups, with the revenue and activity rows folded into them.
+_store: Optional[Tuple[int, int, RollupStore]] = None
+
+
+@functools.lru_cache(maxsize=1)
+def get_analytics_engine() -> AnalyticsEngine:
+    """Get the engine over the raw revenue and activity events."""
+    # In a real app, you would load the raw events from your warehouse
+    # For demo purposes, we'll generate two years of mock events
+    rng = np.random.default_rng(42)
+    today = int(to_epoch_days([datetime.now().strftime("%Y-%m-%d")])[0])
+    history = 730
+
+    revenue_days = today - rng.integers(0, history, 200_000)
+    revenue_amounts = rng.lognormal(mean=3.0, sigma=0.8, size=len(revenue_days)).round(2)
+
+    # Users sign up at a growing rate and are active on random days after
+    users = 20_000
+    signup_days = today - (history * (1 - np.sqrt(rng.random(users)))).astype(np.int64)
+    event_user_ids = rng.integers(0, users, 1_000_000)
+    span = today - signup_days[event_user_ids] + 1
+    event_days = signup_days[event_user_ids] + (rng.random(len(event_user_ids)) * span).astype(np.int64)
+
+    return AnalyticsEngine(revenue_days, revenue_amounts, event_days, event_user_ids)
+
+
+def event_arrays(engine: AnalyticsEngine) -> Dict[str, np.ndarray]:
+    """Get the arrays to publish as the events dataset.
+
+    Args:
+        engine: An engine holding the raw events.
+
+    Returns:
+        The event columns keyed by name.
+    """
+    return {name: getattr(engine, name) for name in EVENT_COLUMNS}
+
+
+def events_published() -> bool:
+    """Check whether the workers have the latest events."""
+    return _published
+
+
+def publish_events():
+    """Share the latest events with the workers, if they don't have them yet."""
+    global _published
+    with _events_lock:
+        if not _published:
+            analytics_executor.publish(EVENTS_DATASET, event_arrays(get_analytics_engine()))
+            _published = True
+
+
+def add_ledger_rows(days: np.ndarray, amounts: np.ndarray):
+    """Count the inflows among new ledger rows as revenue.
+
+    The rows must not have been added before. Cached revenue charts are
+    dropped, and the events are republished before the next query.
+
+    Args:
+        days: The epoch day of every row.
+        amounts: The amount of every row.
+    """
+    global _published
+    amounts = np.asarray(amounts, dtype=np.float64)
+    inflows = amounts > 0
+    if not inflows.any():
+        return
+    with _events_lock:
+        get_analytics_engine().add_revenue(np.asarray(days)[inflows], amounts[inflows])
+        _published = False
+    data_cache.invalidate("revenue")
+
+
+def rollup_store(context: JobContext) -> RollupStore:
+    """Get this worker's rollups, folding in rows added since the last job.
+
+    Rows already folded in are skipped, since the dataset only grows at the
+    end. A dataset shorter than the rollups is a new one, and they are
+    rebuilt from it.
+
+    Args:
+        context: The job's context.
+
+    Returns:
+        The rollups over the shared events.
+    """
+    global _store
+    revenue_days, revenue_amounts, event_days, event_user_ids = (context.arrays[name] for name in EVENT_COLUMNS)
+    if _store is None or _store[0] > len(revenue_days) or _store[1] > len(event_days):
+        _store = (0, 0, RollupStore())
+    revenue_rows, event_rows, store = _store
+    if revenue_rows < len(revenue_days) or event_rows < len(event_days):
+        context.check_cancelled()
+        # Slices of the shared arrays; they are not copied
+        store.add_revenue(revenue_days[revenue_rows:], revenue_amounts[revenue_rows:])
+        store.add_events(event_days[event_rows:], event_user_ids[event_rows:])
+        _store = (len(revenue_days), len(event_days), store)
+    context.check_cancelled()
+    return store
+
+
+def revenue(context: JobContext, start_date: str, end_date: str, period: str = "day") -> List[Dict[str, Any]]:
+    """Get revenue per period for a date range."""
+    return rollup_store(context).revenue(start_date, end_date, period)
+
+
+def user_activity(context: JobContext, start_date: str, end_date: str, period: str = "day") -> List[Dict[str, Any]]:
+    """Get active and new users per period for a date range."""
+    return rollup_store(context).user_activity(start_date, end_date, period)
+
+
+def account_growth(context: JobContext, end_date: str) -> List[Dict[str, Any]]:
+    """Get monthly account totals for the year up to a date."""
+    start_date = (datetime.strptime(end_date, "%Y-%m-%d") - timedelta(days=365)).strftime("%Y-%m-%d")
+    return rollup_store(context).account_growth(start_date, end_date, "month")
@@ -0,0 +1,353 @@
+"""Validated auth sessions, cached so page loads don't revalidate tokens."""
+
+import random
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from .single_flight import SingleFlight
+
+# Seconds an access token is valid after it is issued.
+ACCESS_TOKEN_TTL = 3600.0
+
+# Seconds a token the backend rejected is rejected without asking again.
+NEGATIVE_TTL = 300.0
+
+# Seconds before expiry by which sessions refresh their access token.
+REFRESH_LEAD = 120.0
+
+# Refreshes are spread over up to this many seconds before the lead, so
+# sessions that signed in together don't all refresh together.
+REFRESH_JITTER = 300.0
+
+# Seconds a rotated refresh token still gets the tokens that replaced it,
+# for tabs that haven't seen the new tokens yet.
+REFRESH_GRACE = 30.0
+
+# Sessions without a page load for this long stop refreshing in the
+# background; their next page load refreshes instead.
+REFRESH_IDLE_TIMEOUT = 1800.0
+
+# (access token, refresh token, session)
+Tokens = Tuple[str, str, "Session"]
+
+
+class Session:
+    """Who an access token belongs to and when it expires."""
+
+    __slots__ = ("user_id", "username", "email", "expires_at", "org_id")
+
+    def __init__(self, user_id: Hashable, username: str, email: str, expires_at: float, org_id: Hashable = None):
+        """Initialize the session.
+
+        Args:
+            user_id: The signed-in user.
+            username: The user's display name.
+            email: The user's email.
+            expires_at: When the access token expires, as a Unix timestamp.
+            org_id: The organization the user belongs to, if any.
+        """
+        self.user_id = user_id
+        self.username = username
+        self.email = email
+        self.expires_at = expires_at
+        self.org_id = org_id
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the session as a dict.
+
+        Returns:
+            The session's fields keyed by name.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class TokenService:
+    """Issues, validates and revokes access tokens.
+
+    In a real app, this would call your auth backend. For demo purposes,
+    tokens are random strings remembered in memory.
+    """
+
+    def __init__(self, ttl: float = ACCESS_TOKEN_TTL):
+        """Initialize the service.
+
+        Args:
+            ttl: Seconds each access token is valid.
+        """
+        self.ttl = ttl
+        self.validations = 0
+        self._sessions: Dict[str, Session] = {}
+        # refresh token -> (user id, username, email, organization id)
+        self._refresh_tokens: Dict[str, Tuple[Hashable, str, str, Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def issue(self, user_id: Hashable, username: str, email: str, org_id: Hashable = None) -> Tokens:
+        """Sign a user in.
+
+        Args:
+            user_id: The user.
+            username: The user's display name.
+            email: The user's email.
+            org_id: The organization the user belongs to, if any.
+
+        Returns:
+            The access token, the refresh token and the session.
+        """
+        access_token, refresh_token = secrets.token_urlsafe(32), secrets.token_urlsafe(32)
+        session = Session(user_id, username, email, time.time() + self.ttl, org_id)
+        with self._lock:
+            self._sessions[access_token] = session
+            self._refresh_tokens[refresh_token] = (user_id, username, email, org_id)
+        return access_token, refresh_token, session
+
+    async def refresh(self, refresh_token: str) -> Optional[Tokens]:
+        """Exchange a refresh token for new tokens.
+
+        The refresh token is rotated: it can't be used again.
+
+        Args:
+            refresh_token: The token.
+
+        Returns:
+            The new tokens, or None if the refresh token is unknown or was used.
+        """
+        with self._lock:
+            user = self._refresh_tokens.pop(refresh_token, None)
+        if user is None:
+            return None
+        return self.issue(*user)
+
+    async def validate(self, access_token: str) -> Optional[Session]:
+        """Check an access token with the backend.
+
+        Args:
+            access_token: The token.
+
+        Returns:
+            The token's session, or None if it is unknown, revoked or expired.
+        """
+        with self._lock:
+            self.validations += 1
+            session = self._sessions.get(access_token)
+        if session is None or session.expires_at <= time.time():
+            return None
+        return session
+
+    def revoke(self, access_token: str):
+        """Invalidate an access token.
+
+        Args:
+            access_token: The token.
+        """
+        with self._lock:
+            self._sessions.pop(access_token, None)
+
+    def revoke_refresh(self, refresh_token: str):
+        """Invalidate a refresh token.
+
+        Args:
+            refresh_token: The token.
+        """
+        with self._lock:
+            self._refresh_tokens.pop(refresh_token, None)
+
+
+def refresh_delay(expires_at: float, now: Optional[float] = None) -> float:
+    """Get how long to wait before refreshing a session's access token.
+
+    The refresh lands ``REFRESH_LEAD`` seconds before expiry, moved earlier
+    by a random amount of up to ``REFRESH_JITTER`` seconds (and at most half
+    the time left) so that refreshes are spread out.
+
+    Args:
+        expires_at: When the access token expires, as a Unix timestamp.
+        now: The current time; defaults to now.
+
+    Returns:
+        Seconds to wait, 0 if the token should be refreshed right away.
+    """
+    now = time.time() if now is None else now
+    remaining = expires_at - now - REFRESH_LEAD
+    if remaining <= 0:
+        return 0.0
+    return remaining - random.uniform(0, min(REFRESH_JITTER, remaining / 2))
+
+
+class SessionCache:
+    """Sessions of validated tokens, kept for the rest of each token's lifetime.
+
+    Tokens the backend rejected are cached too, for ``negative_ttl``
+    seconds, and revoked tokens until they would have expired, so a
+    client retrying a bad token doesn't reach the backend on every page.
+    """
+
+    def __init__(self, service: TokenService, max_entries: int = 10000, negative_ttl: float = NEGATIVE_TTL):
+        """Initialize the cache.
+
+        Args:
+            service: Validates tokens missing from the cache.
+            max_entries: The number of tokens kept before evicting the least recently used.
+            negative_ttl: Seconds a rejected token stays rejected.
+        """
+        self.service = service
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        # token -> (session, or None if rejected; when the entry expires)
+        self._entries: "OrderedDict[str, Tuple[Optional[Session], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, access_token: str, session: Optional[Session], expires_at: float):
+        """Cache a token's validation result."""
+        with self._lock:
+            self._entries[access_token] = (session, expires_at)
+            self._entries.move_to_end(access_token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def lookup(self, access_token: str) -> Tuple[bool, Optional[Session]]:
+        """Look a token up without validating it.
+
+        Args:
+            access_token: The token.
+
+        Returns:
+            Whether the token was cached, and its session if it is valid.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(access_token)
+            if entry is None:
+                return False, None
+            if entry[1] <= now:
+                del self._entries[access_token]
+                return False, None
+            self._entries.move_to_end(access_token)
+            if entry[0] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, entry[0]
+
+    async def validate(self, access_token: str) -> Optional[Session]:
+        """Get a token's session, asking the backend only if it isn't cached.
+
+        Args:
+            access_token: The token.
+
+        Returns:
+            The token's session, or None if it is invalid.
+        """
+        cached, session = self.lookup(access_token)
+        if cached:
+            return session
+        with self._lock:
+            self.misses += 1
+        session = await self.service.validate(access_token)
+        if session is None:
+            self._store(access_token, None, time.time() + self.negative_ttl)
+        else:
+            self._store(access_token, session, session.expires_at)
+        return session
+
+    def add(self, access_token: str, session: Session):
+        """Cache a session the app just issued.
+
+        Args:
+            access_token: The session's token.
+            session: The session.
+        """
+        self._store(access_token, session, session.expires_at)
+
+    def revoke(self, access_token: str):
+        """Revoke a token and reject it from the cache from now on.
+
+        Args:
+            access_token: The token.
+        """
+        _, session = self.lookup(access_token)
+        self.service.revoke(access_token)
+        expires_at = session.expires_at if session is not None else time.time() + self.negative_ttl
+        self._store(access_token, None, expires_at)
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache's counters.
+
+        Returns:
+            Hits, negative hits, misses and the number of cached tokens.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+class TokenRefresher:
+    """Refreshes tokens, making one backend call per refresh token.
+
+    Callers refreshing the same token at the same time, such as a page
+    load and the background scheduler, or two tabs sharing the saved
+    tokens, all wait for one call. A caller arriving with a refresh token
+    rotated in the last ``REFRESH_GRACE`` seconds gets the new tokens.
+    """
+
+    def __init__(self, service: TokenService, cache: SessionCache, grace: float = REFRESH_GRACE):
+        """Initialize the refresher.
+
+        Args:
+            service: Exchanges refresh tokens.
+            cache: Receives the refreshed sessions.
+            grace: Seconds a rotated refresh token still returns its replacement.
+        """
+        self.service = service
+        self.cache = cache
+        self.grace = grace
+        self.refreshes = 0
+        self.coalesced = 0
+        self._flights = SingleFlight()
+        self._recent: Dict[str, Tuple[Optional[Tokens], float]] = {}
+
+    async def refresh(self, refresh_token: str) -> Optional[Tokens]:
+        """Refresh a session's tokens.
+
+        Args:
+            refresh_token: The session's refresh token.
+
+        Returns:
+            The new tokens, or None if the session can't be refreshed.
+        """
+        recent = self._recent.get(refresh_token)
+        if recent is not None and recent[1] > time.time():
+            self.coalesced += 1
+            return recent[0]
+
+        if self._flights.in_flight(refresh_token):
+            self.coalesced += 1
+        return await self._flights.do(refresh_token, lambda: self._refresh(refresh_token))
+
+    async def _refresh(self, refresh_token: str) -> Optional[Tokens]:
+        """Make the backend call for a refresh token."""
+        self.refreshes += 1
+        tokens = await self.service.refresh(refresh_token)
+        if tokens is not None:
+            self.cache.add(tokens[0], tokens[2])
+
+        now = time.time()
+        for token in [token for token, (_, until) in self._recent.items() if until <= now]:
+            del self._recent[token]
+        self._recent[refresh_token] = (tokens, now + self.grace)
+        return tokens
+
+
+# Validated tokens are cached across sessions, so each is checked with the backend once.
+token_service = TokenService()
+session_cache = SessionCache(token_service)
+token_refresher = TokenRefresher(token_service, session_cache)
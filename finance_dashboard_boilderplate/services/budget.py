@@ -0,0 +1,249 @@
+"""Running per-category, per-period spending totals for budgets."""
+
+import threading
+import weakref
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .currency import BASE_CURRENCY, RateTable, conversions_for
+from .ledger import Ledger
+
+BUDGET_PERIODS = ("week", "month")
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def period_keys(days: np.ndarray, period: str) -> np.ndarray:
+    """Map epoch days to period numbers.
+
+    Args:
+        days: Days since 1970-01-01.
+        period: One of ``BUDGET_PERIODS``.
+
+    Returns:
+        Weeks (starting Monday) or months since 1970, as int64.
+    """
+    days = np.asarray(days, dtype=np.int64)
+    if period == "week":
+        # 1970-01-01 was a Thursday
+        return (days + 3) // 7
+    if period == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    raise ValueError(f"Unknown budget period: {period}")
+
+
+def period_label(key: int, period: str) -> str:
+    """Format a period number.
+
+    Args:
+        key: A period number from ``period_keys``.
+        period: One of ``BUDGET_PERIODS``.
+
+    Returns:
+        ``YYYY-MM`` for months, or the Monday ``YYYY-MM-DD`` for weeks.
+    """
+    if period == "week":
+        return str(np.datetime64(key * 7 - 3, "D"))
+    return str(np.datetime64(key, "M"))
+
+
+def parse_period(label: str, period: str) -> int:
+    """Get the period number of a label or of any date inside the period.
+
+    Args:
+        label: A ``YYYY-MM`` month or a ``YYYY-MM-DD`` date.
+        period: One of ``BUDGET_PERIODS``.
+
+    Returns:
+        The period number.
+    """
+    if len(label) == 7:
+        label = f"{label}-01"
+    if period == "month":
+        return (int(label[:4]) - 1970) * 12 + int(label[5:7]) - 1
+    if period == "week":
+        return (date.fromisoformat(label[:10]).toordinal() - EPOCH_ORDINAL + 3) // 7
+    raise ValueError(f"Unknown budget period: {period}")
+
+
+class BudgetEngine:
+    """Spending per category per period, kept up to date as transactions arrive.
+
+    Only outflows count as spending, and totals are kept in integer cents
+    so that repeated updates never drift. Ledgers are append-only, so new
+    rows reach the engine only through ``sync``, which adds the rows
+    appended since the last call; ``rebuild`` re-sums a whole ledger and is
+    only needed to repair totals that fell out of sync.
+    """
+
+    def __init__(self, period: str = "month"):
+        """Initialize empty totals.
+
+        Args:
+            period: One of ``BUDGET_PERIODS``.
+        """
+        if period not in BUDGET_PERIODS:
+            raise ValueError(f"Unknown budget period: {period}")
+        self.period = period
+        self.rows_applied = 0
+        # Cents spent, by period number then category
+        self._totals: Dict[int, Dict[str, int]] = {}
+
+    @classmethod
+    def from_ledger(
+        cls, ledger: Ledger, period: str = "month", amounts: Optional[np.ndarray] = None
+    ) -> "BudgetEngine":
+        """Build totals for every transaction in a ledger.
+
+        Args:
+            ledger: The transactions.
+            period: One of ``BUDGET_PERIODS``.
+            amounts: The ledger's amounts converted to another currency, if
+                the totals should be in it.
+
+        Returns:
+            A new engine.
+        """
+        engine = cls(period)
+        engine.rebuild(ledger, amounts)
+        return engine
+
+    def _add_rows(self, ledger: Ledger, start: int, amounts: Optional[np.ndarray] = None):
+        """Add the spending of ledger rows from ``start`` onward."""
+        amounts = (ledger.amounts if amounts is None else amounts)[start:]
+        outflows = amounts < 0
+        if not outflows.any():
+            return
+        cents = np.rint(-amounts[outflows] * 100).astype(np.int64)
+        codes = ledger.category_codes[start:][outflows].astype(np.int64)
+        periods = period_keys(ledger.dates[start:][outflows], self.period)
+
+        # Sum each (category, period) group with one pass over the rows
+        first_period = int(periods.min())
+        span = int(periods.max()) - first_period + 1
+        groups, inverse = np.unique(codes * span + (periods - first_period), return_inverse=True)
+        sums = np.bincount(inverse, weights=cents).astype(np.int64)
+        for group, total in zip(groups.tolist(), sums.tolist()):
+            code, offset = divmod(group, span)
+            totals = self._totals.setdefault(first_period + offset, {})
+            category = ledger.categories.values[code]
+            totals[category] = totals.get(category, 0) + total
+
+    def sync(self, ledger: Ledger, amounts: Optional[np.ndarray] = None):
+        """Add the rows appended to a ledger since it was last synced.
+
+        Args:
+            ledger: The ledger this engine was built from.
+            amounts: The converted amounts the engine was built from, if any.
+        """
+        if len(ledger) > self.rows_applied:
+            self._add_rows(ledger, self.rows_applied, amounts)
+            self.rows_applied = len(ledger)
+
+    def rebuild(self, ledger: Ledger, amounts: Optional[np.ndarray] = None):
+        """Re-sum every row of a ledger, discarding the running totals.
+
+        Args:
+            ledger: The transactions.
+            amounts: The ledger's amounts converted to another currency, if
+                the totals should be in it.
+        """
+        self._totals = {}
+        self._add_rows(ledger, 0, amounts)
+        self.rows_applied = len(ledger)
+
+    def spent(self, category: str, period: str) -> float:
+        """Get the spending in a category for one period.
+
+        Args:
+            category: The category name.
+            period: A label from ``period_label`` or a date inside the period.
+
+        Returns:
+            The amount spent.
+        """
+        return self._totals.get(parse_period(period, self.period), {}).get(category, 0) / 100
+
+    def totals(self, period: str) -> Dict[str, float]:
+        """Get the spending in every category for one period.
+
+        Args:
+            period: A label from ``period_label`` or a date inside the period.
+
+        Returns:
+            The amount spent, keyed by category.
+        """
+        totals = self._totals.get(parse_period(period, self.period), {})
+        return {category: cents / 100 for category, cents in totals.items()}
+
+    def latest_period(self) -> Optional[str]:
+        """Get the most recent period with any spending.
+
+        Returns:
+            The period label, or None if nothing has been spent.
+        """
+        periods = [key for key, totals in self._totals.items() if totals]
+        if not periods:
+            return None
+        return period_label(max(periods), self.period)
+
+    def report(self, budgets: List[Dict[str, Any]], period: str) -> List[Dict[str, Any]]:
+        """Fill in the spending of each budget for one period.
+
+        Args:
+            budgets: Dicts with at least ``name`` and ``budget`` keys.
+            period: A label from ``period_label`` or a date inside the period.
+
+        Returns:
+            Copies of the budgets with ``spent`` set.
+        """
+        totals = self.totals(period)
+        return [{**budget, "spent": totals.get(budget["name"], 0.0)} for budget in budgets]
+
+
+_engines: "weakref.WeakKeyDictionary[Ledger, BudgetEngine]" = weakref.WeakKeyDictionary()
+_engines_lock = threading.Lock()
+
+
+def budget_engine_for(
+    ledger: Ledger,
+    period: str = "month",
+    rates: Optional[RateTable] = None,
+    currency: str = BASE_CURRENCY,
+) -> BudgetEngine:
+    """Get the running totals for a ledger, catching up on appended rows.
+
+    Ledgers are shared through the data cache, so the engine is kept per
+    ledger rather than per session; it is built once and then only the
+    rows appended since the last call are added.
+
+    Args:
+        ledger: The transactions.
+        period: One of ``BUDGET_PERIODS``.
+        rates: Exchange rates, needed for totals in another currency.
+        currency: The currency of the totals. Each transaction is converted
+            at the rate of its own day, and each currency keeps its own engine.
+
+    Returns:
+        The ledger's budget engine.
+    """
+    if currency != BASE_CURRENCY and rates is not None and currency in rates:
+        conversions = conversions_for(ledger)
+        amounts = conversions.amounts(ledger, rates, currency)
+        return conversions.aggregate(
+            rates,
+            currency,
+            f"budget:{period}",
+            build=lambda: BudgetEngine.from_ledger(ledger, period, amounts),
+            update=lambda engine: engine.sync(ledger, amounts),
+        )
+
+    with _engines_lock:
+        engine = _engines.get(ledger)
+        if engine is None or engine.period != period:
+            engine = _engines[ledger] = BudgetEngine.from_ledger(ledger, period)
+        else:
+            engine.sync(ledger)
+        return engine
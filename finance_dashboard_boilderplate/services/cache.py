@@ -0,0 +1,226 @@
+"""Process-wide TTL cache with stale-while-revalidate for state fetchers."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .single_flight import SingleFlight
+
+# Seconds each data source is served without revalidation.
+SOURCE_TTLS = {
+    "accounts": 30.0,
+    "transactions": 30.0,
+    "budget": 300.0,
+    "goals": 300.0,
+    "invoices": 60.0,
+    "payments": 60.0,
+    "fx_rates": 3600.0,
+    "revenue": 300.0,
+    "activity": 300.0,
+    "products": 900.0,
+    "growth": 3600.0,
+}
+
+CacheKey = Tuple[Hashable, str, Optional[str], Optional[str], Hashable]
+
+
+def org_key(org_id: Hashable) -> Tuple[str, Hashable]:
+    """Get the key that data shared by a whole organization is cached under.
+
+    Pass it in place of a user id, so every member's loads share one entry
+    and one in-flight load.
+
+    Args:
+        org_id: The organization.
+
+    Returns:
+        A key that can't collide with a user id.
+    """
+    return ("org", org_id)
+
+
+class CacheStats:
+    """Counters describing how a cache is being used."""
+
+    def __init__(self):
+        """Initialize all counters to zero."""
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        """Get the counters as a dict.
+
+        Returns:
+            The counter values keyed by name.
+        """
+        return dict(self.__dict__)
+
+
+class _Entry:
+    """A cached value and when it was loaded."""
+
+    __slots__ = ("value", "loaded_at")
+
+    def __init__(self, value: Any, loaded_at: float):
+        self.value = value
+        self.loaded_at = loaded_at
+
+
+class DataCache:
+    """A bounded LRU cache keyed by user, data source and date range.
+
+    Fresh entries are returned directly. Entries past their TTL but within
+    ``max_stale`` seconds of it are still returned right away while a
+    background task reloads them. Older entries are treated as misses.
+    Concurrent misses for the same key share one load.
+
+    Cached values are shared between every caller with the same key, so
+    they must not be mutated in place.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 60.0,
+        max_stale: float = 600.0,
+    ):
+        """Initialize the cache.
+
+        Args:
+            max_entries: The number of entries kept before evicting the least recently used.
+            ttls: Seconds each source stays fresh, keyed by source name.
+            default_ttl: The TTL for sources missing from ``ttls``.
+            max_stale: Seconds past the TTL that a stale entry may still be served.
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_stale = max_stale
+        self.stats = CacheStats()
+        self.source_stats: Dict[str, CacheStats] = {}
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._refreshing: Dict[CacheKey, asyncio.Task] = {}
+        # Loads in flight, with per-key counts of the loads they saved
+        self.loads = SingleFlight()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _count(self, source: str, counter: str):
+        """Increment a counter both globally and for a source."""
+        setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+        stats = self.source_stats.setdefault(source, CacheStats())
+        setattr(stats, counter, getattr(stats, counter) + 1)
+
+    def _store(self, key: CacheKey, value: Any):
+        """Insert or replace an entry, evicting the oldest if over capacity."""
+        self._entries[key] = _Entry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._count(evicted[1], "evictions")
+
+    async def _load(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Load and store an entry on a miss."""
+        value = await loader()
+        self._store(key, value)
+        return value
+
+    async def _refresh(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]):
+        """Reload an entry in the background, keeping the stale value on failure."""
+        try:
+            self._store(key, await loader())
+            self._count(key[1], "refreshes")
+        except Exception as e:
+            self._count(key[1], "refresh_errors")
+            print(f"Error refreshing {key[1]}: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def get(
+        self,
+        source: str,
+        loader: Callable[[], Awaitable[Any]],
+        user_id: Hashable = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        variant: Hashable = None,
+    ) -> Any:
+        """Get a value from the cache, loading it on a miss.
+
+        Args:
+            source: The name of the data source.
+            loader: A coroutine function that loads the value.
+            user_id: The user the data belongs to.
+            start_date: The start of the requested date range, if any.
+            end_date: The end of the requested date range, if any.
+            variant: Any other parameter the value depends on, such as a grouping period.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        key = (user_id, source, start_date, end_date, variant)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.loaded_at
+            ttl = self.ttls.get(source, self.default_ttl)
+            if age < ttl:
+                self._entries.move_to_end(key)
+                self._count(source, "hits")
+                return entry.value
+            if age < ttl + self.max_stale:
+                self._entries.move_to_end(key)
+                self._count(source, "stale_hits")
+                if key not in self._refreshing:
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, loader))
+                return entry.value
+
+        self._count(source, "coalesced" if self.loads.in_flight(key) else "misses")
+        return await self.loads.do(key, lambda: self._load(key, loader))
+
+    def put(
+        self,
+        source: str,
+        value: Any,
+        user_id: Hashable = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        variant: Hashable = None,
+    ):
+        """Replace a cached value, for example after the caller changed the data.
+
+        Args:
+            source: The name of the data source.
+            value: The new value.
+            user_id: The user the data belongs to.
+            start_date: The start of the date range, if any.
+            end_date: The end of the date range, if any.
+            variant: Any other parameter the value depends on.
+        """
+        self._store((user_id, source, start_date, end_date, variant), value)
+
+    def invalidate(self, source: Optional[str] = None, user_id: Hashable = None):
+        """Drop entries so the next read reloads them.
+
+        Args:
+            source: Only drop entries for this source.
+            user_id: Only drop entries for this user.
+        """
+        for key in list(self._entries):
+            if (source is None or key[1] == source) and (user_id is None or key[0] == user_id):
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every entry."""
+        self._entries.clear()
+
+
+# Cached data is shared between sessions; entries are keyed by user.
+data_cache = DataCache(ttls=SOURCE_TTLS)
@@ -0,0 +1,295 @@
+"""Historical exchange rates and whole-column currency conversion.
+
+Rates are held as a dense day-by-currency array, so the rate of any
+transaction is one index into it, and a ledger's amounts convert with a
+single gather and multiply. Converted columns are cached per ledger and
+currency, and only rows appended since the last conversion are converted.
+"""
+
+import itertools
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ledger import Ledger, to_epoch_days
+
+# The currency ledgers, budgets and balances are recorded in.
+BASE_CURRENCY = "USD"
+
+# Supported currencies and their symbols, in the order they are offered.
+CURRENCY_SYMBOLS = {
+    "USD": "$",
+    "EUR": "€",
+    "GBP": "£",
+    "JPY": "¥",
+    "CAD": "C$",
+    "AUD": "A$",
+    "INR": "₹",
+}
+
+_versions = itertools.count(1)
+
+
+def currency_label(code: str) -> str:
+    """Format a currency for display, e.g. ``USD ($)``.
+
+    Args:
+        code: The ISO 4217 currency code.
+
+    Returns:
+        The code followed by its symbol.
+    """
+    return f"{code} ({CURRENCY_SYMBOLS[code]})"
+
+
+def currency_code(label: str) -> Optional[str]:
+    """Get the currency code of a display label.
+
+    Args:
+        label: A label from ``currency_label``, or a bare code.
+
+    Returns:
+        The currency code, or None if the currency isn't supported.
+    """
+    code = label.split(" ", 1)[0].upper() if label else ""
+    return code if code in CURRENCY_SYMBOLS else None
+
+
+class RateTable:
+    """Daily exchange rates stored as a day-by-currency array.
+
+    ``rates[day, column]`` is the number of units of a currency one unit of
+    ``BASE_CURRENCY`` bought on that day. Days before the first or after the
+    last day use the nearest known rates.
+    """
+
+    def __init__(self, start_day: int, codes: Sequence[str], rates: np.ndarray):
+        """Initialize the table.
+
+        Args:
+            start_day: The epoch day of the first row.
+            codes: The currency of each column.
+            rates: A (days, currencies) array with no gaps.
+        """
+        self.start_day = int(start_day)
+        self.codes = tuple(codes)
+        self.columns = {code: column for column, code in enumerate(self.codes)}
+        self.rates = np.asarray(rates, dtype=np.float64)
+        # Identifies these rates in the caches of converted values
+        self.version = next(_versions)
+
+    @classmethod
+    def from_observations(cls, records: Sequence[Dict[str, Any]]) -> "RateTable":
+        """Build a table from rate observations, carrying each rate forward until the next one.
+
+        Args:
+            records: Dicts with ``date``, ``currency`` and ``rate`` keys.
+
+        Returns:
+            A table covering every day from the first observation to the last.
+        """
+        if not records:
+            return cls(0, (BASE_CURRENCY,), np.ones((1, 1)))
+        days = to_epoch_days([record["date"] for record in records])
+        codes, columns = np.unique([record["currency"] for record in records], return_inverse=True)
+        start_day = int(days.min())
+        table = np.full((int(days.max()) - start_day + 1, len(codes)), np.nan)
+        table[days - start_day, columns] = [record["rate"] for record in records]
+
+        # Point every day at the last observed row, or the first one before any
+        known = ~np.isnan(table)
+        positions = np.arange(len(table))[:, np.newaxis]
+        last_seen = np.maximum.accumulate(np.where(known, positions, -1), axis=0)
+        last_seen = np.where(last_seen < 0, known.argmax(axis=0), last_seen)
+        table = table[last_seen, np.arange(len(codes))]
+
+        codes = [str(code) for code in codes]
+        if BASE_CURRENCY not in codes:
+            codes.append(BASE_CURRENCY)
+            table = np.column_stack((table, np.ones(len(table))))
+        return cls(start_day, codes, table)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.columns
+
+    def _rows(self, days: np.ndarray) -> np.ndarray:
+        """Get the table rows of epoch days."""
+        return np.clip(np.asarray(days, dtype=np.int64) - self.start_day, 0, len(self.rates) - 1)
+
+    def rate(self, code: str, day: Optional[int] = None) -> float:
+        """Get the rate of one currency on one day.
+
+        Args:
+            code: The currency code.
+            day: The epoch day; defaults to the latest rate.
+
+        Returns:
+            Units of the currency per unit of ``BASE_CURRENCY``.
+        """
+        row = len(self.rates) - 1 if day is None else int(self._rows(np.array([day]))[0])
+        return float(self.rates[row, self.columns[code]])
+
+    def convert(
+        self,
+        amounts: np.ndarray,
+        days: np.ndarray,
+        to: str,
+        source: str = BASE_CURRENCY,
+    ) -> np.ndarray:
+        """Convert a column of amounts at the rate of each amount's day.
+
+        Args:
+            amounts: The amounts.
+            days: The epoch day of each amount.
+            to: The currency to convert to.
+            source: The currency the amounts are in.
+
+        Returns:
+            The converted amounts.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if to == source:
+            return amounts.copy()
+        rows = self._rows(days)
+        converted = amounts * self.rates[rows, self.columns[to]]
+        if source != BASE_CURRENCY:
+            converted /= self.rates[rows, self.columns[source]]
+        return converted
+
+
+class LedgerConversions:
+    """One ledger's amounts converted to other currencies, with aggregates built from them.
+
+    Ledgers are append-only, so a converted column stays valid and only
+    grows: each call converts the rows appended since the last one.
+    """
+
+    def __init__(self):
+        """Initialize empty caches."""
+        self._lock = threading.RLock()
+        # Converted amounts by (rate table version, currency)
+        self._columns: Dict[Tuple[int, str], np.ndarray] = {}
+        # Aggregates by (rate table version, currency, name)
+        self._aggregates: Dict[Tuple[int, str, str], Any] = {}
+
+    def amounts(self, ledger: Ledger, rates: RateTable, code: str) -> np.ndarray:
+        """Get the ledger's amounts in a currency.
+
+        Args:
+            ledger: The ledger, in ``BASE_CURRENCY``.
+            rates: The rates to convert at.
+            code: The currency to convert to.
+
+        Returns:
+            The converted amount of every row.
+        """
+        if code == BASE_CURRENCY:
+            return ledger.amounts
+        with self._lock:
+            self._drop_stale(rates)
+            key = (rates.version, code)
+            column = self._columns.get(key)
+            if column is None or len(column) < len(ledger):
+                done = 0 if column is None else len(column)
+                converted = rates.convert(ledger.amounts[done:], ledger.dates[done:], code)
+                column = converted if column is None else np.concatenate((column, converted))
+                self._columns[key] = column
+            return column[:len(ledger)]
+
+    def _drop_stale(self, rates: RateTable):
+        """Forget values converted at rates older than ``rates``."""
+        for cache in (self._columns, self._aggregates):
+            for key in [key for key in cache if key[0] < rates.version]:
+                del cache[key]
+
+    def aggregate(
+        self,
+        rates: RateTable,
+        code: str,
+        name: str,
+        build: Callable[[], Any],
+        update: Optional[Callable[[Any], None]] = None,
+    ) -> Any:
+        """Get an aggregate of the converted amounts, building it once per currency.
+
+        Args:
+            rates: The rates the amounts were converted at.
+            code: The currency.
+            name: Names the aggregate within the currency.
+            build: Called with no arguments to build the aggregate.
+            update: Called with a cached aggregate to bring it up to date.
+
+        Returns:
+            The aggregate.
+        """
+        key = (rates.version, code, name)
+        with self._lock:
+            self._drop_stale(rates)
+            value = self._aggregates.get(key)
+            if value is None:
+                value = self._aggregates[key] = build()
+            elif update is not None:
+                update(value)
+            return value
+
+
+_conversions: "weakref.WeakKeyDictionary[Ledger, LedgerConversions]" = weakref.WeakKeyDictionary()
+_conversions_lock = threading.Lock()
+
+
+def conversions_for(ledger: Ledger) -> LedgerConversions:
+    """Get the converted columns and aggregates of a ledger.
+
+    Ledgers are shared through the data cache, so conversions are kept per
+    ledger rather than per session, and dropped with the ledger.
+
+    Args:
+        ledger: The transactions.
+
+    Returns:
+        The ledger's conversions.
+    """
+    with _conversions_lock:
+        conversions = _conversions.get(ledger)
+        if conversions is None:
+            conversions = _conversions[ledger] = LedgerConversions()
+        return conversions
+
+
+def convert_records(
+    records: List[Dict[str, Any]],
+    fields: Sequence[str],
+    rates: RateTable,
+    code: str,
+) -> List[Dict[str, Any]]:
+    """Convert amount fields of dicts at the latest rates.
+
+    Each record may name its own ``currency``; records without one are
+    in ``BASE_CURRENCY``. Records in a currency without rates are left as
+    they are.
+
+    Args:
+        records: The dicts to convert.
+        fields: The amount fields; missing or None fields are left alone.
+        rates: The rates to convert at.
+        code: The currency to convert to.
+
+    Returns:
+        Copies of the dicts with the fields converted and ``currency`` set.
+    """
+    converted = []
+    for record in records:
+        source = record.get("currency", BASE_CURRENCY)
+        if source not in rates or code not in rates:
+            converted.append(record)
+            continue
+        factor = rates.rate(code) / rates.rate(source)
+        values = {
+            field: round(record[field] * factor, 2)
+            for field in fields
+            if record.get(field) is not None
+        }
+        converted.append({**record, **values, "currency": code})
+    return converted
@@ -0,0 +1,348 @@
+"""Where state fetchers get their data from.
+
+States ask the current ``DataSource`` for data and never talk to a
+backend themselves. ``FakeDataSource`` serves the demo data;
+``HttpDataSource`` calls a finance API through the shared pooled client.
+Set ``FINANCE_DATA_SOURCE=http`` and ``FINANCE_API_URL`` to use it.
+"""
+
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from .currency import BASE_CURRENCY, RateTable
+from .http_client import HttpClient, http_client
+from .invoices import STATUSES, InvoiceStore
+from .ledger import Ledger
+from .reconciliation import Payments
+from .single_flight import SingleFlight
+
+
+class DataSource(ABC):
+    """The data the dashboard and analytics pages load for a user.
+
+    Subclasses must implement every loader; a partial one can't be created.
+    """
+
+    @abstractmethod
+    async def accounts(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's accounts."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def transactions(self, user_id: Hashable) -> Ledger:
+        """Load a user's recent transactions."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def budget_categories(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's budget categories and their monthly limits."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def savings_goals(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's savings goals."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def top_products(self) -> List[Dict[str, Any]]:
+        """Load the best-selling products."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def invoices(self, org_id: Hashable) -> InvoiceStore:
+        """Load the invoices an organization has issued."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def payments(self, org_id: Hashable) -> Payments:
+        """Load the payments an organization has received."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def fx_rates(self) -> RateTable:
+        """Load daily exchange rates against the base currency."""
+        raise NotImplementedError
+
+
+class FakeDataSource(DataSource):
+    """Demo data, served after a simulated API delay."""
+
+    def __init__(self, latency: float = 1.0):
+        """Initialize the source.
+
+        Args:
+            latency: Multiplies each call's simulated delay; 0 answers immediately.
+        """
+        self.latency = latency
+
+    async def _delay(self, seconds: float):
+        """Simulate an API call."""
+        if self.latency:
+            await asyncio.sleep(seconds * self.latency)
+
+    async def accounts(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's accounts."""
+        await self._delay(0.5)
+        return [
+            {"id": 1, "name": "Checking", "balance": 2543.21, "type": "checking"},
+            {"id": 2, "name": "Savings", "balance": 12750.83, "type": "savings"},
+            {"id": 3, "name": "Investment", "balance": 34892.45, "type": "investment"},
+        ]
+
+    async def transactions(self, user_id: Hashable) -> Ledger:
+        """Load a user's recent transactions."""
+        await self._delay(0.7)
+        return Ledger.from_records([
+            {"id": 1, "description": "Grocery Store", "amount": -82.45, "date": "2025-03-05", "category": "Food"},
+            {"id": 2, "description": "Salary Deposit", "amount": 3200.00, "date": "2025-03-01", "category": "Income"},
+            {"id": 3, "description": "Electric Bill", "amount": -145.30, "date": "2025-02-28", "category": "Utilities"},
+            {"id": 4, "description": "Restaurant", "amount": -64.20, "date": "2025-02-25", "category": "Dining"},
+            {"id": 5, "description": "Gas Station", "amount": -48.75, "date": "2025-02-23", "category": "Transportation"},
+        ])
+
+    async def budget_categories(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's budget categories and their monthly limits."""
+        await self._delay(0.6)
+        return [
+            {"id": 1, "name": "Housing", "budget": 1200, "color": "blue"},
+            {"id": 2, "name": "Food", "budget": 500, "color": "green"},
+            {"id": 3, "name": "Transportation", "budget": 300, "color": "purple"},
+            {"id": 4, "name": "Entertainment", "budget": 200, "color": "orange"},
+            {"id": 5, "name": "Utilities", "budget": 250, "color": "red"},
+        ]
+
+    async def savings_goals(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's savings goals."""
+        await self._delay(0.8)
+        return [
+            {"id": 1, "name": "Emergency Fund", "target": 10000, "current": 6500, "monthly_contribution": 300, "deadline": None, "color": "blue"},
+            {"id": 2, "name": "Vacation", "target": 3000, "current": 1200, "monthly_contribution": 150, "deadline": "2027-07", "color": "green"},
+            {"id": 3, "name": "New Car", "target": 20000, "current": 5000, "monthly_contribution": 400, "deadline": "2029-01", "color": "purple"},
+        ]
+
+    async def top_products(self) -> List[Dict[str, Any]]:
+        """Load the best-selling products."""
+        await self._delay(0.5)
+        return [
+            {"id": 1, "name": "Premium Plan", "revenue": 45000, "users": 150},
+            {"id": 2, "name": "Basic Plan", "revenue": 30000, "users": 300},
+            {"id": 3, "name": "Enterprise Plan", "revenue": 25000, "users": 25},
+            {"id": 4, "name": "Add-on: Tax Filing", "revenue": 15000, "users": 100},
+            {"id": 5, "name": "Add-on: Budgeting", "revenue": 10000, "users": 200},
+        ]
+
+    async def invoices(self, org_id: Hashable, count: int = 120_000) -> InvoiceStore:
+        """Load the invoices an organization has issued."""
+        await self._delay(0.5)
+        return await asyncio.to_thread(mock_invoices, count)
+
+    async def payments(self, org_id: Hashable, count: int = 120_000) -> Payments:
+        """Load the payments an organization has received."""
+        await self._delay(0.5)
+        return await asyncio.to_thread(lambda: mock_payments(mock_invoices(count)))
+
+    async def fx_rates(self, days: int = 730) -> RateTable:
+        """Load daily exchange rates against the base currency."""
+        await self._delay(0.3)
+        return mock_fx_rates(days)
+
+
+def mock_invoices(count: int, seed: int = 7) -> InvoiceStore:
+    """Generate a year of invoices for the demo.
+
+    Args:
+        count: The number of invoices.
+        seed: The random seed.
+
+    Returns:
+        The invoices.
+    """
+    rng = np.random.default_rng(seed)
+    customers = [
+        f"{prefix} {suffix}"
+        for prefix in ("Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Soylent", "Wonka")
+        for suffix in ("Corp", "Labs", "Group", "Holdings", "Partners", "Foods", "Logistics", "Media", "Studios", "Works")
+    ]
+    today = np.datetime64(date.today(), "D")
+    issue_dates = today - rng.integers(0, 365, count)
+    due_dates = issue_dates + rng.choice([15, 30, 45, 60], count)
+    # Older invoices are more likely to have been paid
+    paid = rng.random(count) < np.clip((today - issue_dates).astype(np.int64) / 120, 0.05, 0.95)
+    statuses = np.where(paid, "paid", np.where(rng.random(count) < 0.06, "draft", "open"))
+    statuses[rng.random(count) < 0.02] = "void"
+
+    store = InvoiceStore(capacity=count)
+    store.extend(
+        np.arange(1, count + 1),
+        [customers[i] for i in rng.integers(0, len(customers), count).tolist()],
+        rng.lognormal(mean=7.0, sigma=1.0, size=count).round(2),
+        issue_dates,
+        due_dates,
+        statuses.tolist(),
+    )
+    return store
+
+
+def mock_payments(invoices: InvoiceStore, seed: int = 11) -> Payments:
+    """Generate payments received for some of the demo's open invoices.
+
+    Most payments quote the invoice number, some quote nothing useful, a
+    few quote the wrong invoice or pay the wrong amount, and some don't
+    belong to any invoice.
+
+    Args:
+        invoices: The invoices being paid.
+        seed: The random seed.
+
+    Returns:
+        The payments.
+    """
+    rng = np.random.default_rng(seed)
+    today = np.datetime64(date.today(), "D").astype(np.int64)
+    rows = np.flatnonzero((invoices.status_codes == STATUSES.index("open")) & (rng.random(len(invoices)) < 0.35))
+    issued = invoices.issue_dates[rows].astype(np.int64)
+    window = np.minimum(today - issued, invoices.due_dates[rows] - issued + 30)
+    dates = issued + (rng.random(len(rows)) * (window + 1)).astype(np.int64)
+    amounts = invoices.amounts[rows].copy()
+    short = rng.random(len(rows)) < 0.03
+    amounts[short] = (amounts[short] * 0.9).round(2)
+
+    invoice_ids = invoices.ids[rows].copy()
+    mistyped = rng.random(len(rows)) < 0.02
+    invoice_ids[mistyped] += rng.integers(1, 50, int(mistyped.sum()))
+    payers = invoices.customers.decode_many(invoices.customer_codes[rows])
+    style = rng.random(len(rows))
+    references = [
+        f"INV-{invoice_id}" if kind < 0.55 else f"Payment inv {invoice_id}" if kind < 0.7 else f"ACH {payer}"
+        for invoice_id, kind, payer in zip(invoice_ids.tolist(), style.tolist(), payers)
+    ]
+
+    # Payments that belong to no invoice
+    strays = len(rows) // 50
+    amounts = np.concatenate((amounts, rng.lognormal(mean=7.0, sigma=1.0, size=strays).round(2)))
+    dates = np.concatenate((dates, today - rng.integers(0, 90, strays)))
+    payers = payers + [payers[i] for i in rng.integers(0, max(len(payers), 1), strays).tolist()]
+    references = references + ["Wire transfer"] * strays
+
+    return Payments(
+        np.arange(1, len(amounts) + 1),
+        amounts,
+        dates.astype("datetime64[D]"),
+        payers,
+        references,
+    )
+
+
+def mock_fx_rates(days: int, seed: int = 3) -> RateTable:
+    """Generate daily exchange rates as random walks around typical levels.
+
+    Args:
+        days: The number of days up to today to cover.
+        seed: The random seed.
+
+    Returns:
+        The rates.
+    """
+    rng = np.random.default_rng(seed)
+    levels = {"EUR": 0.92, "GBP": 0.79, "JPY": 150.0, "CAD": 1.36, "AUD": 1.52, "INR": 83.0}
+    # About 0.5% daily volatility, compounded
+    walks = np.exp(np.cumsum(rng.normal(0, 0.005, size=(days, len(levels))), axis=0))
+    rates = np.column_stack((np.ones(days), walks * np.array(list(levels.values()))))
+    start_day = int(np.datetime64(date.today(), "D").astype(np.int64)) - days + 1
+    return RateTable(start_day, (BASE_CURRENCY, *levels), rates.round(6))
+
+
+class HttpDataSource(DataSource):
+    """A finance API reached through the worker's pooled HTTP client.
+
+    Identical requests made at the same time share one API call. Per-user
+    data is only shared between that user's tabs, while organization data
+    (invoices, payments) is requested by organization, so everyone in an
+    organization opening those pages at once makes one call. Products and
+    exchange rates are the same for everyone.
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, client: Optional[HttpClient] = None):
+        """Initialize the source.
+
+        Args:
+            base_url: The API's root URL.
+            api_key: Sent as a bearer token, if given.
+            client: The client to send requests with; defaults to the shared one.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = client or http_client
+        # Requests in flight by URL, with per-URL counts of the calls they saved
+        self.requests = SingleFlight()
+
+    async def _get(self, path: str) -> Any:
+        """Get a JSON resource from the API."""
+        url = f"{self.base_url}{path}"
+        return await self.requests.do(url, lambda: self.client.get_json(url, headers=self.headers))
+
+    async def accounts(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's accounts."""
+        return await self._get(f"/users/{user_id}/accounts")
+
+    async def transactions(self, user_id: Hashable) -> Ledger:
+        """Load a user's recent transactions."""
+        return Ledger.from_records(await self._get(f"/users/{user_id}/transactions"))
+
+    async def budget_categories(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's budget categories and their monthly limits."""
+        return await self._get(f"/users/{user_id}/budgets")
+
+    async def savings_goals(self, user_id: Hashable) -> List[Dict[str, Any]]:
+        """Load a user's savings goals."""
+        return await self._get(f"/users/{user_id}/goals")
+
+    async def top_products(self) -> List[Dict[str, Any]]:
+        """Load the best-selling products."""
+        return await self._get("/products/top")
+
+    async def invoices(self, org_id: Hashable) -> InvoiceStore:
+        """Load the invoices an organization has issued."""
+        return InvoiceStore.from_records(await self._get(f"/orgs/{org_id}/invoices"))
+
+    async def payments(self, org_id: Hashable) -> Payments:
+        """Load the payments an organization has received."""
+        return Payments.from_records(await self._get(f"/orgs/{org_id}/payments"))
+
+    async def fx_rates(self) -> RateTable:
+        """Load daily exchange rates against the base currency."""
+        return RateTable.from_observations(await self._get("/fx/rates"))
+
+
+_data_source: Optional[DataSource] = None
+
+
+def get_data_source() -> DataSource:
+    """Get the data source for this worker, creating it from the environment on first use.
+
+    Returns:
+        An ``HttpDataSource`` if ``FINANCE_DATA_SOURCE`` is ``http``, otherwise
+        a ``FakeDataSource``.
+    """
+    global _data_source
+    if _data_source is None:
+        if os.environ.get("FINANCE_DATA_SOURCE", "fake") == "http":
+            _data_source = HttpDataSource(os.environ["FINANCE_API_URL"], os.environ.get("FINANCE_API_KEY"))
+        else:
+            _data_source = FakeDataSource()
+    return _data_source
+
+
+def set_data_source(source: DataSource):
+    """Replace the data source for this worker.
+
+    Args:
+        source: The new data source.
+    """
+    global _data_source
+    _data_source = source
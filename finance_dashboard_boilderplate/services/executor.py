@@ -0,0 +1,271 @@
+"""Process pool for CPU-bound jobs, with shared-memory inputs and cancellation.
+
+Large input arrays are published once into a shared memory segment. Jobs
+receive the segment's name rather than the arrays, and workers map it
+into numpy arrays without copying. Each job has a slot on a shared cancel
+board, which the job polls through ``JobContext.check_cancelled``.
+
+Jobs are keyed, and starting a job cancels the running job with the same
+key. This lets a state start a query for a new date range without first
+waiting for the query for the old one to finish.
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+# Byte alignment of each array inside a shared segment.
+ALIGNMENT = 64
+
+# Jobs that can be in flight at once; each needs one cancel board slot.
+MAX_JOBS = 1024
+
+# (segment name, {array name: (offset, shape, dtype)})
+DatasetHandle = Tuple[str, Dict[str, Tuple[int, Tuple[int, ...], str]]]
+
+
+class JobCancelled(Exception):
+    """Raised when a job is cancelled or replaced by a newer job with the same key."""
+
+
+class SharedDataset:
+    """A set of named arrays copied into one shared memory segment."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """Copy arrays into a new shared memory segment.
+
+        Args:
+            arrays: The arrays to share, keyed by name.
+        """
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            layout[name] = (size, array.shape, array.dtype.str)
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        self.segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            offset, shape, dtype = layout[name]
+            np.ndarray(shape, dtype=dtype, buffer=self.segment.buf, offset=offset)[...] = array
+        self.handle: DatasetHandle = (self.segment.name, layout)
+
+    def close(self):
+        """Release the segment. Workers that already mapped it keep their mapping."""
+        self.segment.close()
+        self.segment.unlink()
+
+
+# Segments mapped by this worker, keyed by dataset name.
+_attached: Dict[str, Tuple[str, shared_memory.SharedMemory, Dict[str, np.ndarray]]] = {}
+
+
+def _dataset_arrays(dataset: str, handle: DatasetHandle) -> Dict[str, np.ndarray]:
+    """Get a dataset's arrays in a worker, mapping its segment on first use."""
+    segment_name, layout = handle
+    attached = _attached.get(dataset)
+    if attached is not None and attached[0] == segment_name:
+        return attached[2]
+    if attached is not None:
+        # The dataset was republished; drop the old mapping
+        _attached.pop(dataset)
+        attached[1].close()
+
+    # Workers share the app process's resource tracker, which unlinks the
+    # segment only if the app exits without closing it
+    segment = shared_memory.SharedMemory(name=segment_name)
+    arrays = {}
+    for name, (offset, shape, dtype) in layout.items():
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf, offset=offset)
+        array.flags.writeable = False
+        arrays[name] = array
+    _attached[dataset] = (segment_name, segment, arrays)
+    return arrays
+
+
+class JobContext:
+    """What a job function receives in the worker."""
+
+    def __init__(self, dataset: str, version: str, arrays: Dict[str, np.ndarray], board: memoryview, slot: int):
+        """Initialize the context.
+
+        Args:
+            dataset: The name of the job's dataset.
+            version: Changes whenever the dataset is republished.
+            arrays: The dataset's read-only arrays.
+            board: The shared cancel board.
+            slot: This job's slot on the board.
+        """
+        self.dataset = dataset
+        self.version = version
+        self.arrays = arrays
+        self._board = board
+        self._slot = slot
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the job has been cancelled."""
+        return bool(self._board[self._slot])
+
+    def check_cancelled(self):
+        """Stop the job if it has been cancelled.
+
+        Raises:
+            JobCancelled: If the job has been cancelled.
+        """
+        if self._board[self._slot]:
+            raise JobCancelled()
+
+
+def _run_job(
+    fn: Callable[..., Any],
+    dataset: str,
+    handle: DatasetHandle,
+    board_name: str,
+    slot: int,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+) -> Any:
+    """Run a job function in a worker."""
+    board = _dataset_arrays("__cancel_board__", (board_name, {"flags": (0, (MAX_JOBS,), "|u1")}))["flags"]
+    context = JobContext(dataset, handle[0], _dataset_arrays(dataset, handle), board.data, slot)
+    context.check_cancelled()
+    return fn(context, *args, **kwargs)
+
+
+class JobExecutor:
+    """Runs keyed jobs over shared datasets in a process pool."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """Initialize the executor. Workers are started on the first job.
+
+        Args:
+            max_workers: The number of worker processes.
+        """
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._datasets: Dict[str, SharedDataset] = {}
+        self._board: Optional[shared_memory.SharedMemory] = None
+        self._free_slots: deque = deque(range(MAX_JOBS))
+        self._running: Dict[Hashable, Tuple[asyncio.Future, int]] = {}
+        self._cancelled: Set[asyncio.Future] = set()
+
+    def _start(self):
+        """Start the pool and the cancel board."""
+        if self._pool is None:
+            # Forking a process that runs an event loop and threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            self._pool = concurrent.futures.ProcessPoolExecutor(self.max_workers, mp_context=context)
+            self._board = shared_memory.SharedMemory(create=True, size=MAX_JOBS)
+            self._board.buf[:MAX_JOBS] = bytes(MAX_JOBS)
+
+    def publish(self, dataset: str, arrays: Dict[str, np.ndarray]):
+        """Share arrays with the workers, replacing any earlier version.
+
+        Args:
+            dataset: The name jobs use to refer to the arrays.
+            arrays: The arrays, keyed by name.
+        """
+        previous = self._datasets.get(dataset)
+        self._datasets[dataset] = SharedDataset(arrays)
+        if previous is not None:
+            previous.close()
+
+    def is_published(self, dataset: str) -> bool:
+        """Check whether a dataset has been published.
+
+        Args:
+            dataset: The dataset name.
+
+        Returns:
+            Whether jobs can use the dataset.
+        """
+        return dataset in self._datasets
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancel the job running under a key.
+
+        A job that hasn't started is dropped; a running one is flagged and
+        stops at its next ``check_cancelled``. Either way its caller gets
+        ``JobCancelled`` right away.
+
+        Args:
+            key: The job key.
+
+        Returns:
+            Whether there was a job to cancel.
+        """
+        entry = self._running.pop(key, None)
+        if entry is None:
+            return False
+        waiter, slot = entry
+        self._board.buf[slot] = 1
+        self._cancelled.add(waiter)
+        waiter.cancel()
+        return True
+
+    async def run(self, key: Hashable, dataset: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a job in the pool, replacing any job with the same key.
+
+        Args:
+            key: Identifies the job, for example the client and the query.
+            dataset: The name of a published dataset the job reads.
+            fn: A module-level function taking a ``JobContext`` and ``args``.
+            *args: Positional arguments for ``fn``.
+            **kwargs: Keyword arguments for ``fn``.
+
+        Returns:
+            What ``fn`` returned.
+
+        Raises:
+            JobCancelled: If the job was cancelled or replaced.
+        """
+        self._start()
+        self.cancel(key)
+        if not self._free_slots:
+            raise RuntimeError("Too many analytics jobs in flight")
+        slot = self._free_slots.popleft()
+        self._board.buf[slot] = 0
+
+        future = self._pool.submit(
+            _run_job, fn, dataset, self._datasets[dataset].handle, self._board.name, slot, args, kwargs
+        )
+        # The slot is reused once the worker is done with it, not when the
+        # caller stops waiting
+        future.add_done_callback(lambda _: self._free_slots.append(slot))
+        waiter = asyncio.wrap_future(future)
+        self._running[key] = (waiter, slot)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter in self._cancelled:
+                raise JobCancelled() from None
+            # The caller itself was cancelled, so stop the job too
+            self._board.buf[slot] = 1
+            raise
+        finally:
+            self._cancelled.discard(waiter)
+            if self._running.get(key, (None,))[0] is waiter:
+                del self._running[key]
+
+    def shutdown(self):
+        """Stop the workers and release the shared memory."""
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        for dataset in self._datasets.values():
+            dataset.close()
+        self._datasets.clear()
+        if self._board is not None:
+            self._board.close()
+            self._board.unlink()
+            self._board = None
+
+
+# One worker pool, so concurrent analytics queries queue instead of forking more processes.
+analytics_executor = JobExecutor()
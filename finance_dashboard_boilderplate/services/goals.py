@@ -0,0 +1,304 @@
+"""Monte Carlo projections for savings goals."""
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+# Annual return scenarios evaluated for every goal.
+RETURN_SCENARIOS = np.round(np.linspace(0.0, 0.10, 11), 4)
+
+# Number of monthly contribution scenarios, from zero to twice the planned amount.
+CONTRIBUTION_STEPS = 41
+
+# Annualized volatility of monthly returns.
+DEFAULT_VOLATILITY = 0.12
+
+# Simulated market paths per return scenario.
+DEFAULT_PATHS = 500
+
+# Projections stop after this many months; goals not reached by then never complete.
+MAX_MONTHS = 600
+
+
+def months_from(start: date, months: float) -> Optional[str]:
+    """Get the month a number of months after a date.
+
+    Args:
+        start: The starting date.
+        months: The number of months, or inf.
+
+    Returns:
+        The month formatted as ``YYYY-MM``, or None if ``months`` is not finite.
+    """
+    if not np.isfinite(months):
+        return None
+    index = start.year * 12 + start.month - 1 + int(np.ceil(months))
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def months_until(start: date, deadline: str) -> int:
+    """Count whole months from a date to a ``YYYY-MM[-DD]`` deadline.
+
+    Args:
+        start: The starting date.
+        deadline: The deadline.
+
+    Returns:
+        The number of months, at least 1.
+    """
+    year, month = int(deadline[:4]), int(deadline[5:7])
+    return max((year - start.year) * 12 + month - start.month, 1)
+
+
+class GoalProjection:
+    """Projected outcomes of a goal for a grid of contribution and return scenarios.
+
+    Arrays indexed ``[contribution, return]`` hold month counts from the
+    start date, with ``inf`` for paths that never reach the target within
+    ``MAX_MONTHS``.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        contributions: np.ndarray,
+        annual_returns: np.ndarray,
+        months_p10: np.ndarray,
+        months_p50: np.ndarray,
+        months_p90: np.ndarray,
+        success_probability: Optional[np.ndarray] = None,
+        required_contribution: Optional[np.ndarray] = None,
+    ):
+        """Initialize the projection.
+
+        Args:
+            start: The date month counts start from.
+            contributions: The monthly contribution scenarios.
+            annual_returns: The annual return scenarios.
+            months_p10: Months until 10% of paths reach the target.
+            months_p50: Months until half of the paths reach the target.
+            months_p90: Months until 90% of paths reach the target.
+            success_probability: The share of paths reaching the target by the deadline.
+            required_contribution: The monthly contribution needed to reach the
+                target by the deadline, per return scenario.
+        """
+        self.start = start
+        self.contributions = contributions
+        self.annual_returns = annual_returns
+        self.months_p10 = months_p10
+        self.months_p50 = months_p50
+        self.months_p90 = months_p90
+        self.success_probability = success_probability
+        self.required_contribution = required_contribution
+
+    def scenario(self, contribution: float, annual_return: float) -> Dict[str, Any]:
+        """Get the outcome of the grid scenario closest to a contribution and return.
+
+        Args:
+            contribution: The monthly contribution.
+            annual_return: The expected annual return, for example 0.05.
+
+        Returns:
+            A dict with the completion months (``completion_date``,
+            ``earliest_date``, ``latest_date``), ``months``,
+            ``success_probability`` and ``required_contribution``.
+        """
+        i = int(np.abs(self.contributions - contribution).argmin())
+        j = int(np.abs(self.annual_returns - annual_return).argmin())
+        months = float(self.months_p50[i, j])
+        return {
+            "contribution": float(self.contributions[i]),
+            "annual_return": float(self.annual_returns[j]),
+            "months": months if np.isfinite(months) else None,
+            "completion_date": months_from(self.start, months),
+            "earliest_date": months_from(self.start, float(self.months_p10[i, j])),
+            "latest_date": months_from(self.start, float(self.months_p90[i, j])),
+            "success_probability": (
+                round(float(self.success_probability[i, j]), 3)
+                if self.success_probability is not None
+                else None
+            ),
+            "required_contribution": (
+                round(float(self.required_contribution[j]), 2)
+                if self.required_contribution is not None
+                else None
+            ),
+        }
+
+
+def simulate_goal(
+    target: float,
+    current: float,
+    contributions: np.ndarray,
+    annual_returns: np.ndarray = RETURN_SCENARIOS,
+    volatility: float = DEFAULT_VOLATILITY,
+    paths: int = DEFAULT_PATHS,
+    deadline_months: Optional[int] = None,
+    confidence: float = 0.5,
+    start: Optional[date] = None,
+    seed: int = 0,
+) -> GoalProjection:
+    """Simulate a goal for every pair of contribution and return scenarios.
+
+    The balance after ``t`` months is ``current * G_t + contribution * A_t``,
+    where ``G_t`` is a path's compounded growth and ``A_t`` its annuity
+    factor. Since that is linear in the contribution, each return scenario's
+    paths are simulated once; a contribution reaches the target at month
+    ``t`` if it is at least the smallest contribution that would have
+    reached it by then, ``min over s <= t of (target - current * G_s) / A_s``.
+    All return scenarios share the same random draws, so differences between
+    them come from the scenario and not from noise.
+
+    Args:
+        target: The goal amount.
+        current: The amount saved so far.
+        contributions: Monthly contribution scenarios.
+        annual_returns: Expected annual return scenarios.
+        volatility: Annualized volatility of returns.
+        paths: Simulated paths per return scenario.
+        deadline_months: Months until the goal's deadline, if it has one.
+        confidence: The share of paths that must reach the target by the
+            deadline for ``required_contribution``.
+        start: The date month counts start from; defaults to today.
+        seed: The random seed, so repeated projections agree.
+
+    Returns:
+        The projection.
+    """
+    start = start or date.today()
+    contributions = np.asarray(contributions, dtype=np.float64)
+    annual_returns = np.asarray(annual_returns, dtype=np.float64)
+    shape = (len(contributions), len(annual_returns))
+
+    if current >= target:
+        done = np.zeros(shape)
+        return GoalProjection(
+            start, contributions, annual_returns, done, done, done,
+            np.ones(shape) if deadline_months else None,
+            np.zeros(len(annual_returns)) if deadline_months else None,
+        )
+
+    rng = np.random.default_rng(seed)
+    sigma = volatility / np.sqrt(12)
+    mu = (np.log1p(annual_returns) / 12 - sigma ** 2 / 2)[:, None]
+
+    growth_total = np.ones((len(annual_returns), paths))
+    annuity = np.zeros((len(annual_returns), paths))
+    needed = np.full((len(annual_returns), paths), np.inf)
+    contribution = contributions[:, None, None]
+    months = np.full((*shape, paths), np.inf)
+    reached = np.zeros((*shape, paths), dtype=bool)
+    success_probability = required_contribution = None
+
+    last_month = max(MAX_MONTHS, deadline_months or 0)
+    for month in range(1, last_month + 1):
+        growth = np.exp(mu + sigma * rng.standard_normal(paths))
+        growth_total *= growth
+        # Contributions are made at the end of each month
+        annuity = annuity * growth + 1
+        np.minimum(needed, (target - current * growth_total) / annuity, out=needed)
+
+        newly = contribution >= needed
+        newly &= ~reached
+        months[newly] = month
+        reached |= newly
+
+        if month == deadline_months:
+            success_probability = reached.mean(axis=-1)
+            required_contribution = np.maximum(np.quantile(needed, confidence, axis=-1), 0)
+        if (deadline_months is None or month >= deadline_months) and reached.all():
+            break
+
+    return GoalProjection(
+        start,
+        contributions,
+        annual_returns,
+        *np.quantile(months, [0.1, 0.5, 0.9], axis=-1, method="inverted_cdf"),
+        success_probability,
+        required_contribution,
+    )
+
+
+class GoalProjector:
+    """Caches goal projections until the goal's inputs change."""
+
+    def __init__(self, max_entries: int = 1024):
+        """Initialize the cache.
+
+        Args:
+            max_entries: The number of goals kept before evicting the least recently used.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[Any, ...], GoalProjection]]" = OrderedDict()
+
+    def project(
+        self,
+        goal_id: Hashable,
+        target: float,
+        current: float,
+        monthly_contribution: float,
+        deadline: Optional[str] = None,
+        volatility: float = DEFAULT_VOLATILITY,
+    ) -> GoalProjection:
+        """Get a goal's projection, simulating it only if its inputs changed.
+
+        The contribution scenarios span zero to twice the planned monthly
+        contribution (or twice what the deadline requires, if more), so
+        what-if sliders within that range are answered from the cache. The
+        planned contribution itself is always one of the scenarios.
+
+        Args:
+            goal_id: Identifies the goal, for example (user id, goal id).
+            target: The goal amount.
+            current: The amount saved so far.
+            monthly_contribution: The planned monthly contribution.
+            deadline: The goal's deadline as ``YYYY-MM[-DD]``, if any.
+            volatility: Annualized volatility of returns.
+
+        Returns:
+            The projection.
+        """
+        start = date.today()
+        inputs = (target, current, monthly_contribution, deadline, volatility, start)
+        entry = self._entries.get(goal_id)
+        if entry is not None and entry[0] == inputs:
+            self._entries.move_to_end(goal_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        deadline_months = months_until(start, deadline) if deadline else None
+        top = 2 * monthly_contribution
+        if deadline_months:
+            # Without returns, this is what reaching the target on time takes
+            top = max(top, 2 * (target - current) / deadline_months)
+        projection = simulate_goal(
+            target,
+            current,
+            # Include the plan itself, so its outcome isn't snapped to a neighbour
+            np.union1d(np.linspace(0, max(top, 1.0), CONTRIBUTION_STEPS), [monthly_contribution]),
+            volatility=volatility,
+            deadline_months=deadline_months,
+            start=start,
+        )
+        self._entries[goal_id] = (inputs, projection)
+        self._entries.move_to_end(goal_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return projection
+
+    def invalidate(self, goal_id: Hashable):
+        """Drop a goal's cached projection.
+
+        Args:
+            goal_id: Identifies the goal.
+        """
+        self._entries.pop(goal_id, None)
+
+
+# Projections are cached by goal, so sessions of the same user reuse them.
+goal_projector = GoalProjector()
@@ -0,0 +1,193 @@
+"""One pooled async HTTP client per worker, with per-host limits and retries.
+
+Opening a connection (DNS, TCP and TLS handshakes) costs more than most
+API calls themselves, so state handlers never create clients. They go
+through ``http_client``, whose connections are kept alive and reused
+across every session in the worker.
+"""
+
+import asyncio
+import contextlib
+import random
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+# Connections kept open for reuse, and the most open at once.
+MAX_KEEPALIVE_CONNECTIONS = 50
+MAX_CONNECTIONS = 200
+
+# Seconds an idle connection is kept open.
+KEEPALIVE_EXPIRY = 30.0
+
+# Requests in flight to any one host.
+MAX_REQUESTS_PER_HOST = 20
+
+# Seconds allowed to connect, and to wait for a pooled connection or a response.
+CONNECT_TIMEOUT = 3.0
+REQUEST_TIMEOUT = 10.0
+
+# Attempts per request, and the backoff between them in seconds.
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.2
+BACKOFF_MAX = 5.0
+
+# Responses that are retried, since the same request may succeed later.
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Only requests that are safe to repeat are retried.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Get how long to wait before retrying.
+
+    Args:
+        attempt: The number of attempts made so far, from 1.
+        retry_after: The ``Retry-After`` header of the failed response, if any.
+
+    Returns:
+        Seconds to wait: the server's ``Retry-After`` in seconds if given,
+        otherwise exponential backoff with full jitter.
+    """
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_BASE * 2 ** (attempt - 1), BACKOFF_MAX))
+
+
+# An event loop's client, and its concurrency limit per host.
+_Pool = Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]
+
+
+class HttpClient:
+    """A shared ``httpx.AsyncClient`` with per-host concurrency limits and retries.
+
+    Connections can't be shared across event loops, so each loop gets its
+    own underlying client, created on first use and reused for every later
+    request on that loop. A loop's client is dropped with the loop.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = MAX_REQUESTS_PER_HOST,
+        max_attempts: int = MAX_ATTEMPTS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """Initialize the client.
+
+        Args:
+            max_per_host: Requests in flight to any one host.
+            max_attempts: Attempts per idempotent request.
+            transport: A custom transport, for example ``httpx.MockTransport``.
+        """
+        self.max_per_host = max_per_host
+        self.max_attempts = max_attempts
+        self.requests = 0
+        self.retries = 0
+        self._transport = transport
+        # Each event loop's client and per-host limits
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Pool]" = weakref.WeakKeyDictionary()
+
+    def _pool(self) -> _Pool:
+        """Get the pooled client and host limits of the running event loop."""
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    max_connections=MAX_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+                transport=self._transport,
+            )
+            pool = self._pools[loop] = (client, {})
+        return pool
+
+    def _slots(self, host_slots: Dict[str, asyncio.Semaphore], url: httpx.URL) -> asyncio.Semaphore:
+        """Get the concurrency limit of a URL's host."""
+        host = f"{url.scheme}://{url.netloc.decode()}"
+        slots = host_slots.get(host)
+        if slots is None:
+            slots = host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slots
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request, retrying transient failures of idempotent ones.
+
+        Args:
+            method: The HTTP method.
+            url: The URL.
+            **kwargs: Passed to ``httpx.AsyncClient.request``.
+
+        Returns:
+            The response, which may still be an error response.
+
+        Raises:
+            httpx.TransportError: If the last attempt could not connect or timed out.
+        """
+        client, host_slots = self._pool()
+        method = method.upper()
+        attempts = self.max_attempts if method in IDEMPOTENT_METHODS else 1
+        slots = self._slots(host_slots, httpx.URL(url))
+
+        for attempt in range(1, attempts + 1):
+            retry_after = None
+            try:
+                async with slots:
+                    self.requests += 1
+                    response = await client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == attempts:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                await response.aclose()
+            except httpx.TransportError:
+                if attempt == attempts:
+                    raise
+            # Wait outside the host's slots so other requests can use them
+            self.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+    async def get_json(self, url: str, **kwargs: Any) -> Any:
+        """Get a JSON resource.
+
+        Args:
+            url: The URL.
+            **kwargs: Passed to ``httpx.AsyncClient.request``.
+
+        Returns:
+            The decoded response body.
+
+        Raises:
+            httpx.HTTPStatusError: If the response is an error.
+        """
+        response = await self.request("GET", url, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        """Close the pooled connections of every event loop."""
+        current = asyncio.get_running_loop()
+        for loop, (client, _) in list(self._pools.items()):
+            del self._pools[loop]
+            if loop is current:
+                await client.aclose()
+            elif not loop.is_closed():
+                # A client's connections can only be closed on its own loop
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+
+# One connection pool, so requests to the same host reuse connections.
+http_client = HttpClient()
+
+
+@contextlib.asynccontextmanager
+async def http_client_lifespan():
+    """Close the shared client's connections when the app shuts down."""
+    yield
+    await http_client.aclose()
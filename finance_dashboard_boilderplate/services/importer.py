@@ -0,0 +1,734 @@
+"""Streaming import of bank exports into a ledger.
+
+Files are read in chunks and pushed through a chain of generators::
+
+    read_batches -> normalize -> categorize -> dedupe -> write_batch
+
+Only one chunk is in flight at a time, so memory use is bounded by the
+chunk size rather than the file size. Deduping keeps 64-bit hashes of the
+ledger rows and the file's external ids for a window of dates that moves
+with the batches, so it is bounded by the rows per day.
+"""
+
+import csv
+import io
+import os
+import re
+from datetime import date as calendar_date
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ledger import Ledger, to_epoch_days
+
+FORMATS = ("csv", "ofx", "parquet")
+
+# Rows per batch passed down the pipeline.
+DEFAULT_CHUNK_SIZE = 10_000
+
+# Bytes read from the file at a time when scanning OFX.
+READ_BLOCK_SIZE = 1 << 16
+
+# Imported rows get ids from here up, so they never take an id the bank
+# feed may push later.
+IMPORTED_ID_START = 1 << 40
+
+# Header names used by common bank exports, lower-cased.
+DATE_FIELDS = ("date", "posted date", "transaction date", "booking date", "dtposted")
+AMOUNT_FIELDS = ("amount", "trnamt", "value")
+DEBIT_FIELDS = ("debit", "withdrawal", "money out")
+CREDIT_FIELDS = ("credit", "deposit", "money in")
+DESCRIPTION_FIELDS = ("description", "name", "payee", "details", "memo")
+CATEGORY_FIELDS = ("category",)
+ID_FIELDS = ("id", "fitid", "transaction id", "reference")
+
+# Keywords that assign a category to uncategorized rows, checked in order.
+CATEGORY_RULES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("Income", ("salary", "payroll", "direct dep", "interest paid")),
+    ("Housing", ("rent", "mortgage", "hoa")),
+    ("Utilities", ("electric", "water", "gas bill", "internet", "phone")),
+    ("Food", ("grocery", "supermarket", "market")),
+    ("Dining", ("restaurant", "cafe", "coffee", "pizza", "bar ")),
+    ("Transportation", ("gas station", "fuel", "uber", "lyft", "parking", "transit")),
+    ("Entertainment", ("netflix", "spotify", "cinema", "theater")),
+]
+
+# Distinct dates and descriptions whose parsed value is remembered between batches.
+MAX_CACHED_VALUES = 50_000
+
+# Days either side of the batch being deduped whose ledger rows and external ids stay loaded.
+DEDUPE_WINDOW_DAYS = 31
+
+
+class ImportProgress:
+    """How far an import has got, updated as each batch is processed."""
+
+    def __init__(self, total_bytes: int = 0):
+        """Initialize the progress.
+
+        Args:
+            total_bytes: The size of the file being imported.
+        """
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.rows_imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+        # Rejected rows, counted by why they were rejected
+        self.rejection_reasons: Dict[str, int] = {}
+        self.done = False
+
+    def reject(self, reason: str):
+        """Count a row that couldn't be imported.
+
+        Args:
+            reason: Why, for example ``"invalid date"``.
+        """
+        self.rejected += 1
+        self.rejection_reasons[reason] = self.rejection_reasons.get(reason, 0) + 1
+
+    @property
+    def fraction(self) -> float:
+        """The fraction of the file read so far, between 0 and 1."""
+        if self.done:
+            return 1.0
+        if not self.total_bytes:
+            return 0.0
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Get the progress as a dict.
+
+        Returns:
+            The counters keyed by name, plus ``fraction``.
+        """
+        return {**self.__dict__, "fraction": self.fraction}
+
+
+class Batch:
+    """A chunk of normalized rows, stored as columns."""
+
+    __slots__ = ("external_ids", "dates", "amounts", "descriptions", "categories")
+
+    def __init__(self):
+        """Initialize an empty batch."""
+        self.external_ids: List[str] = []
+        self.dates: List[str] = []
+        self.amounts: List[float] = []
+        self.descriptions: List[str] = []
+        self.categories: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def take(self, keep: Sequence[bool]) -> "Batch":
+        """Get the rows where ``keep`` is true.
+
+        Args:
+            keep: One flag per row.
+
+        Returns:
+            A new batch.
+        """
+        batch = Batch()
+        for name in Batch.__slots__:
+            setattr(batch, name, [value for value, flag in zip(getattr(self, name), keep) if flag])
+        return batch
+
+
+def detect_format(path: str) -> str:
+    """Guess a file's format from its extension.
+
+    Args:
+        path: The file path.
+
+    Returns:
+        One of ``FORMATS``.
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("qfx", "ofx"):
+        return "ofx"
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    if extension in ("csv", "txt"):
+        return "csv"
+    raise ValueError(f"Unsupported import file type: {path}")
+
+
+def _chunked(rows: Iterator[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group rows into lists of at most ``chunk_size``."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_csv(handle: io.BufferedIOBase, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Read a CSV export in chunks of raw rows.
+
+    Args:
+        handle: The file, opened in binary mode.
+        chunk_size: Rows per chunk.
+
+    Yields:
+        Lists of dicts keyed by the file's header row.
+    """
+    text = io.TextIOWrapper(handle, encoding="utf-8-sig", newline="")
+    try:
+        yield from _chunked(csv.DictReader(text), chunk_size)
+    finally:
+        text.detach()
+
+
+def _ofx_tokens(handle: io.BufferedIOBase) -> Iterator[str]:
+    """Split an OFX file into ``TAG>value`` tokens without reading it all."""
+    pending = ""
+    while True:
+        block = handle.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        pending += block.decode("latin-1")
+        tokens = pending.split("<")
+        # The last token may continue in the next block
+        pending = tokens.pop()
+        yield from tokens
+    if pending:
+        yield pending
+
+
+def parse_ofx(handle: io.BufferedIOBase, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Read the transactions of an OFX or QFX statement in chunks.
+
+    Both the SGML (1.x, no closing tags on values) and XML (2.x) dialects
+    are accepted.
+
+    Args:
+        handle: The file, opened in binary mode.
+        chunk_size: Rows per chunk.
+
+    Yields:
+        Lists of dicts keyed by the OFX tag names.
+    """
+    def transactions() -> Iterator[Dict[str, Any]]:
+        record: Optional[Dict[str, Any]] = None
+        for token in _ofx_tokens(handle):
+            tag, _, value = token.partition(">")
+            tag = tag.strip().upper()
+            if tag == "STMTTRN":
+                record = {}
+            elif tag == "/STMTTRN":
+                if record is not None:
+                    yield record
+                record = None
+            elif record is not None and tag and not tag.startswith("/"):
+                record[tag] = value.strip()
+
+    yield from _chunked(transactions(), chunk_size)
+
+
+def parse_parquet(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Read a Parquet file in record batches.
+
+    Requires ``pyarrow``.
+
+    Args:
+        path: The file path.
+        chunk_size: Rows per chunk.
+
+    Yields:
+        Lists of dicts keyed by column name.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Importing Parquet files requires pyarrow: pip install pyarrow") from e
+
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield record_batch.to_pylist()
+
+
+def _parquet_row_count(path: str) -> int:
+    """Read the number of rows from a Parquet file's footer."""
+    import pyarrow.parquet as pq
+
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def read_batches(
+    path: str,
+    progress: ImportProgress,
+    file_format: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Read a file in chunks of raw rows, updating the bytes read.
+
+    Args:
+        path: The file path.
+        progress: The progress to update.
+        file_format: One of ``FORMATS``, or None to guess from the extension.
+        chunk_size: Rows per chunk.
+
+    Yields:
+        Lists of raw row dicts.
+    """
+    file_format = file_format or detect_format(path)
+    progress.total_bytes = os.path.getsize(path)
+
+    if file_format == "parquet":
+        # Parquet is read by row group, so estimate bytes from the rows read
+        total_rows = None
+        for chunk in parse_parquet(path, chunk_size):
+            if total_rows is None:
+                total_rows = _parquet_row_count(path)
+            progress.rows_read += len(chunk)
+            progress.bytes_read = progress.total_bytes * progress.rows_read // max(total_rows, 1)
+            yield chunk
+        return
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown import format: {file_format}")
+
+    parse = parse_ofx if file_format == "ofx" else parse_csv
+    with open(path, "rb") as handle:
+        for chunk in parse(handle, chunk_size):
+            progress.bytes_read = handle.tell()
+            progress.rows_read += len(chunk)
+            yield chunk
+    progress.bytes_read = progress.total_bytes
+
+
+class _Columns:
+    """Which of a file's headers hold each ledger field."""
+
+    __slots__ = ("date", "amount", "debit", "credit", "descriptions", "category", "external_id")
+
+    def __init__(self, headers: Sequence[Any]):
+        """Match headers against the known aliases for each field.
+
+        Args:
+            headers: The keys of a raw row.
+        """
+        by_name = {str(header).strip().lower(): header for header in headers if header is not None}
+
+        def first(names: Sequence[str]) -> Any:
+            return next((by_name[name] for name in names if name in by_name), None)
+
+        self.date = first(DATE_FIELDS)
+        self.amount = first(AMOUNT_FIELDS)
+        self.debit = first(DEBIT_FIELDS)
+        self.credit = first(CREDIT_FIELDS)
+        self.descriptions = [by_name[name] for name in DESCRIPTION_FIELDS if name in by_name]
+        self.category = first(CATEGORY_FIELDS)
+        self.external_id = first(ID_FIELDS)
+
+
+def parse_date(value: Any) -> str:
+    """Normalize a date from a bank export to ``YYYY-MM-DD``.
+
+    Accepts ISO dates, OFX timestamps (``YYYYMMDD[HHMMSS...]``),
+    ``MM/DD/YYYY`` and ``DD.MM.YYYY``.
+
+    Args:
+        value: The raw date.
+
+    Returns:
+        The normalized date.
+
+    Raises:
+        ValueError: If the date is in no known format or isn't on the
+            calendar, such as ``2025-02-30``.
+    """
+    if hasattr(value, "isoformat"):
+        return value.isoformat()[:10]
+    text = str(value).strip()
+    if len(text) >= 10 and text[4] == "-":
+        normalized = text[:10]
+    elif len(text) >= 8 and text[:8].isdigit():
+        normalized = f"{text[:4]}-{text[4:6]}-{text[6:8]}"
+    else:
+        match = re.match(r"(\d{1,2})([/.])(\d{1,2})\2(\d{4})", text)
+        if not match:
+            raise ValueError(f"Unrecognized date: {value!r}")
+        first, separator, second, year = match.groups()
+        month, day = (first, second) if separator == "/" else (second, first)
+        normalized = f"{year}-{int(month):02d}-{int(day):02d}"
+    # Catch days the calendar doesn't have before they reach the ledger
+    calendar_date.fromisoformat(normalized)
+    return normalized
+
+
+def parse_amount(value: Any) -> float:
+    """Normalize an amount from a bank export to a float.
+
+    Currency symbols and thousands separators are dropped, and amounts in
+    parentheses are negative.
+
+    Args:
+        value: The raw amount.
+
+    Returns:
+        The signed amount.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    text = str(value).strip()
+    negative = text.startswith("(") and text.endswith(")")
+    text = re.sub(r"[^0-9.\-]", "", text)
+    amount = float(text)
+    return -abs(amount) if negative else amount
+
+
+def normalize(chunks: Iterator[List[Dict[str, Any]]], progress: ImportProgress) -> Iterator[Batch]:
+    """Map raw rows from any format onto ledger columns.
+
+    Rows without a usable date or amount are counted as rejected, with the
+    reason, and dropped.
+
+    Args:
+        chunks: Lists of raw row dicts.
+        progress: The progress to update.
+
+    Yields:
+        One batch per chunk.
+    """
+    # Headers are resolved once per distinct set of keys, and dates once per
+    # distinct value, since both repeat heavily within an export
+    columns_by_keys: Dict[Tuple[Any, ...], _Columns] = {}
+    dates: Dict[Any, str] = {}
+    for chunk in chunks:
+        batch = Batch()
+        for row in chunk:
+            keys = tuple(row)
+            columns = columns_by_keys.get(keys)
+            if columns is None:
+                columns = columns_by_keys[keys] = _Columns(keys)
+            reason = "invalid date"
+            try:
+                raw_date = row.get(columns.date) if columns.date is not None else None
+                date = dates.get(raw_date)
+                if date is None:
+                    date = parse_date(raw_date)
+                    if len(dates) >= MAX_CACHED_VALUES:
+                        dates.clear()
+                    dates[raw_date] = date
+
+                reason = "invalid amount"
+                amount = row.get(columns.amount) if columns.amount is not None else None
+                if amount not in (None, ""):
+                    amount = parse_amount(amount)
+                else:
+                    debit = row.get(columns.debit) if columns.debit is not None else None
+                    credit = row.get(columns.credit) if columns.credit is not None else None
+                    if debit in (None, "") and credit in (None, ""):
+                        reason = "missing amount"
+                        raise ValueError("Row has no amount")
+                    amount = (parse_amount(credit) if credit not in (None, "") else 0.0) - (
+                        abs(parse_amount(debit)) if debit not in (None, "") else 0.0
+                    )
+            except (TypeError, ValueError):
+                progress.reject(reason)
+                continue
+
+            description = next((row[key] for key in columns.descriptions if row.get(key)), "")
+            external_id = row.get(columns.external_id) if columns.external_id is not None else None
+            category = row.get(columns.category) if columns.category is not None else None
+            batch.external_ids.append(str(external_id or ""))
+            batch.dates.append(date)
+            batch.amounts.append(round(amount, 2))
+            batch.descriptions.append(" ".join(str(description).split()))
+            batch.categories.append(str(category or ""))
+        yield batch
+
+
+def categorize(
+    batches: Iterator[Batch], rules: Sequence[Tuple[str, Tuple[str, ...]]] = CATEGORY_RULES
+) -> Iterator[Batch]:
+    """Fill in the category of rows that don't have one.
+
+    Args:
+        batches: Normalized batches.
+        rules: (category, keywords) pairs; the first rule with a keyword in
+            the description wins.
+
+    Yields:
+        The batches with every category set.
+    """
+    cache: Dict[str, str] = {}
+    for batch in batches:
+        for i, category in enumerate(batch.categories):
+            if category:
+                continue
+            description = batch.descriptions[i]
+            category = cache.get(description)
+            if category is None:
+                text = description.lower()
+                category = next(
+                    (name for name, keywords in rules if any(keyword in text for keyword in keywords)),
+                    "",
+                )
+                if len(cache) >= MAX_CACHED_VALUES:
+                    cache.clear()
+                cache[description] = category
+            batch.categories[i] = category or ("Income" if batch.amounts[i] > 0 else "Uncategorized")
+        yield batch
+
+
+# Odd 64-bit constants that spread each column across every bit of a fingerprint.
+_HASH_MULTIPLIERS = (np.uint64(0x9E3779B97F4A7C15), np.uint64(0xBF58476D1CE4E5B9))
+
+
+def _description_hashes(descriptions: Sequence[str]) -> np.ndarray:
+    """Hash descriptions case-insensitively, as uint64."""
+    hashes = np.fromiter((hash(description.lower()) for description in descriptions), np.int64, len(descriptions))
+    return hashes.view(np.uint64)
+
+
+def _id_hashes(external_ids: Sequence[str]) -> np.ndarray:
+    """Hash external ids, as uint64."""
+    hashes = np.fromiter((hash(external_id) for external_id in external_ids), np.int64, len(external_ids))
+    return hashes.view(np.uint64)
+
+
+def _fingerprints(days: np.ndarray, amounts: np.ndarray, description_hashes: np.ndarray) -> np.ndarray:
+    """Hash rows' date, amount and description to 64 bits, a whole column at a time."""
+    cents = np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64).view(np.uint64)
+    hashes = (description_hashes ^ np.asarray(days, dtype=np.int64).view(np.uint64)) * _HASH_MULTIPLIERS[0]
+    hashes = (hashes ^ cents) * _HASH_MULTIPLIERS[1]
+    return hashes ^ (hashes >> np.uint64(32))
+
+
+def _find(sorted_hashes: np.ndarray, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Find hashes in a sorted array.
+
+    Returns:
+        The position of each hash, and whether it was there.
+    """
+    if not len(sorted_hashes):
+        return np.zeros(len(hashes), dtype=np.int64), np.zeros(len(hashes), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1)
+    return positions, sorted_hashes[positions] == hashes
+
+
+class Deduplicator:
+    """Drops rows that are already in the ledger or earlier in the file.
+
+    Rows that carry a bank transaction id (an OFX FITID, say) are unique by
+    that id within the file. Rows are matched to the ledger by date, amount
+    and description, counting repeats: the n-th identical row in the file is
+    a duplicate only if the ledger has at least n such rows. Importing the
+    same export twice adds nothing, while two identical coffees on one day
+    are both kept.
+
+    Only the dates around the batch being read are held: fingerprints of the
+    ledger rows on those dates, and hashes of the file's external ids seen
+    on them. Dates more than ``DEDUPE_WINDOW_DAYS`` from the batch are
+    dropped as the window moves, so memory follows the rows per day rather
+    than the file size. Bank exports are in date order, either way round;
+    if a file jumps back to a dropped date, the rows there are matched
+    against the ledger afresh and ids seen before the jump are forgotten.
+    """
+
+    def __init__(self, ledger: Ledger):
+        """Initialize the deduplicator.
+
+        Args:
+            ledger: The ledger the rows will be written to.
+        """
+        self.ledger = ledger
+        self.ledger_rows = len(ledger)
+        # Dates from first_day to last_day are loaded
+        self.first_day: Optional[int] = None
+        self.last_day: Optional[int] = None
+        # Sorted fingerprints of the ledger rows on the loaded dates, with each
+        # one's day, its number of ledger rows and the file rows matched to them
+        self.fingerprints = np.empty(0, dtype=np.uint64)
+        self.fingerprint_days = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.matched = np.empty(0, dtype=np.int64)
+        # Sorted hashes of the file's external ids on the loaded dates, with each one's day
+        self.id_hashes = np.empty(0, dtype=np.uint64)
+        self.id_days = np.empty(0, dtype=np.int64)
+
+    def _move_window(self, first_day: int, last_day: int):
+        """Load the ledger rows on a batch's dates and drop dates far from them."""
+        keep_first, keep_last = first_day - DEDUPE_WINDOW_DAYS, last_day + DEDUPE_WINDOW_DAYS
+        if self.first_day is not None:
+            keep_first, keep_last = max(keep_first, self.first_day), min(keep_last, self.last_day)
+        if self.first_day is None or keep_first > keep_last:
+            # Nothing loaded is near the batch
+            keep_first, keep_last = first_day, first_day - 1
+
+        kept = (self.fingerprint_days >= keep_first) & (self.fingerprint_days <= keep_last)
+        self.fingerprints, self.fingerprint_days, self.counts, self.matched = (
+            column[kept] for column in (self.fingerprints, self.fingerprint_days, self.counts, self.matched)
+        )
+        kept = (self.id_days >= keep_first) & (self.id_days <= keep_last)
+        self.id_hashes, self.id_days = self.id_hashes[kept], self.id_days[kept]
+
+        self.first_day, self.last_day = min(keep_first, first_day), max(keep_last, last_day)
+        # Rows the import itself writes are never compared against
+        dates = self.ledger.dates[: self.ledger_rows]
+        wanted = ((dates >= self.first_day) & (dates < keep_first)) | (
+            (dates > keep_last) & (dates <= self.last_day)
+        )
+        rows = np.flatnonzero(wanted)
+        if not len(rows):
+            return
+        # Descriptions are hashed once per distinct value rather than per row
+        codes, inverse = np.unique(self.ledger.description_codes[rows], return_inverse=True)
+        descriptions = _description_hashes([self.ledger.descriptions.values[code] for code in codes.tolist()])
+        days = dates[rows].astype(np.int64)
+        fingerprints = _fingerprints(days, self.ledger.amounts[rows], descriptions[inverse])
+
+        merged, first, inverse = np.unique(
+            np.concatenate((self.fingerprints, fingerprints)), return_index=True, return_inverse=True
+        )
+        counts = np.concatenate((self.counts, np.ones(len(fingerprints), dtype=np.int64)))
+        matched = np.concatenate((self.matched, np.zeros(len(fingerprints), dtype=np.int64)))
+        self.fingerprint_days = np.concatenate((self.fingerprint_days, days))[first]
+        self.counts = np.bincount(inverse, weights=counts, minlength=len(merged)).astype(np.int64)
+        self.matched = np.bincount(inverse, weights=matched, minlength=len(merged)).astype(np.int64)
+        self.fingerprints = merged
+
+    def _repeated_ids(self, days: np.ndarray, external_ids: Sequence[str]) -> np.ndarray:
+        """Flag rows whose external id came earlier in the file, and remember the rest."""
+        repeated = np.zeros(len(external_ids), dtype=bool)
+        rows = np.flatnonzero([bool(external_id) for external_id in external_ids])
+        if not len(rows):
+            return repeated
+        hashes = _id_hashes([external_ids[row] for row in rows.tolist()])
+        _, first = np.unique(hashes, return_index=True)
+        earlier = np.ones(len(rows), dtype=bool)
+        earlier[first] = False
+        earlier |= _find(self.id_hashes, hashes)[1]
+        repeated[rows] = earlier
+
+        hashes = np.concatenate((self.id_hashes, hashes[~earlier]))
+        order = np.argsort(hashes, kind="stable")
+        self.id_hashes = hashes[order]
+        self.id_days = np.concatenate((self.id_days, days[rows][~earlier]))[order]
+        return repeated
+
+    def _match_ledger(self, fingerprints: np.ndarray, duplicate: np.ndarray):
+        """Flag rows that match a ledger row not already matched, in file order."""
+        rows = np.flatnonzero(~duplicate)
+        positions, found = _find(self.fingerprints, fingerprints[rows])
+        rows, positions = rows[found], positions[found]
+        if not len(rows):
+            return
+        # Number each row among the earlier rows of the batch with its fingerprint
+        order = np.argsort(positions, kind="stable")
+        positions = positions[order]
+        starts = np.flatnonzero(np.r_[True, positions[1:] != positions[:-1]])
+        rank = np.arange(len(positions)) - np.repeat(starts, np.diff(np.r_[starts, len(positions)]))
+        matched = rank < (self.counts - self.matched)[positions]
+        duplicate[rows[order[matched]]] = True
+        np.add.at(self.matched, positions[matched], 1)
+
+    def __call__(self, batches: Iterator[Batch], progress: ImportProgress) -> Iterator[Batch]:
+        """Filter duplicates out of each batch.
+
+        Args:
+            batches: Normalized batches.
+            progress: The progress to update.
+
+        Yields:
+            The batches without duplicate rows.
+        """
+        for batch in batches:
+            if not len(batch):
+                yield batch
+                continue
+            days = to_epoch_days(batch.dates).astype(np.int64)
+            self._move_window(int(days.min()), int(days.max()))
+            duplicate = self._repeated_ids(days, batch.external_ids)
+            self._match_ledger(_fingerprints(days, batch.amounts, _description_hashes(batch.descriptions)), duplicate)
+            unique = batch.take((~duplicate).tolist())
+            progress.duplicates += len(batch) - len(unique)
+            yield unique
+
+
+def prepare_import(
+    path: str,
+    ledger: Ledger,
+    progress: Optional[ImportProgress] = None,
+    file_format: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Batch]:
+    """Build the read, normalize, categorize and dedupe stages for a file.
+
+    Nothing is written; pass each batch to ``write_batch``. The stages do
+    no work until the returned generator is advanced.
+
+    Args:
+        path: The file path.
+        ledger: The ledger the rows will be written to, used for deduping.
+        progress: The progress to update as batches are read.
+        file_format: One of ``FORMATS``, or None to guess from the extension.
+        chunk_size: Rows per chunk.
+
+    Returns:
+        A generator of batches ready to write.
+    """
+    progress = progress or ImportProgress()
+    chunks = read_batches(path, progress, file_format, chunk_size)
+    return Deduplicator(ledger)(categorize(normalize(chunks, progress)), progress)
+
+
+def write_batch(ledger: Ledger, batch: Batch, progress: Optional[ImportProgress] = None) -> int:
+    """Append a batch to a ledger with new transaction ids.
+
+    The ids start at ``IMPORTED_ID_START``, apart from the bank feed's.
+
+    Args:
+        ledger: The ledger to write to.
+        batch: A batch from ``prepare_import``.
+        progress: The progress to update.
+
+    Returns:
+        The number of rows written.
+    """
+    next_id = max(int(ledger.ids.max(initial=0)) + 1, IMPORTED_ID_START)
+    ledger.extend(
+        np.arange(next_id, next_id + len(batch)),
+        batch.amounts,
+        batch.dates,
+        batch.categories,
+        batch.descriptions,
+    )
+    if progress is not None:
+        progress.rows_imported += len(batch)
+    return len(batch)
+
+
+def import_file(
+    path: str,
+    ledger: Ledger,
+    file_format: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[ImportProgress]:
+    """Import a file into a ledger one batch at a time.
+
+    Args:
+        path: The file path.
+        ledger: The ledger to write to.
+        file_format: One of ``FORMATS``, or None to guess from the extension.
+        chunk_size: Rows per chunk.
+
+    Yields:
+        The progress after each batch is written, and once more when done.
+    """
+    progress = ImportProgress()
+    for batch in prepare_import(path, ledger, progress, file_format, chunk_size):
+        write_batch(ledger, batch, progress)
+        yield progress
+    progress.done = True
+    yield progress
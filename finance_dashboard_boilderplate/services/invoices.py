@@ -0,0 +1,469 @@
+"""Columnar invoice storage with indexes for receivables queries."""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ledger import StringDictionary, from_epoch_days, to_epoch_days
+
+STATUSES = ("draft", "open", "paid", "void")
+
+# Columns that can be used as a sort key.
+SORT_KEYS = ("due_date", "issue_date", "amount", "customer", "id")
+
+# Days past due at which each aging bucket ends; the last bucket is open-ended.
+AGING_BUCKETS = (30, 60, 90)
+
+
+def _today() -> int:
+    """Get today as epoch days."""
+    return int(to_epoch_days([date.today().isoformat()])[0])
+
+
+def aging_ranges(today: int, buckets: Sequence[int] = AGING_BUCKETS) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """Get the due date range of each aging bucket.
+
+    Args:
+        today: The day aging is measured from, as epoch days.
+        buckets: Days past due at which each bucket ends.
+
+    Returns:
+        ``(label, first due day, day after the last due day)`` per bucket, from
+        not yet due to most overdue, with None for open ends.
+    """
+    ranges = [("current", today, None)]
+    start = 0
+    for end in buckets:
+        ranges.append((f"{start + 1}-{end}", today - end, today - start))
+        start = end
+    ranges.append((f"{start}+", None, today - start))
+    return ranges
+
+
+class InvoiceIndexes:
+    """Sorted row orders over an invoice store, built in one pass.
+
+    Each index lists row positions sorted by a key, next to the sorted keys,
+    so a range of keys is found with two binary searches. The status index
+    is sorted by due date and carries a running total of amounts, so
+    overdue lists and aging totals need no scan at all.
+    """
+
+    def __init__(self, store: "InvoiceStore"):
+        """Build the indexes.
+
+        Args:
+            store: The invoices to index.
+        """
+        ids, due = store.ids, store.due_dates
+        by_due = np.lexsort((ids, due))
+        self.due_order = by_due
+        self.due_sorted = due[by_due]
+
+        # Per status, rows by due date with running amount totals
+        statuses = store.status_codes[by_due]
+        self.status_rows: List[np.ndarray] = []
+        self.status_due: List[np.ndarray] = []
+        self.status_totals: List[np.ndarray] = []
+        for code in range(len(STATUSES)):
+            rows = by_due[statuses == code]
+            self.status_rows.append(rows)
+            self.status_due.append(due[rows])
+            self.status_totals.append(np.concatenate(([0.0], np.cumsum(store.amounts[rows]))))
+
+        # Rows grouped by customer code, with each customer's start offset
+        codes = store.customer_codes
+        self.customer_order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(store.customers))
+        self.customer_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        self.amount_order = np.argsort(store.amounts, kind="stable")
+        self.amount_sorted = store.amounts[self.amount_order]
+
+    @staticmethod
+    def key_range(keys: np.ndarray, low: Any, high: Any) -> Tuple[int, int]:
+        """Find the sorted keys in ``[low, high)``.
+
+        Args:
+            keys: Keys sorted ascending.
+            low: The smallest key to include, or None for no lower bound.
+            high: The first key to exclude, or None for no upper bound.
+
+        Returns:
+            The start and stop positions of the matching keys.
+        """
+        start = 0 if low is None else int(np.searchsorted(keys, low, side="left"))
+        stop = len(keys) if high is None else int(np.searchsorted(keys, high, side="left"))
+        return start, max(start, stop)
+
+
+class InvoiceStore:
+    """Invoices stored as typed columns, with lazily built indexes.
+
+    Amounts are float64, dates are int32 epoch days, statuses are int8
+    codes and customers are dictionary encoded. The indexes are rebuilt on
+    the first query after invoices are added or change status.
+    """
+
+    def __init__(self, capacity: int = 0):
+        """Initialize an empty store.
+
+        Args:
+            capacity: The number of invoices to preallocate.
+        """
+        self.customers = StringDictionary()
+        self._size = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._customer_codes = np.empty(capacity, dtype=np.int32)
+        self._amounts = np.empty(capacity, dtype=np.float64)
+        self._issue_dates = np.empty(capacity, dtype=np.int32)
+        self._due_dates = np.empty(capacity, dtype=np.int32)
+        self._status_codes = np.empty(capacity, dtype=np.int8)
+        self._indexes: Optional[InvoiceIndexes] = None
+        self._id_order: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "InvoiceStore":
+        """Build a store from invoice dicts.
+
+        Args:
+            records: Dicts with ``id``, ``customer``, ``amount``, ``issue_date``,
+                ``due_date`` and ``status`` keys.
+
+        Returns:
+            A new store holding the invoices.
+        """
+        store = cls(capacity=len(records))
+        store.extend(
+            [record["id"] for record in records],
+            [record["customer"] for record in records],
+            [record["amount"] for record in records],
+            [record["issue_date"] for record in records],
+            [record["due_date"] for record in records],
+            [record["status"] for record in records],
+        )
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    @property
+    def customer_codes(self) -> np.ndarray:
+        return self._customer_codes[:self._size]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self._amounts[:self._size]
+
+    @property
+    def issue_dates(self) -> np.ndarray:
+        return self._issue_dates[:self._size]
+
+    @property
+    def due_dates(self) -> np.ndarray:
+        return self._due_dates[:self._size]
+
+    @property
+    def status_codes(self) -> np.ndarray:
+        return self._status_codes[:self._size]
+
+    def _reserve(self, extra: int):
+        """Grow the column buffers so that ``extra`` more invoices fit."""
+        needed = self._size + extra
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name in ("_ids", "_customer_codes", "_amounts", "_issue_dates", "_due_dates", "_status_codes"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def extend(
+        self,
+        ids: Sequence[int],
+        customers: Sequence[str],
+        amounts: Sequence[float],
+        issue_dates: Sequence[Any],
+        due_dates: Sequence[Any],
+        statuses: Sequence[str],
+    ) -> int:
+        """Append a batch of invoices given as columns.
+
+        Args:
+            ids: The invoice ids.
+            customers: The customer of each invoice.
+            amounts: The amount due on each invoice.
+            issue_dates: Issue dates, as ``YYYY-MM-DD`` strings or ``datetime64[D]``.
+            due_dates: Due dates, in the same formats.
+            statuses: One of ``STATUSES`` per invoice.
+
+        Returns:
+            The position of the first appended invoice.
+        """
+        count = len(ids)
+        start = self._size
+        if count == 0:
+            return start
+        codes = {status: code for code, status in enumerate(STATUSES)}
+        status_codes = np.fromiter((codes[status] for status in statuses), dtype=np.int8, count=count)
+        self._reserve(count)
+        stop = start + count
+        self._ids[start:stop] = np.asarray(ids, dtype=np.int64)
+        self._customer_codes[start:stop] = self.customers.encode_many(customers)
+        self._amounts[start:stop] = np.asarray(amounts, dtype=np.float64)
+        self._issue_dates[start:stop] = to_epoch_days(issue_dates)
+        self._due_dates[start:stop] = to_epoch_days(due_dates)
+        self._status_codes[start:stop] = status_codes
+        self._size = stop
+        self._indexes = None
+        self._id_order = None
+        return start
+
+    def indexes(self) -> InvoiceIndexes:
+        """Get the indexes, building them if invoices changed.
+
+        Returns:
+            The current indexes.
+        """
+        if self._indexes is None:
+            self._indexes = InvoiceIndexes(self)
+        return self._indexes
+
+    def rows_of(self, ids: Sequence[int]) -> np.ndarray:
+        """Find the rows of invoice ids.
+
+        Args:
+            ids: The invoice ids.
+
+        Returns:
+            The row of each id, or -1 for unknown ids.
+        """
+        if self._id_order is None:
+            self._id_order = np.argsort(self.ids, kind="stable")
+        ids = np.asarray(ids, dtype=np.int64)
+        sorted_ids = self.ids[self._id_order]
+        if not len(sorted_ids):
+            return np.full(len(ids), -1, dtype=np.intp)
+        positions = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[positions] == ids, self._id_order[positions], -1)
+
+    def set_status(self, ids: Sequence[int], status: str) -> int:
+        """Change the status of invoices.
+
+        Args:
+            ids: The invoice ids.
+            status: One of ``STATUSES``.
+
+        Returns:
+            The number of invoices found and changed.
+        """
+        rows = self.rows_of(ids)
+        rows = rows[rows >= 0]
+        self._status_codes[rows] = STATUSES.index(status)
+        self._indexes = None
+        return len(rows)
+
+    def copy(self) -> "InvoiceStore":
+        """Copy the store, so the copy can change without affecting this one.
+
+        Returns:
+            A new store holding the same invoices.
+        """
+        store = InvoiceStore(capacity=self._size)
+        for name in ("_ids", "_customer_codes", "_amounts", "_issue_dates", "_due_dates", "_status_codes"):
+            getattr(store, name)[:] = getattr(self, name)[:self._size]
+        store.customers.values = list(self.customers.values)
+        store.customers._codes = dict(self.customers._codes)
+        store._size = self._size
+        store._id_order = self._id_order
+        return store
+
+    def query(
+        self,
+        status: Optional[str] = None,
+        customer: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        due_from: Optional[str] = None,
+        due_to: Optional[str] = None,
+        sort: str = "due_date",
+        descending: bool = False,
+    ) -> np.ndarray:
+        """Find the invoices matching every given condition.
+
+        The candidate rows come from whichever index narrows the query most;
+        only those rows are checked against the other conditions.
+
+        Args:
+            status: Only keep invoices with this status.
+            customer: Only keep invoices for this customer.
+            min_amount: Only keep invoices of at least this amount.
+            max_amount: Only keep invoices of at most this amount.
+            due_from: Only keep invoices due on or after this date (``YYYY-MM-DD``).
+            due_to: Only keep invoices due on or before this date.
+            sort: One of ``SORT_KEYS``.
+            descending: Whether to sort from largest to smallest.
+
+        Returns:
+            The matching rows, sorted.
+        """
+        due_low = int(to_epoch_days([due_from])[0]) if due_from else None
+        due_high = int(to_epoch_days([due_to])[0]) + 1 if due_to else None
+        return self._query(status, customer, min_amount, max_amount, due_low, due_high, sort, descending)
+
+    def _query(
+        self,
+        status: Optional[str],
+        customer: Optional[str],
+        min_amount: Optional[float],
+        max_amount: Optional[float],
+        due_low: Optional[int],
+        due_high: Optional[int],
+        sort: str = "due_date",
+        descending: bool = False,
+    ) -> np.ndarray:
+        """Find matching rows, with due dates as epoch days in ``[due_low, due_high)``."""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        indexes = self.indexes()
+        candidates = []
+        status_code = None
+        if status is not None:
+            status_code = STATUSES.index(status)
+            start, stop = indexes.key_range(indexes.status_due[status_code], due_low, due_high)
+            candidates.append(indexes.status_rows[status_code][start:stop])
+        elif due_low is not None or due_high is not None:
+            start, stop = indexes.key_range(indexes.due_sorted, due_low, due_high)
+            candidates.append(indexes.due_order[start:stop])
+        customer_code = None
+        if customer is not None:
+            customer_code = self.customers.lookup(customer)
+            if customer_code is None:
+                return np.empty(0, dtype=np.intp)
+            offsets = indexes.customer_offsets
+            candidates.append(indexes.customer_order[offsets[customer_code]:offsets[customer_code + 1]])
+        if min_amount is not None or max_amount is not None:
+            high = None if max_amount is None else np.nextafter(max_amount, np.inf)
+            start, stop = indexes.key_range(indexes.amount_sorted, min_amount, high)
+            candidates.append(indexes.amount_order[start:stop])
+
+        if not candidates:
+            rows = indexes.due_order
+        else:
+            rows = min(candidates, key=len)
+            mask = np.ones(len(rows), dtype=bool)
+            if status_code is not None:
+                mask &= self.status_codes[rows] == status_code
+            if customer_code is not None:
+                mask &= self.customer_codes[rows] == customer_code
+            if due_low is not None:
+                mask &= self.due_dates[rows] >= due_low
+            if due_high is not None:
+                mask &= self.due_dates[rows] < due_high
+            if min_amount is not None:
+                mask &= self.amounts[rows] >= min_amount
+            if max_amount is not None:
+                mask &= self.amounts[rows] <= max_amount
+            rows = rows[mask]
+
+        if len(rows) > 1:
+            rows = rows[np.lexsort((self.ids[rows], self._sort_keys(sort)[rows]))]
+        return rows[::-1] if descending else rows
+
+    def _sort_keys(self, sort: str) -> np.ndarray:
+        """Get the values that order invoices by a sort key."""
+        if sort == "due_date":
+            return self.due_dates
+        if sort == "issue_date":
+            return self.issue_dates
+        if sort == "amount":
+            return self.amounts
+        if sort == "customer":
+            return self.customers.ranks()[self.customer_codes]
+        return self.ids
+
+    def overdue(self, today: Optional[str] = None) -> np.ndarray:
+        """Find open invoices past their due date.
+
+        Args:
+            today: The current date (``YYYY-MM-DD``); defaults to today.
+
+        Returns:
+            The rows, most overdue first.
+        """
+        today_days = int(to_epoch_days([today])[0]) if today else _today()
+        return self._query("open", None, None, None, None, today_days)
+
+    def aging(self, today: Optional[str] = None, buckets: Sequence[int] = AGING_BUCKETS) -> List[Dict[str, Any]]:
+        """Summarize open invoices by how long they are past due.
+
+        Each bucket's count and total come from two binary searches into
+        the open invoices sorted by due date and their running total.
+
+        Args:
+            today: The current date (``YYYY-MM-DD``); defaults to today.
+            buckets: Days past due at which each bucket ends.
+
+        Returns:
+            Per bucket, from not yet due to most overdue: ``bucket``, ``count``,
+            ``amount`` and the ``due_from`` and ``due_to`` dates it covers.
+        """
+        indexes = self.indexes()
+        code = STATUSES.index("open")
+        due, totals = indexes.status_due[code], indexes.status_totals[code]
+        today_days = int(to_epoch_days([today])[0]) if today else _today()
+
+        summary = []
+        for label, low, high in aging_ranges(today_days, buckets):
+            start, stop = indexes.key_range(due, low, high)
+            summary.append({
+                "bucket": label,
+                "count": stop - start,
+                "amount": round(float(totals[stop] - totals[start]), 2),
+                "due_from": from_epoch_days(np.array([low]))[0] if low is not None else "",
+                "due_to": from_epoch_days(np.array([high - 1]))[0] if high is not None else "",
+            })
+        return summary
+
+    def to_dicts(self, rows: np.ndarray, today: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Materialize invoices as dicts.
+
+        Args:
+            rows: The rows to materialize.
+            today: The date ``days_overdue`` is counted to; defaults to today.
+
+        Returns:
+            Dicts with ``id``, ``customer``, ``amount``, ``issue_date``,
+            ``due_date``, ``status`` and ``days_overdue`` keys.
+        """
+        today_days = int(to_epoch_days([today])[0]) if today else _today()
+        due = self.due_dates[rows]
+        statuses = self.status_codes[rows]
+        overdue = np.where(statuses == STATUSES.index("open"), np.maximum(today_days - due, 0), 0)
+        return [
+            {
+                "id": invoice_id,
+                "customer": customer,
+                "amount": amount,
+                "issue_date": issue_date,
+                "due_date": due_date,
+                "status": STATUSES[status],
+                "days_overdue": days,
+            }
+            for invoice_id, customer, amount, issue_date, due_date, status, days in zip(
+                self.ids[rows].tolist(),
+                self.customers.decode_many(self.customer_codes[rows]),
+                self.amounts[rows].tolist(),
+                from_epoch_days(self.issue_dates[rows]),
+                from_epoch_days(due),
+                statuses.tolist(),
+                overdue.tolist(),
+            )
+        ]
@@ -0,0 +1,569 @@
+"""Columnar, array-backed storage for transactions."""
+
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Columns that can be used as a sort key, in the order they are serialized.
+COLUMNS = ("id", "description", "amount", "date", "category")
+
+
+def to_epoch_days(dates: Iterable[str]) -> np.ndarray:
+    """Convert ISO formatted date strings to days since 1970-01-01.
+
+    Args:
+        dates: Dates formatted as ``YYYY-MM-DD``.
+
+    Returns:
+        An int32 array of epoch days.
+    """
+    return np.asarray(list(dates), dtype="datetime64[D]").astype(np.int32)
+
+
+def from_epoch_days(days: np.ndarray) -> List[str]:
+    """Convert epoch days back to ISO formatted date strings.
+
+    Args:
+        days: An array of days since 1970-01-01.
+
+    Returns:
+        A list of dates formatted as ``YYYY-MM-DD``.
+    """
+    return np.asarray(days, dtype=np.int64).astype("datetime64[D]").astype(str).tolist()
+
+
+class StringDictionary:
+    """Dictionary encoding for a low-cardinality string column."""
+
+    def __init__(self):
+        """Initialize an empty dictionary."""
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: str) -> int:
+        """Get the code for a value, adding it to the dictionary if needed.
+
+        Args:
+            value: The string to encode.
+
+        Returns:
+            The integer code of the value.
+        """
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def encode_many(self, values: Iterable[str]) -> np.ndarray:
+        """Encode a sequence of values.
+
+        Args:
+            values: The strings to encode.
+
+        Returns:
+            An int32 array of codes.
+        """
+        return np.fromiter((self.encode(value) for value in values), dtype=np.int32)
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Get the code for a value without adding it.
+
+        Args:
+            value: The string to look up.
+
+        Returns:
+            The integer code, or None if the value is unknown.
+        """
+        return self._codes.get(value)
+
+    def decode_many(self, codes: np.ndarray) -> List[str]:
+        """Decode an array of codes.
+
+        Args:
+            codes: The codes to decode.
+
+        Returns:
+            The decoded strings.
+        """
+        values = self.values
+        return [values[code] for code in codes.tolist()]
+
+    def ranks(self) -> np.ndarray:
+        """Get the lexical rank of every code, used to sort encoded columns.
+
+        Returns:
+            An array mapping each code to its position in sorted order.
+        """
+        ranks = np.empty(len(self.values), dtype=np.int32)
+        ranks[np.argsort(np.asarray(self.values, dtype=object), kind="stable")] = np.arange(
+            len(self.values), dtype=np.int32
+        )
+        return ranks
+
+
+class Ledger:
+    """An append-only transaction table stored as typed columns.
+
+    Amounts are float64, dates are int32 epoch days and descriptions and
+    categories are dictionary encoded, so a row costs a few dozen bytes no
+    matter how long its strings are.
+    """
+
+    def __init__(self, capacity: int = 0):
+        """Initialize an empty ledger.
+
+        Args:
+            capacity: The number of rows to preallocate.
+        """
+        self.categories = StringDictionary()
+        self.descriptions = StringDictionary()
+        self._size = 0
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._amounts = np.empty(capacity, dtype=np.float64)
+        self._dates = np.empty(capacity, dtype=np.int32)
+        self._category_codes = np.empty(capacity, dtype=np.int32)
+        self._description_codes = np.empty(capacity, dtype=np.int32)
+        self._sort_cache: Dict[str, np.ndarray] = {}
+        # Sorted ids of the first _sorted_id_rows rows, merged with appended rows on use
+        self._sorted_ids = np.empty(0, dtype=np.int64)
+        self._sorted_id_rows = 0
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "Ledger":
+        """Build a ledger from transaction dicts.
+
+        Args:
+            records: Dicts with ``id``, ``description``, ``amount``, ``date`` and ``category`` keys.
+
+        Returns:
+            A new ledger holding the records.
+        """
+        ledger = cls(capacity=len(records))
+        ledger.extend_records(records)
+        return ledger
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self._amounts[:self._size]
+
+    @property
+    def dates(self) -> np.ndarray:
+        return self._dates[:self._size]
+
+    @property
+    def category_codes(self) -> np.ndarray:
+        return self._category_codes[:self._size]
+
+    @property
+    def description_codes(self) -> np.ndarray:
+        return self._description_codes[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the column buffers."""
+        return (
+            self._ids.nbytes
+            + self._amounts.nbytes
+            + self._dates.nbytes
+            + self._category_codes.nbytes
+            + self._description_codes.nbytes
+        )
+
+    def _reserve(self, extra: int):
+        """Grow the column buffers so that ``extra`` more rows fit."""
+        needed = self._size + extra
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name in ("_ids", "_amounts", "_dates", "_category_codes", "_description_codes"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def extend(
+        self,
+        ids: Sequence[int],
+        amounts: Sequence[float],
+        dates: Sequence[str],
+        categories: Sequence[str],
+        descriptions: Sequence[str],
+    ) -> int:
+        """Append a batch of rows given as columns.
+
+        Args:
+            ids: The transaction ids.
+            amounts: The signed transaction amounts.
+            dates: The transaction dates formatted as ``YYYY-MM-DD``.
+            categories: The category of each transaction.
+            descriptions: The description of each transaction.
+
+        Returns:
+            The position of the first appended row.
+        """
+        count = len(ids)
+        start = self._size
+        if count == 0:
+            return start
+        self._reserve(count)
+        stop = start + count
+        self._ids[start:stop] = np.asarray(ids, dtype=np.int64)
+        self._amounts[start:stop] = np.asarray(amounts, dtype=np.float64)
+        self._dates[start:stop] = to_epoch_days(dates)
+        self._category_codes[start:stop] = self.categories.encode_many(categories)
+        self._description_codes[start:stop] = self.descriptions.encode_many(descriptions)
+        self._size = stop
+        self._sort_cache.clear()
+        return start
+
+    def extend_records(self, records: Sequence[Dict[str, Any]]) -> int:
+        """Append a batch of transaction dicts.
+
+        Args:
+            records: Dicts with ``id``, ``description``, ``amount``, ``date`` and ``category`` keys.
+
+        Returns:
+            The position of the first appended row.
+        """
+        return self.extend(
+            [record["id"] for record in records],
+            [record["amount"] for record in records],
+            [record["date"] for record in records],
+            [record["category"] for record in records],
+            [record["description"] for record in records],
+        )
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Append a single transaction dict.
+
+        Args:
+            record: A dict with ``id``, ``description``, ``amount``, ``date`` and ``category`` keys.
+
+        Returns:
+            The position of the appended row.
+        """
+        return self.extend_records([record])
+
+    def sort_keys(self, key: str) -> np.ndarray:
+        """Get the values used to order rows by a column.
+
+        Args:
+            key: One of ``COLUMNS``.
+
+        Returns:
+            An array with one sortable value per row.
+        """
+        if key == "id":
+            return self.ids
+        if key == "amount":
+            return self.amounts
+        if key == "date":
+            return self.dates
+        if key == "category":
+            return self.categories.ranks()[self.category_codes]
+        if key == "description":
+            return self.descriptions.ranks()[self.description_codes]
+        raise ValueError(f"Unknown sort key: {key}")
+
+    def sort_value(self, key: str, value: Any) -> Any:
+        """Convert a raw column value to the value returned by ``sort_keys``.
+
+        Args:
+            key: One of ``COLUMNS``.
+            value: A raw value as found in ``to_dicts`` output.
+
+        Returns:
+            A value comparable with ``sort_keys(key)``.
+        """
+        if key == "date":
+            return int(to_epoch_days([value])[0])
+        if key in ("category", "description"):
+            dictionary = self.categories if key == "category" else self.descriptions
+            code = dictionary.lookup(value)
+            if code is not None:
+                return int(dictionary.ranks()[code])
+            # Unknown strings sort between their neighbours
+            return bisect_left(sorted(dictionary.values), value) - 0.5
+        if key in ("id", "amount"):
+            return value
+        raise ValueError(f"Unknown sort key: {key}")
+
+    def sort_order(self, key: str = "date") -> np.ndarray:
+        """Get the ascending row order for a column, ties broken by id.
+
+        The order is cached until the ledger changes.
+
+        Args:
+            key: One of ``COLUMNS``.
+
+        Returns:
+            The row positions in ascending order.
+        """
+        order = self._sort_cache.get(key)
+        if order is None:
+            order = np.lexsort((self.ids, self.sort_keys(key)))
+            self._sort_cache[key] = order
+        return order
+
+    def has_ids(self, ids: Sequence[int]) -> np.ndarray:
+        """Check which transaction ids are already in the ledger.
+
+        Ids above the largest one are answered without a lookup; the rest
+        are binary searched in a sorted copy of the ids, which only merges
+        in the rows appended since it was last used.
+
+        Args:
+            ids: The transaction ids.
+
+        Returns:
+            A bool array, true where the id is present.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        present = np.zeros(len(ids), dtype=bool)
+        if not len(self) or not len(ids):
+            return present
+        maybe = ids <= self.ids.max()
+        if maybe.any():
+            if self._sorted_id_rows < self._size:
+                appended = np.sort(self.ids[self._sorted_id_rows:])
+                self._sorted_ids = np.insert(
+                    self._sorted_ids, np.searchsorted(self._sorted_ids, appended), appended
+                )
+                self._sorted_id_rows = self._size
+            sorted_ids = self._sorted_ids
+            positions = np.minimum(np.searchsorted(sorted_ids, ids[maybe]), len(sorted_ids) - 1)
+            present[maybe] = sorted_ids[positions] == ids[maybe]
+        return present
+
+    def copy(self) -> "Ledger":
+        """Copy the ledger, so the copy can be extended without affecting this one.
+
+        Returns:
+            A new ledger holding the same rows.
+        """
+        ledger = Ledger(capacity=self._size)
+        for name in ("_ids", "_amounts", "_dates", "_category_codes", "_description_codes"):
+            getattr(ledger, name)[:] = getattr(self, name)[:self._size]
+        for name in ("categories", "descriptions"):
+            source, target = getattr(self, name), getattr(ledger, name)
+            target.values = list(source.values)
+            target._codes = dict(source._codes)
+        ledger._size = self._size
+        return ledger
+
+    def view(self) -> "LedgerView":
+        """Get a view over every row in insertion order.
+
+        Returns:
+            A LedgerView of the whole ledger.
+        """
+        return LedgerView(self)
+
+
+class LedgerView:
+    """A lazily evaluated selection of ledger rows.
+
+    Views only hold row positions; column values are gathered when they are
+    read, and dicts are only built by ``to_dicts``.
+    """
+
+    def __init__(self, ledger: Ledger, rows: Optional[np.ndarray] = None):
+        """Initialize a view.
+
+        Args:
+            ledger: The ledger the rows belong to.
+            rows: The row positions, or None for every row in insertion order.
+        """
+        self.ledger = ledger
+        self._rows = rows
+
+    @property
+    def rows(self) -> np.ndarray:
+        """The row positions selected by this view."""
+        if self._rows is None:
+            return np.arange(len(self.ledger))
+        return self._rows
+
+    def __len__(self) -> int:
+        if self._rows is None:
+            return len(self.ledger)
+        return len(self._rows)
+
+    def column(self, name: str) -> np.ndarray:
+        """Gather a column for the selected rows.
+
+        Args:
+            name: One of ``id``, ``amount``, ``date``, ``category_code`` or ``description_code``.
+
+        Returns:
+            The column values in view order.
+        """
+        columns = {
+            "id": self.ledger.ids,
+            "amount": self.ledger.amounts,
+            "date": self.ledger.dates,
+            "category_code": self.ledger.category_codes,
+            "description_code": self.ledger.description_codes,
+        }
+        if name not in columns:
+            raise ValueError(f"Unknown column: {name}")
+        if self._rows is None:
+            return columns[name]
+        return columns[name][self._rows]
+
+    def slice(self, start: int, stop: Optional[int] = None) -> "LedgerView":
+        """Select a contiguous window of the view.
+
+        Args:
+            start: The first position in the view.
+            stop: The position after the last one, or None for the end.
+
+        Returns:
+            A new view over the window.
+        """
+        if self._rows is None:
+            start, stop, _ = slice(start, stop).indices(len(self.ledger))
+            return LedgerView(self.ledger, np.arange(start, max(start, stop)))
+        return LedgerView(self.ledger, self._rows[start:stop])
+
+    def filter(
+        self,
+        category: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        search: Optional[str] = None,
+    ) -> "LedgerView":
+        """Select the rows matching every given condition.
+
+        Args:
+            category: Only keep rows in this category.
+            start_date: Only keep rows on or after this date (``YYYY-MM-DD``).
+            end_date: Only keep rows on or before this date (``YYYY-MM-DD``).
+            min_amount: Only keep rows with at least this amount.
+            max_amount: Only keep rows with at most this amount.
+            search: Only keep rows whose description contains this text (case-insensitive).
+
+        Returns:
+            A new view over the matching rows, in the same order.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if category is not None:
+            code = self.ledger.categories.lookup(category)
+            if code is None:
+                return LedgerView(self.ledger, np.empty(0, dtype=np.intp))
+            mask &= self.column("category_code") == code
+        if start_date is not None or end_date is not None:
+            dates = self.column("date")
+            if start_date is not None:
+                mask &= dates >= to_epoch_days([start_date])[0]
+            if end_date is not None:
+                mask &= dates <= to_epoch_days([end_date])[0]
+        if min_amount is not None or max_amount is not None:
+            amounts = self.column("amount")
+            if min_amount is not None:
+                mask &= amounts >= min_amount
+            if max_amount is not None:
+                mask &= amounts <= max_amount
+        if search:
+            # Match against the dictionary once instead of against every row
+            needle = search.lower()
+            codes = [
+                code
+                for code, value in enumerate(self.ledger.descriptions.values)
+                if needle in value.lower()
+            ]
+            mask &= np.isin(self.column("description_code"), codes)
+        return LedgerView(self.ledger, self.rows[mask])
+
+    def sort(self, key: str = "date", descending: bool = False) -> "LedgerView":
+        """Order the view by a column, ties broken by id.
+
+        Args:
+            key: One of ``COLUMNS``.
+            descending: Whether to sort from largest to smallest.
+
+        Returns:
+            A new view over the same rows in sorted order.
+        """
+        if self._rows is None:
+            order = self.ledger.sort_order(key)
+        else:
+            rows = self._rows
+            order = rows[np.lexsort((self.ledger.ids[rows], self.ledger.sort_keys(key)[rows]))]
+        if descending:
+            order = order[::-1]
+        return LedgerView(self.ledger, order)
+
+    def after(self, key: str, value: Any, row_id: int, descending: bool = False) -> "LedgerView":
+        """Seek past a keyset cursor in a view sorted by ``key`` and id.
+
+        Args:
+            key: The column the view is sorted by.
+            value: The raw ``key`` value of the cursor row.
+            row_id: The id of the cursor row.
+            descending: Whether the view is sorted from largest to smallest.
+
+        Returns:
+            A new view over the rows that come after the cursor.
+        """
+        rows = self.rows
+        keys = self.ledger.sort_keys(key)[rows]
+        ids = self.ledger.ids[rows]
+        if descending:
+            keys = keys[::-1]
+            ids = ids[::-1]
+        target = self.ledger.sort_value(key, value)
+        lo = int(np.searchsorted(keys, target, side="left"))
+        hi = int(np.searchsorted(keys, target, side="right"))
+        if descending:
+            # Rows before the cursor in ascending order come after it here
+            count = lo + int(np.searchsorted(ids[lo:hi], row_id, side="left"))
+            return LedgerView(self.ledger, rows[len(rows) - count:])
+        count = lo + int(np.searchsorted(ids[lo:hi], row_id, side="right"))
+        return LedgerView(self.ledger, rows[count:])
+
+    def total(self) -> float:
+        """Get the sum of the selected amounts.
+
+        Returns:
+            The total amount.
+        """
+        return float(self.column("amount").sum())
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Materialize the selected rows as transaction dicts.
+
+        Returns:
+            A list of dicts with ``id``, ``description``, ``amount``, ``date`` and ``category`` keys.
+        """
+        ids = self.column("id").tolist()
+        descriptions = self.ledger.descriptions.decode_many(self.column("description_code"))
+        amounts = self.column("amount").tolist()
+        dates = from_epoch_days(self.column("date"))
+        categories = self.ledger.categories.decode_many(self.column("category_code"))
+        return [
+            {
+                "id": ids[i],
+                "description": descriptions[i],
+                "amount": amounts[i],
+                "date": dates[i],
+                "category": categories[i],
+            }
+            for i in range(len(ids))
+        ]
@@ -0,0 +1,174 @@
+"""Pushing new transactions and balance changes to a user's open dashboards.
+
+Publishers send deltas (the new transactions, or the accounts whose
+balance changed) to the user's topic instead of asking sessions to
+reload. Applying a delta is idempotent: transactions are only appended
+if the ledger doesn't have their id yet. A session that shares a ledger
+with others, or sees the same delta twice, never double counts.
+"""
+
+import hmac
+import os
+from datetime import date
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from reflex.utils.prerequisites import get_app
+
+from .analytics_jobs import add_ledger_rows
+from .cache import data_cache
+from .ledger import Ledger, to_epoch_days
+from .pubsub import LocalBroker, broker
+
+
+def live_topic(user_id: Hashable) -> str:
+    """Get the topic a user's dashboard updates are published to.
+
+    Args:
+        user_id: The user.
+
+    Returns:
+        The topic name.
+    """
+    return f"live:{user_id}"
+
+
+def is_client_connected(token: str) -> bool:
+    """Check whether a browser tab is still connected to this worker.
+
+    Args:
+        token: The tab's client token.
+
+    Returns:
+        False once the tab's event socket has disconnected.
+    """
+    namespace = getattr(get_app().app, "event_namespace", None)
+    return namespace is None or token in namespace.token_to_sid
+
+
+def new_transactions(ledger: Ledger, records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Get the transactions a ledger doesn't have yet.
+
+    Args:
+        ledger: The ledger.
+        records: Transaction dicts.
+
+    Returns:
+        The records whose id isn't in the ledger, each id once, in id order.
+    """
+    # Imports give rows local ids above the feed's, so feed ids can't be
+    # assumed to be newer than every id already in the ledger
+    present = ledger.has_ids([record["id"] for record in records])
+    fresh = {}
+    for record, known in zip(records, present.tolist()):
+        if not known:
+            fresh.setdefault(record["id"], record)
+    return [fresh[record_id] for record_id in sorted(fresh)]
+
+
+def apply_balances(accounts: List[Dict[str, Any]], balances: Dict[int, float]) -> List[Dict[str, Any]]:
+    """Update account balances without changing the given list.
+
+    Args:
+        accounts: Account dicts with ``id`` and ``balance`` keys.
+        balances: New balances by account id.
+
+    Returns:
+        A new list of accounts.
+    """
+    return [
+        {**account, "balance": balances[account["id"]]} if account["id"] in balances else account
+        for account in accounts
+    ]
+
+
+def publish_transactions(
+    user_id: Hashable,
+    transactions: Sequence[Dict[str, Any]] = (),
+    balances: Optional[Dict[int, float]] = None,
+    publisher: LocalBroker = broker,
+) -> int:
+    """Send new transactions and balances to a user's open dashboards.
+
+    The user's cached transactions and accounts are dropped, so dashboards
+    opened later load them fresh.
+
+    Args:
+        user_id: The user.
+        transactions: The new transaction dicts.
+        balances: New account balances by account id.
+        publisher: The broker to publish to.
+
+    Returns:
+        The number of sessions the update was sent to.
+    """
+    data_cache.invalidate("transactions", user_id)
+    if balances:
+        data_cache.invalidate("accounts", user_id)
+    return publisher.publish(live_topic(user_id), {
+        "type": "delta",
+        "transactions": list(transactions),
+        "balances": dict(balances or {}),
+    })
+
+
+def publish_resync(user_id: Hashable, publisher: LocalBroker = broker) -> int:
+    """Ask a user's open dashboards to reload, after a change too big to send as a delta.
+
+    Dashboards reload through the data cache, so the caller should put the
+    changed data there or invalidate it first.
+
+    Args:
+        user_id: The user.
+        publisher: The broker to publish to.
+
+    Returns:
+        The number of sessions the request was sent to.
+    """
+    return publisher.publish(live_topic(user_id), {"type": "resync"})
+
+
+async def transactions_webhook(request: Request) -> JSONResponse:
+    """Receive new transactions and balances from the bank feed.
+
+    The body is a JSON object with ``user_id``, ``transactions`` (a list
+    of transaction dicts) and ``balances`` (account id to balance).
+    Requests must carry the ``FINANCE_WEBHOOK_SECRET`` in the
+    ``X-Webhook-Secret`` header.
+
+    Args:
+        request: The webhook request.
+
+    Returns:
+        The number of sessions the update was sent to.
+    """
+    # In a real app, this would verify the bank feed's request signature
+    secret = os.environ.get("FINANCE_WEBHOOK_SECRET")
+    if not secret or not hmac.compare_digest(request.headers.get("X-Webhook-Secret", ""), secret):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+
+    try:
+        body = await request.json()
+        user_id = body["user_id"]
+        transactions = [
+            {
+                "id": int(record["id"]),
+                "description": str(record["description"]),
+                "amount": float(record["amount"]),
+                # Dates must be ISO formatted days that exist, or every session fails to apply them
+                "date": date.fromisoformat(str(record["date"])).isoformat(),
+                "category": str(record["category"]),
+            }
+            for record in body.get("transactions", [])
+        ]
+        balances = {int(account_id): float(balance) for account_id, balance in body.get("balances", {}).items()}
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return JSONResponse({"error": f"Invalid update: {e}"}, status_code=400)
+
+    # The feed sends each transaction once, so its inflows are counted as revenue here
+    add_ledger_rows(
+        to_epoch_days([record["date"] for record in transactions]),
+        [record["amount"] for record in transactions],
+    )
+    return JSONResponse({"delivered": publish_transactions(user_id, transactions, balances)})
@@ -0,0 +1,82 @@
+"""Concurrent loading of independent page sections."""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+
+class SectionResult:
+    """The outcome of loading one section of a page."""
+
+    def __init__(
+        self,
+        name: str,
+        data: Any = None,
+        error: Optional[BaseException] = None,
+        timed_out: bool = False,
+    ):
+        """Initialize a section result.
+
+        Args:
+            name: The name of the section.
+            data: The loaded data, if the section succeeded.
+            error: The exception raised by the loader, if it failed.
+            timed_out: Whether the section was cancelled at the deadline.
+        """
+        self.name = name
+        self.data = data
+        self.error = error
+        self.timed_out = timed_out
+
+    @property
+    def ok(self) -> bool:
+        """Whether the section loaded successfully."""
+        return self.error is None and not self.timed_out
+
+
+async def load_sections(
+    loaders: Dict[str, Callable[[], Awaitable[Any]]],
+    timeout: float,
+) -> AsyncIterator[SectionResult]:
+    """Run section loaders concurrently and yield each result as it resolves.
+
+    Every loader shares one overall deadline. Sections still running when it
+    passes are cancelled and reported as timed out, after the finished ones.
+
+    Args:
+        loaders: Coroutine functions keyed by section name.
+        timeout: The overall deadline in seconds.
+
+    Yields:
+        A SectionResult per section, in completion order.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    tasks = {asyncio.ensure_future(loader()): name for name, loader in loaders.items()}
+    pending = set(tasks)
+
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.cancelled():
+                    yield SectionResult(tasks[task], error=asyncio.CancelledError())
+                elif task.exception() is not None:
+                    yield SectionResult(tasks[task], error=task.exception())
+                else:
+                    yield SectionResult(tasks[task], data=task.result())
+
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in pending:
+            yield SectionResult(tasks[task], timed_out=True)
+    finally:
+        # Don't leave loaders running if the consumer stops early
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,351 @@
+"""Per-user notification inboxes with organization-wide alerts.
+
+Personal notifications go to one user's bounded inbox. Organization-wide
+alerts are stored once, in the organization's bounded feed, and merged
+into each member's list when it is read. Broadcasting to an organization
+costs the same no matter how many members it has.
+
+Unread counts are kept as counters next to a read watermark, so reading
+one never scans an inbox. Open sessions are told about new notifications
+through the broker, and only load items when the dropdown is opened.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Hashable, List, Optional, Set
+
+from .pubsub import LocalBroker, broker
+
+# Notifications kept per user; older ones are dropped.
+INBOX_SIZE = 200
+
+# Organization-wide alerts kept per organization.
+ORG_FEED_SIZE = 200
+
+# Notifications shown per page of the dropdown.
+NOTIFICATION_PAGE_SIZE = 10
+
+NOTIFICATION_KINDS = ("info", "feature", "alert", "payment", "investment", "offer")
+
+
+def user_topic(user_id: Hashable) -> str:
+    """Get the topic a user's new notifications are announced on."""
+    return f"notifications:{user_id}"
+
+
+def org_topic(org_id: Hashable) -> str:
+    """Get the topic an organization's new alerts are announced on."""
+    return f"notifications:org:{org_id}"
+
+
+class Notification:
+    """A single notification, shared by every inbox it appears in."""
+
+    __slots__ = ("id", "kind", "title", "body", "created_at", "org_id")
+
+    def __init__(self, id: int, kind: str, title: str, body: str, created_at: float, org_id: Hashable = None):
+        self.id = id
+        self.kind = kind
+        self.title = title
+        self.body = body
+        self.created_at = created_at
+        self.org_id = org_id
+
+    def to_dict(self, read: bool) -> Dict[str, Any]:
+        """Get the notification as a dict for the client.
+
+        Args:
+            read: Whether the reader has read it.
+
+        Returns:
+            A dict with ``id``, ``kind``, ``title``, ``body``, ``time`` and ``read`` keys.
+        """
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "title": self.title,
+            "body": self.body,
+            "time": datetime.fromtimestamp(self.created_at).strftime("%b %d, %H:%M"),
+            "read": read,
+        }
+
+
+class _OrgFeed:
+    """An organization's recent alerts and how many were ever published."""
+
+    __slots__ = ("items", "published")
+
+    def __init__(self, size: int):
+        self.items: Deque[Notification] = deque(maxlen=size)
+        self.published = 0
+
+
+class _Inbox:
+    """One user's notifications and read state.
+
+    Everything with an id up to ``watermark`` is read, as is anything in
+    ``read_ids``. ``unread`` counts unread personal notifications;
+    ``org_seen`` is how many alerts the organization had published when
+    the user last read everything, and ``org_read`` holds the alerts read
+    one by one since, as a heap so alerts the feed dropped are popped first.
+    """
+
+    __slots__ = ("items", "org_id", "watermark", "read_ids", "unread", "org_seen", "org_read")
+
+    def __init__(self, size: int, org_id: Hashable, watermark: int, org_seen: int):
+        self.items: Deque[Notification] = deque(maxlen=size)
+        self.org_id = org_id
+        self.watermark = watermark
+        self.read_ids: Set[int] = set()
+        self.unread = 0
+        self.org_seen = org_seen
+        self.org_read: List[int] = []
+
+    def is_read(self, notification: Notification) -> bool:
+        return notification.id <= self.watermark or notification.id in self.read_ids
+
+
+class NotificationService:
+    """Inboxes for every user in this process, and feeds for their organizations."""
+
+    def __init__(
+        self,
+        inbox_size: int = INBOX_SIZE,
+        org_feed_size: int = ORG_FEED_SIZE,
+        publisher: LocalBroker = broker,
+    ):
+        """Initialize the service.
+
+        Args:
+            inbox_size: Notifications kept per user.
+            org_feed_size: Alerts kept per organization.
+            publisher: The broker new notifications are announced on.
+        """
+        self.inbox_size = inbox_size
+        self.org_feed_size = org_feed_size
+        self.publisher = publisher
+        self._inboxes: Dict[Hashable, _Inbox] = {}
+        self._orgs: Dict[Hashable, _OrgFeed] = {}
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def _feed(self, org_id: Hashable) -> Optional[_OrgFeed]:
+        """Get an organization's feed, creating it if needed."""
+        if org_id is None:
+            return None
+        feed = self._orgs.get(org_id)
+        if feed is None:
+            feed = self._orgs[org_id] = _OrgFeed(self.org_feed_size)
+        return feed
+
+    def _inbox(self, user_id: Hashable) -> _Inbox:
+        """Get a user's inbox, creating an empty one outside any organization if needed."""
+        inbox = self._inboxes.get(user_id)
+        if inbox is None:
+            inbox = self._inboxes[user_id] = _Inbox(self.inbox_size, None, self._last_id, 0)
+        return inbox
+
+    def _create(self, kind: str, title: str, body: str, org_id: Hashable = None) -> Notification:
+        """Create a notification with the next id."""
+        if kind not in NOTIFICATION_KINDS:
+            raise ValueError(f"Unknown notification kind: {kind}")
+        self._last_id = next(self._ids)
+        return Notification(self._last_id, kind, title, body, time.time(), org_id)
+
+    def has_inbox(self, user_id: Hashable) -> bool:
+        """Check whether a user has an inbox yet.
+
+        Args:
+            user_id: The user.
+
+        Returns:
+            True if the user was notified or joined an organization.
+        """
+        return user_id in self._inboxes
+
+    def join(self, user_id: Hashable, org_id: Hashable):
+        """Make a user a member of an organization.
+
+        Alerts the organization sent before the user joined count as read.
+
+        Args:
+            user_id: The user.
+            org_id: The organization.
+        """
+        with self._lock:
+            inbox = self._inbox(user_id)
+            if inbox.org_id == org_id:
+                return
+            feed = self._feed(org_id)
+            inbox.org_id = org_id
+            inbox.org_seen = feed.published
+            inbox.org_read = []
+            # Alerts from before joining are read; personal ones keep their state
+            inbox.read_ids.update(alert.id for alert in feed.items if alert.id > inbox.watermark)
+
+    def notify(self, user_id: Hashable, title: str, body: str = "", kind: str = "info") -> Notification:
+        """Send a notification to one user.
+
+        Args:
+            user_id: The user.
+            title: The headline.
+            body: More detail.
+            kind: One of ``NOTIFICATION_KINDS``.
+
+        Returns:
+            The notification.
+        """
+        with self._lock:
+            inbox = self._inbox(user_id)
+            notification = self._create(kind, title, body)
+            if len(inbox.items) == inbox.items.maxlen:
+                dropped = inbox.items[0]
+                if not inbox.is_read(dropped):
+                    inbox.unread -= 1
+                inbox.read_ids.discard(dropped.id)
+            inbox.items.append(notification)
+            inbox.unread += 1
+        self.publisher.publish(user_topic(user_id), {"type": "notification", "id": notification.id})
+        return notification
+
+    def broadcast(self, org_id: Hashable, title: str, body: str = "", kind: str = "alert") -> Notification:
+        """Send an alert to every member of an organization.
+
+        The alert is stored once and announced once, whatever the number of
+        members.
+
+        Args:
+            org_id: The organization.
+            title: The headline.
+            body: More detail.
+            kind: One of ``NOTIFICATION_KINDS``.
+
+        Returns:
+            The notification.
+        """
+        with self._lock:
+            notification = self._create(kind, title, body, org_id)
+            feed = self._feed(org_id)
+            feed.items.append(notification)
+            feed.published += 1
+        self.publisher.publish(org_topic(org_id), {"type": "notification", "id": notification.id})
+        return notification
+
+    def unread_count(self, user_id: Hashable) -> int:
+        """Count a user's unread notifications without looking at any of them.
+
+        Args:
+            user_id: The user.
+
+        Returns:
+            The number of unread notifications still kept.
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None:
+                return 0
+            org_unread = 0
+            feed = self._orgs.get(inbox.org_id)
+            if feed is not None and feed.items:
+                # Forget alerts read one by one that the feed has since dropped
+                oldest = feed.items[0].id
+                while inbox.org_read and inbox.org_read[0] < oldest:
+                    inbox.read_ids.discard(heapq.heappop(inbox.org_read))
+                unseen = min(feed.published - inbox.org_seen, len(feed.items))
+                org_unread = unseen - len(inbox.org_read)
+            return inbox.unread + org_unread
+
+    def recent(
+        self,
+        user_id: Hashable,
+        limit: int = NOTIFICATION_PAGE_SIZE,
+        before: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get a user's newest notifications, personal and organization-wide.
+
+        Args:
+            user_id: The user.
+            limit: The most notifications to return.
+            before: Only return notifications older than this id, to page back.
+
+        Returns:
+            Notification dicts, newest first.
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None:
+                return []
+            feed = self._orgs.get(inbox.org_id)
+            # Both sources are in id order, so merging their newest ends is enough
+            newest = heapq.merge(
+                reversed(inbox.items),
+                reversed(feed.items) if feed is not None else (),
+                key=lambda notification: -notification.id,
+            )
+            if before is not None:
+                newest = itertools.dropwhile(lambda notification: notification.id >= before, newest)
+            return [
+                notification.to_dict(inbox.is_read(notification))
+                for notification in itertools.islice(newest, limit)
+            ]
+
+    def mark_read(self, user_id: Hashable, notification_id: int):
+        """Mark one notification read.
+
+        Args:
+            user_id: The user.
+            notification_id: The notification.
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None or notification_id <= inbox.watermark or notification_id in inbox.read_ids:
+                return
+            # Inboxes and feeds are bounded, so finding it is a short scan
+            if any(item.id == notification_id for item in reversed(inbox.items)):
+                inbox.unread -= 1
+            else:
+                feed = self._orgs.get(inbox.org_id)
+                if feed is None or not any(alert.id == notification_id for alert in feed.items):
+                    return
+                heapq.heappush(inbox.org_read, notification_id)
+            inbox.read_ids.add(notification_id)
+
+    def mark_all_read(self, user_id: Hashable):
+        """Mark every notification read.
+
+        Args:
+            user_id: The user.
+        """
+        with self._lock:
+            inbox = self._inboxes.get(user_id)
+            if inbox is None:
+                return
+            inbox.watermark = self._last_id
+            inbox.read_ids.clear()
+            inbox.unread = 0
+            feed = self._orgs.get(inbox.org_id)
+            inbox.org_seen = feed.published if feed is not None else 0
+            inbox.org_read = []
+
+    def stats(self) -> Dict[str, int]:
+        """Count inboxes, organizations and stored notifications.
+
+        Returns:
+            Counts keyed by name.
+        """
+        with self._lock:
+            return {
+                "inboxes": len(self._inboxes),
+                "organizations": len(self._orgs),
+                "personal": sum(len(inbox.items) for inbox in self._inboxes.values()),
+                "org_alerts": sum(len(feed.items) for feed in self._orgs.values()),
+            }
+
+
+# Organization alerts are stored once here for all of their members.
+notification_service = NotificationService()
@@ -0,0 +1,166 @@
+"""In-process publish/subscribe for pushing updates to open sessions.
+
+``LocalBroker`` stands in for a networked broker such as Redis pub/sub:
+publishers send small messages to a topic, and every subscription to
+that topic receives them in order. Each subscription buffers a bounded
+number of messages. A subscriber that falls behind loses its buffered
+messages and is told to resync, so a slow session never blocks a
+publisher or grows without bound.
+"""
+
+import asyncio
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+# Messages buffered per subscription before its subscriber must resync.
+SUBSCRIPTION_BUFFER = 256
+
+# The message a lagging subscriber receives in place of the ones it lost.
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """The messages published to a set of topics since subscribing."""
+
+    def __init__(self, broker: "LocalBroker", topics: Tuple[str, ...], buffer: int):
+        """Initialize the subscription; use ``LocalBroker.subscribe`` instead.
+
+        Args:
+            broker: The broker delivering the messages.
+            topics: The topics subscribed to.
+            buffer: The number of messages kept before the subscriber must resync.
+        """
+        self.broker = broker
+        self.topics = topics
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=buffer)
+        self.dropped = 0
+        self.closed = False
+
+    def _deliver(self, message: Dict[str, Any]):
+        """Queue a message on the subscriber's event loop."""
+        if self.closed:
+            return
+        if self.queue.full():
+            # A resync reloads everything, so the buffered messages are moot
+            dropped = self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.dropped += dropped
+            self.broker.dropped += dropped
+            self.queue.put_nowait(RESYNC)
+            return
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for the next message.
+
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely.
+
+        Returns:
+            The message, or None if none arrived in time.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        """Stop receiving messages."""
+        self.closed = True
+        self.broker._unsubscribe(self)
+
+
+class LocalBroker:
+    """A message broker for the subscribers in this process.
+
+    ``publish`` may be called from any thread; messages are handed to each
+    subscriber's own event loop.
+    """
+
+    def __init__(self, buffer: int = SUBSCRIPTION_BUFFER):
+        """Initialize the broker.
+
+        Args:
+            buffer: The number of messages buffered per subscription.
+        """
+        self.buffer = buffer
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self, *topics: str) -> Subscription:
+        """Subscribe to topics; must be called from the subscriber's event loop.
+
+        Args:
+            topics: The topics; messages from all of them arrive in one queue.
+
+        Returns:
+            The subscription; close it when done.
+        """
+        subscription = Subscription(self, topics, self.buffer)
+        with self._lock:
+            for topic in topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        """Remove a subscription."""
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def publish(self, topic: str, message: Dict[str, Any]) -> int:
+        """Send a message to every subscriber of a topic.
+
+        Args:
+            topic: The topic.
+            message: The message; subscribers share it, so it must not be
+                changed after publishing.
+
+        Returns:
+            The number of subscribers it was sent to.
+        """
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+            self.published += 1
+            self.delivered += len(subscribers)
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for subscription in subscribers:
+            if subscription.loop is current:
+                subscription._deliver(message)
+            else:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription._deliver, message)
+                except RuntimeError:
+                    # The subscriber's event loop has shut down
+                    subscription.close()
+        return len(subscribers)
+
+    def subscriber_count(self, topic: Optional[str] = None) -> int:
+        """Count subscriptions.
+
+        Args:
+            topic: Only count subscriptions to this topic.
+
+        Returns:
+            The number of subscriptions.
+        """
+        with self._lock:
+            if topic is not None:
+                return len(self._topics.get(topic, ()))
+            return len(set().union(*self._topics.values()))
+
+
+# Every session's live watchers subscribe here, and webhooks publish here.
+broker = LocalBroker()
@@ -0,0 +1,446 @@
+"""Matching payments to open invoices and to bank deposits.
+
+Every match is a join over sorted arrays, so reconciling millions of
+records takes a few sorts and binary searches rather than a comparison
+of every payment with every invoice:
+
+1. Payments whose reference names an invoice are joined to it by id,
+   and kept if the amounts agree.
+2. The remaining payments and open invoices are joined on amount; each
+   invoice takes the earliest unclaimed payment dated between its issue
+   date and ``LATE_PAYMENT_DAYS`` after it is due.
+3. Payments are joined to bank inflows of the same amount that settle
+   within ``SETTLEMENT_DAYS``.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .invoices import STATUSES, InvoiceStore
+from .ledger import Ledger, StringDictionary, from_epoch_days, to_epoch_days
+
+# Invoice ids in payment references, e.g. "INV-1042" or "inv 1042".
+REFERENCE_PATTERN = re.compile(r"INV[-\s#]*0*(\d+)", re.IGNORECASE)
+
+# Days after an invoice is due that a payment may still be matched to it.
+LATE_PAYMENT_DAYS = 60
+
+# Days from a payment to its deposit showing up in the bank.
+SETTLEMENT_DAYS = 5
+
+# Bits of the composite sort key taken by the day; the rest hold the cents.
+DAY_BITS = 21
+
+# How each invoice match was made.
+MATCH_METHODS = ("reference", "amount")
+
+
+def to_cents(amounts: np.ndarray) -> np.ndarray:
+    """Round amounts to integer cents, so equal amounts compare equal.
+
+    Args:
+        amounts: Amounts in currency units.
+
+    Returns:
+        An int64 array of cents.
+    """
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def parse_reference(reference: str) -> int:
+    """Get the invoice id a payment reference names.
+
+    Args:
+        reference: The payment's free-text reference.
+
+    Returns:
+        The invoice id, or -1 if the reference names none.
+    """
+    match = REFERENCE_PATTERN.search(reference) if reference else None
+    return int(match.group(1)) if match else -1
+
+
+class Payments:
+    """Incoming payments stored as typed columns.
+
+    Invoice ids are parsed from the references once, when the payments
+    are loaded, so matching never touches the reference strings.
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[int],
+        amounts: Sequence[float],
+        dates: Sequence[Any],
+        payers: Sequence[str],
+        references: Sequence[str],
+    ):
+        """Initialize the payments from columns.
+
+        Args:
+            ids: The payment ids.
+            amounts: The amount of each payment.
+            dates: Payment dates, as ``YYYY-MM-DD`` strings or ``datetime64[D]``.
+            payers: Who sent each payment.
+            references: The free-text reference of each payment.
+        """
+        self.payers = StringDictionary()
+        self.references = StringDictionary()
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.dates = to_epoch_days(dates) if len(self.ids) else np.empty(0, dtype=np.int32)
+        self.payer_codes = self.payers.encode_many(payers)
+        self.reference_codes = self.references.encode_many(references)
+        # Parse each distinct reference once
+        parsed = np.fromiter(
+            (parse_reference(reference) for reference in self.references.values),
+            dtype=np.int64,
+            count=len(self.references),
+        )
+        self.invoice_ids = parsed[self.reference_codes] if len(self.ids) else np.empty(0, dtype=np.int64)
+        # Payments already applied to an invoice are not matched again
+        self.applied = np.zeros(len(self.ids), dtype=bool)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> "Payments":
+        """Build payments from dicts.
+
+        Args:
+            records: Dicts with ``id``, ``amount``, ``date``, ``payer`` and ``reference`` keys.
+
+        Returns:
+            The payments.
+        """
+        return cls(
+            [record["id"] for record in records],
+            [record["amount"] for record in records],
+            [record["date"] for record in records],
+            [record.get("payer", "") for record in records],
+            [record.get("reference", "") for record in records],
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def copy(self) -> "Payments":
+        """Copy the payments, so the copy can be marked applied without affecting these.
+
+        Returns:
+            New payments sharing every column but ``applied``.
+        """
+        payments = Payments.__new__(Payments)
+        payments.__dict__.update(self.__dict__)
+        payments.applied = self.applied.copy()
+        return payments
+
+    def to_dicts(self, rows: np.ndarray) -> List[Dict[str, Any]]:
+        """Materialize payments as dicts.
+
+        Args:
+            rows: The rows to materialize.
+
+        Returns:
+            Dicts with ``id``, ``amount``, ``date``, ``payer`` and ``reference`` keys.
+        """
+        return [
+            {"id": payment_id, "amount": amount, "date": day, "payer": payer, "reference": reference}
+            for payment_id, amount, day, payer, reference in zip(
+                self.ids[rows].tolist(),
+                self.amounts[rows].tolist(),
+                from_epoch_days(self.dates[rows]),
+                self.payers.decode_many(self.payer_codes[rows]),
+                self.references.decode_many(self.reference_codes[rows]),
+            )
+        ]
+
+
+def earliest_fit_join(
+    left_cents: np.ndarray,
+    left_days: np.ndarray,
+    right_cents: np.ndarray,
+    right_days: np.ndarray,
+    min_lag: int,
+    max_lag: Any,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Pair left and right items of equal amount, one to one.
+
+    Each left item takes the earliest right item with the same cents dated
+    ``min_lag`` to ``max_lag`` days after it. Right items are sorted by a
+    composite (cents, day) key, so each lookup is one binary search. Left
+    items are taken earliest first, and when several pick the same right
+    item the k-th of them gets the k-th free item from there on. Items whose
+    pick falls outside their window try again in the next round, without
+    the items claimed so far, until a round pairs nothing.
+
+    Args:
+        left_cents: Amounts of the left items, in cents.
+        left_days: Dates of the left items, as epoch days.
+        right_cents: Amounts of the right items, in cents.
+        right_days: Dates of the right items, as epoch days.
+        min_lag: The fewest days a right item may be dated after a left one.
+        max_lag: The most days, as a number or an array per left item.
+
+    Returns:
+        The positions of the paired left items and of their right items.
+    """
+    if not len(left_cents) or not len(right_cents):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    max_lag = np.broadcast_to(np.asarray(max_lag, dtype=np.int64), left_cents.shape)
+    first_day = int(min(left_days.min(), right_days.min())) - abs(min_lag)
+    day_mask = (1 << DAY_BITS) - 1
+
+    def composite(cents: np.ndarray, days: np.ndarray) -> np.ndarray:
+        return (cents << DAY_BITS) | (days.astype(np.int64) - first_day)
+
+    right_order = np.argsort(composite(right_cents, right_days), kind="stable")
+    right_keys = composite(right_cents, right_days)[right_order]
+
+    def fits(positions: np.ndarray, keys: np.ndarray, left: np.ndarray) -> np.ndarray:
+        """Check which left items may take the right items at these positions."""
+        in_range = positions < len(keys)
+        hit_keys = keys[np.where(in_range, positions, 0)]
+        return (
+            in_range
+            & (hit_keys >> DAY_BITS == left_cents[left])
+            & ((hit_keys & day_mask) + first_day - left_days[left] <= max_lag[left])
+        )
+
+    # Left items are sorted by (cents, day), so the earliest win ties
+    left_pending = np.lexsort((left_days, left_cents))
+    right_free = np.ones(len(right_order), dtype=bool)
+    matched_left, matched_right = [], []
+    while len(left_pending) and right_free.any():
+        keys, rows = right_keys[right_free], np.flatnonzero(right_free)
+        targets = composite(left_cents[left_pending], left_days[left_pending] + min_lag)
+        found = np.searchsorted(keys, targets)
+        # Items with no candidate at all can't match in a later round either
+        has_candidate = fits(found, keys, left_pending)
+        left_pending, found = left_pending[has_candidate], found[has_candidate]
+        if not len(left_pending):
+            break
+
+        # Candidates rise with the sorted left items, so giving each item
+        # max(its candidate, the previous item's slot + 1) hands the k-th
+        # claimant of a slot the k-th free item after it. That is
+        # i + cummax(found - i), reset at each amount.
+        rank = np.arange(len(found))
+        cents = left_cents[left_pending]
+        group = np.concatenate(([0], np.cumsum(cents[1:] != cents[:-1])))
+        spread = len(keys) + len(found) + 1
+        slots = np.maximum.accumulate(found - rank + group * spread) - group * spread + rank
+
+        won = fits(slots, keys, left_pending)
+        if not won.any():
+            break
+        matched_left.append(left_pending[won])
+        matched_right.append(right_order[rows[slots[won]]])
+        right_free[rows[slots[won]]] = False
+        left_pending = left_pending[~won]
+
+    if not matched_left:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    return np.concatenate(matched_left), np.concatenate(matched_right)
+
+
+class ReconciliationResult:
+    """Which payments paid which invoices and reached the bank, and what didn't match."""
+
+    def __init__(
+        self,
+        payments: Payments,
+        invoices: InvoiceStore,
+        ledger: Optional[Ledger],
+        invoice_matches: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        bank_matches: Tuple[np.ndarray, np.ndarray],
+    ):
+        """Initialize the result.
+
+        Args:
+            payments: The reconciled payments.
+            invoices: The invoices they were matched to.
+            ledger: The bank transactions they were matched to, if any.
+            invoice_matches: Payment rows, invoice rows and ``MATCH_METHODS`` codes.
+            bank_matches: Payment rows and ledger rows.
+        """
+        self.payments = payments
+        self.invoices = invoices
+        self.ledger = ledger
+        self.payment_rows, self.invoice_rows, self.methods = invoice_matches
+        self.banked_payment_rows, self.ledger_rows = bank_matches
+
+    def unmatched_payments(self) -> np.ndarray:
+        """Get payments that paid no open invoice and weren't applied before.
+
+        Returns:
+            Payment rows, oldest first.
+        """
+        matched = self.payments.applied.copy()
+        matched[self.payment_rows] = True
+        rows = np.flatnonzero(~matched)
+        return rows[np.argsort(self.payments.dates[rows], kind="stable")]
+
+    def unbanked_payments(self) -> np.ndarray:
+        """Get payments with no matching bank deposit.
+
+        Returns:
+            Payment rows, oldest first.
+        """
+        banked = np.zeros(len(self.payments), dtype=bool)
+        banked[self.banked_payment_rows] = True
+        rows = np.flatnonzero(~banked)
+        return rows[np.argsort(self.payments.dates[rows], kind="stable")]
+
+    def unmatched_deposits(self) -> np.ndarray:
+        """Get bank inflows that no payment accounts for.
+
+        Returns:
+            Ledger rows, oldest first.
+        """
+        if self.ledger is None:
+            return np.empty(0, dtype=np.intp)
+        deposit = self.ledger.amounts > 0
+        deposit[self.ledger_rows] = False
+        rows = np.flatnonzero(deposit)
+        return rows[np.argsort(self.ledger.dates[rows], kind="stable")]
+
+    def unpaid_invoices(self) -> np.ndarray:
+        """Get open invoices no payment was matched to.
+
+        Returns:
+            Invoice rows, most overdue first.
+        """
+        rows = self.invoices.query(status="open")
+        paid = np.zeros(len(self.invoices), dtype=bool)
+        paid[self.invoice_rows] = True
+        return rows[~paid[rows]]
+
+    def applied(self) -> Payments:
+        """Get the payments with every matched payment marked applied.
+
+        Returns:
+            A copy of the payments.
+        """
+        payments = self.payments.copy()
+        payments.applied[self.payment_rows] = True
+        return payments
+
+    def paid_invoice_ids(self) -> np.ndarray:
+        """Get the ids of the invoices payments were matched to.
+
+        Returns:
+            The invoice ids.
+        """
+        return self.invoices.ids[self.invoice_rows]
+
+    def summary(self) -> Dict[str, Any]:
+        """Count and total the matched and unmatched items.
+
+        Returns:
+            Counts and amounts keyed by name.
+        """
+        unmatched = self.unmatched_payments()
+        unpaid = self.unpaid_invoices()
+        deposits = self.unmatched_deposits()
+        unbanked = self.unbanked_payments()
+        by_method = np.bincount(self.methods, minlength=len(MATCH_METHODS))
+        return {
+            "payments": len(self.payments),
+            "applied_payments": int(self.payments.applied.sum()),
+            "matched_by_reference": int(by_method[0]),
+            "matched_by_amount": int(by_method[1]),
+            "matched_amount": round(float(self.payments.amounts[self.payment_rows].sum()), 2),
+            "unmatched_payments": len(unmatched),
+            "unmatched_payment_amount": round(float(self.payments.amounts[unmatched].sum()), 2),
+            "unpaid_invoices": len(unpaid),
+            "unpaid_invoice_amount": round(float(self.invoices.amounts[unpaid].sum()), 2),
+            "banked_payments": len(self.banked_payment_rows),
+            "unbanked_payments": len(unbanked),
+            "unmatched_deposits": len(deposits),
+            "unmatched_deposit_amount": (
+                round(float(self.ledger.amounts[deposits].sum()), 2) if self.ledger is not None else 0.0
+            ),
+        }
+
+
+def reconcile(
+    payments: Payments,
+    invoices: InvoiceStore,
+    ledger: Optional[Ledger] = None,
+    late_days: int = LATE_PAYMENT_DAYS,
+    settlement_days: int = SETTLEMENT_DAYS,
+) -> ReconciliationResult:
+    """Match payments to open invoices and to bank deposits.
+
+    Args:
+        payments: The payments received.
+        invoices: The invoices; only open ones are matched.
+        ledger: Bank transactions; only inflows are matched.
+        late_days: Days after the due date a payment may still match an invoice.
+        settlement_days: Days a payment may take to reach the bank.
+
+    Returns:
+        The matches and what was left unmatched.
+    """
+    pay_cents = to_cents(payments.amounts)
+    open_code = STATUSES.index("open")
+
+    # Payments that name an open invoice of the same amount
+    named = np.flatnonzero((payments.invoice_ids >= 0) & ~payments.applied)
+    invoice_rows = invoices.rows_of(payments.invoice_ids[named])
+    found = invoice_rows >= 0
+    named, invoice_rows = named[found], invoice_rows[found]
+    ok = (invoices.status_codes[invoice_rows] == open_code) & (
+        to_cents(invoices.amounts[invoice_rows]) == pay_cents[named]
+    )
+    named, invoice_rows = named[ok], invoice_rows[ok]
+    # If several payments name the same invoice, the earliest pays it
+    order = np.lexsort((payments.dates[named], invoice_rows))
+    named, invoice_rows = named[order], invoice_rows[order]
+    _, first = np.unique(invoice_rows, return_index=True)
+    ref_payments, ref_invoices = named[first], invoice_rows[first]
+
+    # Everything else is matched on amount within each invoice's payment window
+    open_invoice = invoices.status_codes == open_code
+    open_invoice[ref_invoices] = False
+    free_invoices = np.flatnonzero(open_invoice)
+    free = ~payments.applied
+    free[ref_payments] = False
+    free_payments = np.flatnonzero(free & (pay_cents > 0))
+    left, right = earliest_fit_join(
+        to_cents(invoices.amounts[free_invoices]),
+        invoices.issue_dates[free_invoices],
+        pay_cents[free_payments],
+        payments.dates[free_payments],
+        min_lag=0,
+        max_lag=(invoices.due_dates[free_invoices] - invoices.issue_dates[free_invoices]).astype(np.int64) + late_days,
+    )
+    amount_invoices, amount_payments = free_invoices[left], free_payments[right]
+
+    invoice_matches = (
+        np.concatenate((ref_payments, amount_payments)),
+        np.concatenate((ref_invoices, amount_invoices)),
+        np.concatenate((
+            np.zeros(len(ref_payments), dtype=np.intp),
+            np.ones(len(amount_payments), dtype=np.intp),
+        )),
+    )
+
+    bank_matches = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp))
+    if ledger is not None and len(ledger):
+        deposits = np.flatnonzero(ledger.amounts > 0)
+        positive = np.flatnonzero(pay_cents > 0)
+        left, right = earliest_fit_join(
+            pay_cents[positive],
+            payments.dates[positive],
+            to_cents(ledger.amounts[deposits]),
+            ledger.dates[deposits],
+            min_lag=0,
+            max_lag=settlement_days,
+        )
+        bank_matches = (positive[left], deposits[right])
+
+    return ReconciliationResult(payments, invoices, ledger, invoice_matches, bank_matches)
@@ -0,0 +1,340 @@
+"""Incrementally maintained daily rollups for date-range analytics queries."""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .aggregation import AnalyticsEngine, day_range, period_labels, period_starts
+from .ledger import from_epoch_days
+
+# Number of set bits in every byte value.
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.int64)
+
+
+class DailySeries:
+    """Per-day totals with prefix sums, so any range sum is O(1).
+
+    The series grows in both directions as days outside the current span are
+    added. Prefix sums are rebuilt lazily, and only from the earliest day
+    that changed since the last query.
+    """
+
+    def __init__(self):
+        """Initialize an empty series."""
+        self.origin: Optional[int] = None
+        self.values = np.zeros(0, dtype=np.float64)
+        self._prefix = np.zeros(1, dtype=np.float64)
+        self._dirty_from = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _ensure(self, first_day: int, last_day: int):
+        """Grow the series to cover a span of days."""
+        if self.origin is None:
+            self.origin = first_day
+            self.values = np.zeros(last_day - first_day + 1, dtype=np.float64)
+            self._dirty_from = 0
+            return
+        origin = min(self.origin, first_day)
+        end = max(self.origin + len(self.values) - 1, last_day)
+        if origin == self.origin and end == self.origin + len(self.values) - 1:
+            return
+        values = np.zeros(end - origin + 1, dtype=np.float64)
+        shift = self.origin - origin
+        values[shift:shift + len(self.values)] = self.values
+        self._dirty_from = 0 if shift else min(self._dirty_from, len(self.values))
+        self.origin = origin
+        self.values = values
+
+    def add(self, days: np.ndarray, values: np.ndarray):
+        """Add values to their days.
+
+        Args:
+            days: The epoch day of every value.
+            values: The values to add.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        if len(days) == 0:
+            return
+        self._ensure(int(days.min()), int(days.max()))
+        offsets = days - self.origin
+        np.add.at(self.values, offsets, np.asarray(values, dtype=np.float64))
+        self._dirty_from = min(self._dirty_from, int(offsets.min()))
+
+    def prefix(self) -> np.ndarray:
+        """Get the prefix sums, where ``prefix()[i]`` is the total of the first ``i`` days.
+
+        Returns:
+            An array one longer than the series.
+        """
+        if len(self._prefix) != len(self.values) + 1:
+            prefix = np.zeros(len(self.values) + 1, dtype=np.float64)
+            keep = min(self._dirty_from, len(self._prefix) - 1)
+            prefix[:keep + 1] = self._prefix[:keep + 1]
+            self._prefix = prefix
+            self._dirty_from = keep
+        start = self._dirty_from
+        if start < len(self.values):
+            self._prefix[start + 1:] = self._prefix[start] + np.cumsum(self.values[start:])
+            self._dirty_from = len(self.values)
+        return self._prefix
+
+    def cumulative(self, days: np.ndarray) -> np.ndarray:
+        """Get the running total up to and including each day.
+
+        Args:
+            days: Epoch days.
+
+        Returns:
+            One running total per day.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        if self.origin is None:
+            return np.zeros(len(days), dtype=np.float64)
+        prefix = self.prefix()
+        return prefix[np.clip(days - self.origin + 1, 0, len(self.values))]
+
+    def range_sum(self, start_day: int, end_day: int) -> float:
+        """Get the total of an inclusive range of days in O(1).
+
+        Args:
+            start_day: The first epoch day.
+            end_day: The last epoch day.
+
+        Returns:
+            The sum of the range.
+        """
+        totals = self.cumulative([start_day - 1, end_day])
+        return float(totals[1] - totals[0])
+
+    def period_sums(self, start_day: int, end_day: int, period: str) -> np.ndarray:
+        """Get the total of every period in a range, O(1) per period.
+
+        Args:
+            start_day: The first epoch day.
+            end_day: The last epoch day.
+            period: One of ``day``, ``week`` or ``month``.
+
+        Returns:
+            One total per period.
+        """
+        starts = period_starts(start_day, end_day, period) + start_day
+        bounds = self.cumulative(np.append(starts - 1, end_day))
+        return np.diff(bounds)
+
+
+class DailyBitmaps:
+    """One bitmap of active keys per day, for distinct counts over any range.
+
+    Distinct counts for a period OR together the period's daily bitmaps,
+    so queries cost O(days x keys / 8) bytes of work and never touch raw events.
+    """
+
+    def __init__(self):
+        """Initialize empty bitmaps."""
+        self.origin: Optional[int] = None
+        self.bits = np.zeros((0, 0), dtype=np.uint8)
+
+    def _ensure(self, first_day: int, last_day: int, max_key: int):
+        """Grow the bitmaps to cover a span of days and keys."""
+        width = max(self.bits.shape[1], max_key // 8 + 1)
+        if self.origin is None:
+            origin, end = first_day, last_day
+        else:
+            origin = min(self.origin, first_day)
+            end = max(self.origin + self.bits.shape[0] - 1, last_day)
+        shape = (end - origin + 1, width)
+        if shape == self.bits.shape and origin == self.origin:
+            return
+        bits = np.zeros(shape, dtype=np.uint8)
+        if self.origin is not None:
+            shift = self.origin - origin
+            bits[shift:shift + self.bits.shape[0], :self.bits.shape[1]] = self.bits
+        self.origin = origin
+        self.bits = bits
+
+    def add(self, days: np.ndarray, keys: np.ndarray):
+        """Mark keys as active on their days.
+
+        Args:
+            days: The epoch day of every event.
+            keys: The non-negative integer key of every event.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(days) == 0:
+            return
+        self._ensure(int(days.min()), int(days.max()), int(keys.max()))
+        masks = np.left_shift(1, keys & 7).astype(np.uint8)
+        np.bitwise_or.at(self.bits, (days - self.origin, keys >> 3), masks)
+
+    def period_distinct(self, start_day: int, end_day: int, period: str) -> np.ndarray:
+        """Count the distinct keys active in every period of a range.
+
+        Args:
+            start_day: The first epoch day.
+            end_day: The last epoch day.
+            period: One of ``day``, ``week`` or ``month``.
+
+        Returns:
+            One distinct count per period.
+        """
+        starts = period_starts(start_day, end_day, period)
+        rows = np.zeros((end_day - start_day + 1, self.bits.shape[1]), dtype=np.uint8)
+        if self.origin is not None:
+            lo = max(start_day, self.origin)
+            hi = min(end_day, self.origin + self.bits.shape[0] - 1)
+            if lo <= hi:
+                rows[lo - start_day:hi - start_day + 1] = self.bits[lo - self.origin:hi - self.origin + 1]
+        if rows.shape[1] == 0:
+            return np.zeros(len(starts), dtype=np.int64)
+        merged = np.bitwise_or.reduceat(rows, starts, axis=0)
+        return POPCOUNT[merged].sum(axis=1)
+
+
+class RollupStore:
+    """Precomputed daily aggregates that answer analytics range queries.
+
+    Revenue and sign-ups are kept as prefix-summed daily series and activity
+    as daily bitmaps. New events are folded in with ``add_revenue`` and
+    ``add_events`` without recomputing history.
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self.revenue_series = DailySeries()
+        self.signup_series = DailySeries()
+        self.activity = DailyBitmaps()
+        self._never = np.iinfo(np.int64).max
+        self._first_seen = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_engine(cls, engine: AnalyticsEngine) -> "RollupStore":
+        """Build a store from the raw arrays of an aggregation engine.
+
+        Args:
+            engine: The engine holding the raw events.
+
+        Returns:
+            A new store.
+        """
+        store = cls()
+        store.add_revenue(engine.revenue_days, engine.revenue_amounts)
+        store.add_events(engine.event_days, engine.event_user_ids)
+        return store
+
+    def add_revenue(self, days: np.ndarray, amounts: np.ndarray):
+        """Fold new revenue items into the store.
+
+        Args:
+            days: The epoch day of every item.
+            amounts: The amount of every item.
+        """
+        self.revenue_series.add(days, amounts)
+
+    def add_events(self, days: np.ndarray, user_ids: np.ndarray):
+        """Fold new user activity events into the store.
+
+        Args:
+            days: The epoch day of every event.
+            user_ids: The non-negative user id of every event.
+        """
+        days = np.asarray(days, dtype=np.int64)
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if len(days) == 0:
+            return
+        self.activity.add(days, user_ids)
+
+        # Move sign-ups of users whose first activity is now earlier
+        size = max(len(self._first_seen), int(user_ids.max()) + 1)
+        if size > len(self._first_seen):
+            self._first_seen = np.append(
+                self._first_seen, np.full(size - len(self._first_seen), self._never, dtype=np.int64)
+            )
+        batch_users = np.unique(user_ids)
+        batch_first = np.full(size, self._never, dtype=np.int64)
+        np.minimum.at(batch_first, user_ids, days)
+        old = self._first_seen[batch_users]
+        new = batch_first[batch_users]
+        moved = new < old
+        previous = old[moved]
+        had_signup = previous != self._never
+        self.signup_series.add(previous[had_signup], -np.ones(int(had_signup.sum())))
+        self.signup_series.add(new[moved], np.ones(int(moved.sum())))
+        self._first_seen[batch_users[moved]] = new[moved]
+
+    def total_revenue(self, start_date: str, end_date: str) -> float:
+        """Get the revenue of a date range in O(1).
+
+        Args:
+            start_date: The first date, formatted as ``YYYY-MM-DD``.
+            end_date: The last date, formatted as ``YYYY-MM-DD``.
+
+        Returns:
+            The total revenue.
+        """
+        return self.revenue_series.range_sum(*day_range(start_date, end_date))
+
+    def revenue(self, start_date: str, end_date: str, period: str = "day") -> List[Dict[str, Any]]:
+        """Get total revenue per period, like ``AnalyticsEngine.revenue``.
+
+        Args:
+            start_date: The first date, formatted as ``YYYY-MM-DD``.
+            end_date: The last date, formatted as ``YYYY-MM-DD``.
+            period: One of ``day``, ``week`` or ``month``.
+
+        Returns:
+            Dicts with ``date`` and ``revenue`` keys.
+        """
+        start_day, end_day = day_range(start_date, end_date)
+        totals = self.revenue_series.period_sums(start_day, end_day, period).round(2).tolist()
+        labels = period_labels(start_day, end_day, period)
+        return [{"date": label, "revenue": total} for label, total in zip(labels, totals)]
+
+    def user_activity(self, start_date: str, end_date: str, period: str = "day") -> List[Dict[str, Any]]:
+        """Get active and new users per period, like ``AnalyticsEngine.user_activity``.
+
+        Args:
+            start_date: The first date, formatted as ``YYYY-MM-DD``.
+            end_date: The last date, formatted as ``YYYY-MM-DD``.
+            period: One of ``day``, ``week`` or ``month``.
+
+        Returns:
+            Dicts with ``date``, ``active_users`` and ``new_users`` keys.
+        """
+        start_day, end_day = day_range(start_date, end_date)
+        active = self.activity.period_distinct(start_day, end_day, period).tolist()
+        new = self.signup_series.period_sums(start_day, end_day, period).round().astype(np.int64).tolist()
+        labels = period_labels(start_day, end_day, period)
+        return [
+            {"date": label, "active_users": active_users, "new_users": new_users}
+            for label, active_users, new_users in zip(labels, active, new)
+        ]
+
+    def account_growth(self, start_date: str, end_date: str, period: str = "month") -> List[Dict[str, Any]]:
+        """Get the number of accounts at the end of each period, like ``AnalyticsEngine.account_growth``.
+
+        Args:
+            start_date: The first date, formatted as ``YYYY-MM-DD``.
+            end_date: The last date, formatted as ``YYYY-MM-DD``.
+            period: One of ``day``, ``week`` or ``month``.
+
+        Returns:
+            Dicts with ``month`` (or ``date``) and ``accounts`` keys.
+        """
+        start_day, end_day = day_range(start_date, end_date)
+        starts, ends = _period_bounds(start_day, end_day, period)
+        accounts = self.signup_series.cumulative(ends).round().astype(np.int64).tolist()
+        if period == "month":
+            labels = [month.strftime("%b %Y") for month in starts.astype("datetime64[D]").astype(object)]
+            return [{"month": label, "accounts": count} for label, count in zip(labels, accounts)]
+        labels = from_epoch_days(starts)
+        return [{"date": label, "accounts": count} for label, count in zip(labels, accounts)]
+
+
+def _period_bounds(start_day: int, end_day: int, period: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the first and last epoch day of every period in a range."""
+    starts = period_starts(start_day, end_day, period) + start_day
+    return starts, np.append(starts[1:] - 1, end_day)
+
@@ -0,0 +1,59 @@
+"""Storage for per-user packed settings, written a batch of fields at a time."""
+
+import threading
+from typing import Dict, Hashable, Optional, Tuple
+
+# {settings name: (mask of the fields being written, their packed values)}
+SettingsChanges = Dict[str, Tuple[int, int]]
+
+
+class SettingsStore:
+    """Packed settings per user.
+
+    A write carries only the fields that changed, as a mask and their
+    values, and applies every settings group in one step. Fields another
+    session changed in the meantime are left alone.
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self.writes = 0
+        self._rows: Dict[Hashable, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, user_id: Hashable) -> Optional[Dict[str, int]]:
+        """Get a user's saved settings.
+
+        Args:
+            user_id: The user.
+
+        Returns:
+            The packed settings keyed by name, or None if nothing was saved.
+        """
+        with self._lock:
+            row = self._rows.get(user_id)
+            return dict(row) if row is not None else None
+
+    def write(self, user_id: Hashable, changes: SettingsChanges, defaults: Dict[str, int]) -> Dict[str, int]:
+        """Save changed fields in one transaction.
+
+        Args:
+            user_id: The user.
+            changes: The changed fields of each settings group.
+            defaults: The packed settings to start from if the user has none saved.
+
+        Returns:
+            The user's settings after the write.
+        """
+        # In a real app, this would be a single database transaction
+        # For demo purposes, we'll keep the settings in memory
+        with self._lock:
+            row = self._rows.setdefault(user_id, dict(defaults))
+            for name, (mask, bits) in changes.items():
+                row[name] = row.get(name, defaults.get(name, 0)) & ~mask | bits & mask
+            self.writes += 1
+            return dict(row)
+
+
+# Sessions of the same user read and write the same packed settings here.
+settings_store = SettingsStore()
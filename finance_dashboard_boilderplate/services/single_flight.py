@@ -0,0 +1,141 @@
+"""Request coalescing: concurrent calls for the same key share one call."""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class FlightStats:
+    """How often calls for a key were made and how many were shared."""
+
+    __slots__ = ("calls", "executions", "errors")
+
+    def __init__(self):
+        """Initialize all counters to zero."""
+        self.calls = 0
+        self.executions = 0
+        self.errors = 0
+
+    @property
+    def saved(self) -> int:
+        """Calls answered by another caller's in-flight call."""
+        return self.calls - self.executions
+
+    def as_dict(self) -> Dict[str, int]:
+        """Get the counters as a dict.
+
+        Returns:
+            The counter values keyed by name, including ``saved``.
+        """
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "errors": self.errors,
+            "saved": self.saved,
+        }
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time.
+
+    A caller whose key already has a call in flight waits for that call
+    and gets its result or exception, so a burst of identical loads turns
+    into one backend request. Results are not kept after the call ends;
+    caching them is up to the caller.
+    """
+
+    def __init__(self, max_tracked_keys: int = 4096):
+        """Initialize the coalescer.
+
+        Args:
+            max_tracked_keys: Keys whose counters are kept, least recently used
+                first out; ``totals`` counts every key.
+        """
+        self.max_tracked_keys = max_tracked_keys
+        self.totals = FlightStats()
+        self._stats: "OrderedDict[Hashable, FlightStats]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _stats_for(self, key: Hashable) -> FlightStats:
+        """Get a key's counters, tracking it if new."""
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = FlightStats()
+            while len(self._stats) > self.max_tracked_keys:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(key)
+        return stats
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        """Forget a finished call and count its failure."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.totals.errors += 1
+            stats = self._stats.get(key)
+            if stats is not None:
+                stats.errors += 1
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check whether a call for a key is running.
+
+        Args:
+            key: The key.
+
+        Returns:
+            Whether a new call for the key would join a running one.
+        """
+        return key in self._inflight
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Call ``fn``, or join the call already in flight for ``key``.
+
+        Args:
+            key: Identifies identical calls, for example the request URL.
+            fn: A coroutine function making the call.
+
+        Returns:
+            What the shared call returned.
+        """
+        stats = self._stats_for(key)
+        stats.calls += 1
+        self.totals.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            stats.executions += 1
+            self.totals.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # One waiter being cancelled doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def stats(self, key: Optional[Hashable] = None) -> Dict[str, int]:
+        """Get the counters of one key, or the totals.
+
+        Args:
+            key: The key; defaults to the totals over every key.
+
+        Returns:
+            The counters, including how many calls were saved.
+        """
+        if key is None:
+            return self.totals.as_dict()
+        stats = self._stats.get(key)
+        return stats.as_dict() if stats is not None else FlightStats().as_dict()
+
+    def top_saved(self, limit: int = 10) -> Dict[Hashable, Dict[str, int]]:
+        """Get the keys that saved the most calls.
+
+        Args:
+            limit: The number of keys.
+
+        Returns:
+            Counters keyed by key, most saved first.
+        """
+        ranked = sorted(self._stats.items(), key=lambda item: item[1].saved, reverse=True)
+        return {key: stats.as_dict() for key, stats in ranked[:limit]}
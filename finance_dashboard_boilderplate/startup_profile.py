@@ -0,0 +1,315 @@
+"""Startup profiler for the app module.
+
+Reports how long app startup spends importing each module, registering
+each state class and compiling each page, and checks the totals against
+a budget. Run it from the project root::
+
+    python -m finance_dashboard_boilderplate.startup_profile
+    python -m finance_dashboard_boilderplate.startup_profile --json --budget 4
+
+The process exits with status 1 if any budget is exceeded, so it can gate
+CI before a slower startup reaches pod readiness checks.
+
+Only the standard library is imported at module level so that the
+profiler itself doesn't skew the import timings.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+APP_MODULE = "finance_dashboard_boilderplate.finance_dashboard_boilderplate"
+
+# Budgets in seconds; each can also be set from the environment.
+BUDGET_ENV_VARS = {
+    "total": "STARTUP_BUDGET",
+    "imports": "STARTUP_BUDGET_IMPORTS",
+    "states": "STARTUP_BUDGET_STATES",
+    "pages": "STARTUP_BUDGET_PAGES",
+}
+
+
+class ImportTimer:
+    """A meta path finder that times how long each module takes to execute.
+
+    It finds nothing itself; it asks the finders after it for a spec and
+    wraps the loader's ``exec_module`` to time it. Time spent importing
+    nested modules is subtracted from the parent's self time.
+    """
+
+    def __init__(self):
+        """Initialize the timer."""
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._stack: List[float] = []
+        self._finding = False
+
+    def install(self):
+        """Start timing imports."""
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """Stop timing imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        """Find a spec with the other finders and time its loader."""
+        if self._finding:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding = False
+
+        loader = spec.loader
+        # Builtin and frozen importers are shared classes; leave them alone
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+            loader.exec_module = self._timed(name, loader.exec_module)
+        return spec
+
+    def _timed(self, name, exec_module):
+        """Wrap a loader's exec_module to record the module's import time."""
+        def timed_exec_module(module):
+            self._stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += elapsed
+                self.timings[name] = {"self": elapsed - children, "cumulative": elapsed}
+
+        return timed_exec_module
+
+
+class StateTimer:
+    """Times how long Reflex takes to register each state class.
+
+    Registration happens in ``BaseState.__init_subclass__`` when the class
+    statement runs, so it is wrapped while the profiler is active.
+    """
+
+    def __init__(self):
+        """Initialize the timer."""
+        self.timings: Dict[str, float] = {}
+        self._original = None
+
+    def install(self):
+        """Start timing state registration."""
+        from reflex.state import BaseState
+
+        self._original = BaseState.__dict__["__init_subclass__"]
+        original = self._original.__func__
+        timings = self.timings
+
+        def __init_subclass__(cls, **kwargs):
+            start = time.perf_counter()
+            try:
+                original(cls, **kwargs)
+            finally:
+                timings[f"{cls.__module__}.{cls.__qualname__}"] = time.perf_counter() - start
+
+        BaseState.__init_subclass__ = classmethod(__init_subclass__)
+
+    def uninstall(self):
+        """Stop timing state registration."""
+        if self._original is not None:
+            from reflex.state import BaseState
+
+            BaseState.__init_subclass__ = self._original
+            self._original = None
+
+
+def compile_pages(app: Any) -> Dict[str, float]:
+    """Compile every page added to an app and time each one.
+
+    Args:
+        app: The app whose pages to compile.
+
+    Returns:
+        Seconds spent compiling each page, keyed by route.
+    """
+    timings = {}
+    for route in list(app.unevaluated_pages):
+        start = time.perf_counter()
+        app._compile_page(route)
+        timings[route] = time.perf_counter() - start
+    return timings
+
+
+def profile_startup(app_module: str = APP_MODULE, include_pages: bool = True) -> Dict[str, Any]:
+    """Import the app module and profile each phase of startup.
+
+    This must run in a fresh process; modules that are already imported
+    are not timed.
+
+    Args:
+        app_module: The module that defines ``app``.
+        include_pages: Whether to also compile every page.
+
+    Returns:
+        The report, with ``totals``, ``imports``, ``states`` and ``pages`` keys.
+    """
+    imports = ImportTimer()
+    states = StateTimer()
+    imports.install()
+    try:
+        start = time.perf_counter()
+        importlib.import_module("reflex.state")
+        states.install()
+        try:
+            module = importlib.import_module(app_module)
+            import_seconds = time.perf_counter() - start
+
+            pages: Dict[str, float] = {}
+            if include_pages and hasattr(module, "app"):
+                pages = compile_pages(module.app)
+        finally:
+            states.uninstall()
+    finally:
+        imports.uninstall()
+
+    state_seconds = sum(states.timings.values())
+    page_seconds = sum(pages.values())
+    return {
+        "totals": {
+            # State registration happens during import, so it isn't added again
+            "total": import_seconds + page_seconds,
+            "imports": import_seconds - state_seconds,
+            "states": state_seconds,
+            "pages": page_seconds,
+        },
+        "imports": sorted(
+            (
+                {"module": name, "self": timing["self"], "cumulative": timing["cumulative"]}
+                for name, timing in imports.timings.items()
+            ),
+            key=lambda row: row["self"],
+            reverse=True,
+        ),
+        "states": sorted(
+            ({"state": name, "seconds": seconds} for name, seconds in states.timings.items()),
+            key=lambda row: row["seconds"],
+            reverse=True,
+        ),
+        "pages": sorted(
+            ({"route": route, "seconds": seconds} for route, seconds in pages.items()),
+            key=lambda row: row["seconds"],
+            reverse=True,
+        ),
+    }
+
+
+def check_budget(report: Dict[str, Any], budgets: Dict[str, Optional[float]]) -> List[str]:
+    """Compare the report's totals to the budgets.
+
+    Args:
+        report: A report from ``profile_startup``.
+        budgets: The budget in seconds for any of the totals; ``None`` means unlimited.
+
+    Returns:
+        A message for every budget that was exceeded.
+    """
+    failures = []
+    for phase, budget in budgets.items():
+        if budget is None:
+            continue
+        seconds = report["totals"][phase]
+        if seconds > budget:
+            failures.append(f"{phase} took {seconds:.3f}s, over the {budget:.3f}s budget")
+    return failures
+
+
+def format_report(report: Dict[str, Any], limit: int = 20) -> str:
+    """Format a report as plain-text tables.
+
+    Args:
+        report: A report from ``profile_startup``.
+        limit: The number of rows to show per table.
+
+    Returns:
+        The formatted report.
+    """
+    lines = ["Startup totals"]
+    for phase, seconds in report["totals"].items():
+        lines.append(f"  {phase:<10} {seconds * 1000:>10.1f} ms")
+
+    lines += ["", f"Slowest imports (top {limit})", f"  {'self ms':>10} {'cumul ms':>10}  module"]
+    for row in report["imports"][:limit]:
+        lines.append(f"  {row['self'] * 1000:>10.1f} {row['cumulative'] * 1000:>10.1f}  {row['module']}")
+
+    lines += ["", f"Slowest state registrations (top {limit})", f"  {'ms':>10}  state"]
+    for row in report["states"][:limit]:
+        lines.append(f"  {row['seconds'] * 1000:>10.1f}  {row['state']}")
+
+    lines += ["", f"Slowest page compiles (top {limit})", f"  {'ms':>10}  route"]
+    for row in report["pages"][:limit]:
+        lines.append(f"  {row['seconds'] * 1000:>10.1f}  {row['route']}")
+    return "\n".join(lines)
+
+
+def _env_budget(phase: str) -> Optional[float]:
+    """Read a phase's budget from the environment."""
+    value = os.environ.get(BUDGET_ENV_VARS[phase])
+    return float(value) if value else None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Profile startup from the command line.
+
+    Args:
+        argv: The command line arguments.
+
+    Returns:
+        The exit status: 0 if within budget, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Profile app startup time.")
+    parser.add_argument("--app-module", default=APP_MODULE, help="The module that defines the app.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    parser.add_argument("--limit", type=int, default=20, help="Rows per table in the text report.")
+    parser.add_argument("--no-compile", action="store_true", help="Skip compiling pages.")
+    for phase, env_var in BUDGET_ENV_VARS.items():
+        flag = "--budget" if phase == "total" else f"--budget-{phase}"
+        parser.add_argument(
+            flag,
+            dest=f"budget_{phase}",
+            type=float,
+            default=_env_budget(phase),
+            help=f"Seconds allowed for {phase} (default: ${env_var}).",
+        )
+    args = parser.parse_args(argv)
+
+    # Make the app importable when run from the project root
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    report = profile_startup(args.app_module, include_pages=not args.no_compile)
+    budgets = {phase: getattr(args, f"budget_{phase}") for phase in BUDGET_ENV_VARS}
+    failures = check_budget(report, budgets)
+    report["budget"] = {"limits": budgets, "failures": failures}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report, args.limit))
+        for failure in failures:
+            print(f"Startup budget exceeded: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
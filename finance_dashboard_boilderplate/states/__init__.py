@@ -1,15 +1,21 @@
-from .app_state import AppState
 from .auth_state import AuthState
 from .dashboard_state import DashboardState
 from .user_state import UserState
-from .sidebar_state import SidebarState
-from .analytics_state import AnalyticsState
+from .analysis_state import AnalyticsState
+from .transactions_state import TransactionsState
+from .import_state import ImportState
+from .invoices_state import InvoicesState
+from .payments_state import PaymentsState
+from .notifications_state import NotificationsState
 
 __all__ = [
-    "AppState",
     "AuthState",
     "DashboardState",
     "UserState",
-    "SidebarState",
     "AnalyticsState",
+    "TransactionsState",
+    "ImportState",
+    "InvoicesState",
+    "PaymentsState",
+    "NotificationsState",
 ]
\ No newline at end of file
@@ -1,7 +1,26 @@
 import reflex as rx
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Hashable, Optional, Tuple
 from datetime import datetime, timedelta
 
+from ..services import analytics_jobs
+from ..services.cache import data_cache
+from ..services.data_sources import get_data_source
+from ..services.executor import JobCancelled, analytics_executor
+from .auth_state import AuthState
+
+
+async def run_analytics_job(job_key: Hashable, job, *args) -> Any:
+    """Run an analytics query in the process pool.
+    
+    Raises:
+        JobCancelled: If a newer job with the same key replaced this one.
+    """
+    if not analytics_jobs.events_published():
+        await asyncio.to_thread(analytics_jobs.publish_events)
+    return await analytics_executor.run(job_key, analytics_jobs.EVENTS_DATASET, job, *args)
+
+
 class AnalyticsState(rx.State):
     """State for the analytics page."""
     
@@ -15,119 +34,185 @@ class AnalyticsState(rx.State):
     start_date: str = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
     end_date: str = datetime.now().strftime("%Y-%m-%d")
     
+    # Grouping for the revenue and activity charts: "day", "week" or "month"
+    period: str = "day"
+    
     # Loading states
     is_loading_revenue: bool = False
     is_loading_activity: bool = False
     is_loading_products: bool = False
     is_loading_growth: bool = False
     
+    async def _get_user_id(self) -> Optional[str]:
+        """Get the id of the signed-in user, used to key cached data."""
+        auth = await self.get_state(AuthState)
+        return auth.user_id
+    
+    def _job_key(self, source: str) -> Hashable:
+        """Key analytics jobs by browser tab, so a newer query replaces an older one."""
+        return (self.router.session.client_token, source)
+    
+    def _chart_params(self, source: str) -> Tuple[str, ...]:
+        """Get the filters a chart's data currently depends on."""
+        if source == "growth":
+            return (self.end_date,)
+        return (self.start_date, self.end_date, self.period)
+    
+    async def _load_chart(self, source: str, params: Tuple[str, ...], user_id: Optional[str], job, *args, **cache_key) -> Any:
+        """Load a chart's data through the cache, running its query if needed.
+        
+        Tabs asking for the same data share one query, but only the tab that
+        started it can cancel it. A tab still showing the same filters when
+        the shared query is cancelled runs it again rather than giving up.
+        
+        Raises:
+            JobCancelled: If this tab has moved on to other filters.
+        """
+        job_key = self._job_key(source)
+        while True:
+            try:
+                return await data_cache.get(
+                    source, lambda: run_analytics_job(job_key, job, *args), user_id, **cache_key
+                )
+            except JobCancelled:
+                async with self:
+                    if self._chart_params(source) != params:
+                        raise
+    
     def fetch_analytics_data(self):
         """Fetch all analytics data on page load."""
         return [
-            self.fetch_revenue_data(),
-            self.fetch_user_activity(),
-            self.fetch_top_products(),
-            self.fetch_account_growth(),
+            AnalyticsState.fetch_revenue_data,
+            AnalyticsState.fetch_user_activity,
+            AnalyticsState.fetch_top_products,
+            AnalyticsState.fetch_account_growth,
         ]
     
+    @rx.event(background=True)
     async def fetch_revenue_data(self):
         """Fetch revenue data for the selected date range."""
-        self.is_loading_revenue = True
+        async with self:
+            self.is_loading_revenue = True
+            start_date, end_date, period = self.start_date, self.end_date, self.period
+            user_id = await self._get_user_id()
         
         try:
-            # In a real app, you would fetch from an API with the date range
-            import asyncio
-            await asyncio.sleep(0.7)  # Simulate API delay
-            
-            # Generate mock data for the last 30 days
-            self.revenue_data = []
-            base_date = datetime.now() - timedelta(days=30)
-            
-            for i in range(31):
-                date = base_date + timedelta(days=i)
-                self.revenue_data.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "revenue": 1000 + (i * 50) + (100 * (i % 7)),  # Some pattern with weekly cycle
-                })
+            data = await self._load_chart(
+                "revenue",
+                (start_date, end_date, period),
+                user_id,
+                analytics_jobs.revenue,
+                start_date,
+                end_date,
+                period,
+                start_date=start_date,
+                end_date=end_date,
+                variant=period,
+            )
+        except JobCancelled:
+            # A query for a newer date range replaced this one
+            data = None
         except Exception as e:
             print(f"Error fetching revenue data: {e}")
+            data = None
         
-        self.is_loading_revenue = False
+        async with self:
+            # Drop results for a range the user has already moved away from
+            if (start_date, end_date, period) == (self.start_date, self.end_date, self.period):
+                if data is not None:
+                    self.revenue_data = data
+                self.is_loading_revenue = False
     
+    @rx.event(background=True)
     async def fetch_user_activity(self):
         """Fetch user activity data for the selected date range."""
-        self.is_loading_activity = True
+        async with self:
+            self.is_loading_activity = True
+            start_date, end_date, period = self.start_date, self.end_date, self.period
+            user_id = await self._get_user_id()
         
         try:
-            # In a real app, you would fetch from an API with the date range
-            import asyncio
-            await asyncio.sleep(0.6)  # Simulate API delay
-            
-            # Generate mock data for the last 30 days
-            self.user_activity_data = []
-            base_date = datetime.now() - timedelta(days=30)
-            
-            for i in range(31):
-                date = base_date + timedelta(days=i)
-                self.user_activity_data.append({
-                    "date": date.strftime("%Y-%m-%d"),
-                    "active_users": 500 + (i * 10) + (50 * (i % 7)),  # Some pattern with weekly cycle
-                    "new_users": 50 + (i * 2) + (20 * (i % 7)),  # Some pattern with weekly cycle
-                })
+            data = await self._load_chart(
+                "activity",
+                (start_date, end_date, period),
+                user_id,
+                analytics_jobs.user_activity,
+                start_date,
+                end_date,
+                period,
+                start_date=start_date,
+                end_date=end_date,
+                variant=period,
+            )
+        except JobCancelled:
+            data = None
         except Exception as e:
             print(f"Error fetching user activity data: {e}")
+            data = None
         
-        self.is_loading_activity = False
+        async with self:
+            if (start_date, end_date, period) == (self.start_date, self.end_date, self.period):
+                if data is not None:
+                    self.user_activity_data = data
+                self.is_loading_activity = False
     
     async def fetch_top_products(self):
         """Fetch top products data."""
         self.is_loading_products = True
         
         try:
-            # In a real app, you would fetch from an API
-            import asyncio
-            await asyncio.sleep(0.5)  # Simulate API delay
-            
-            self.top_products = [
-                {"id": 1, "name": "Premium Plan", "revenue": 45000, "users": 150},
-                {"id": 2, "name": "Basic Plan", "revenue": 30000, "users": 300},
-                {"id": 3, "name": "Enterprise Plan", "revenue": 25000, "users": 25},
-                {"id": 4, "name": "Add-on: Tax Filing", "revenue": 15000, "users": 100},
-                {"id": 5, "name": "Add-on: Budgeting", "revenue": 10000, "users": 200},
-            ]
+            # Products are the same for every user, so one cache entry serves everyone
+            self.top_products = await data_cache.get("products", get_data_source().top_products)
         except Exception as e:
             print(f"Error fetching top products: {e}")
         
         self.is_loading_products = False
     
+    @rx.event(background=True)
     async def fetch_account_growth(self):
         """Fetch account growth data."""
-        self.is_loading_growth = True
+        async with self:
+            self.is_loading_growth = True
+            end_date = self.end_date
+            user_id = await self._get_user_id()
         
         try:
-            # In a real app, you would fetch from an API
-            import asyncio
-            await asyncio.sleep(0.8)  # Simulate API delay
-            
-            # Generate mock data for the last 12 months
-            self.account_growth = []
-            base_date = datetime.now() - timedelta(days=365)
-            
-            for i in range(12):
-                date = base_date + timedelta(days=i*30)
-                self.account_growth.append({
-                    "month": date.strftime("%b %Y"),
-                    "accounts": 1000 + (i * 200) + (100 * (i % 3)),  # Some pattern with quarterly cycle
-                })
+            data = await self._load_chart(
+                "growth", (end_date,), user_id, analytics_jobs.account_growth, end_date, end_date=end_date
+            )
+        except JobCancelled:
+            data = None
         except Exception as e:
             print(f"Error fetching account growth: {e}")
+            data = None
         
-        self.is_loading_growth = False
+        async with self:
+            if end_date == self.end_date:
+                if data is not None:
+                    self.account_growth = data
+                self.is_loading_growth = False
+    
+    def _cancel_jobs(self, *sources: str):
+        """Cancel the in-flight queries for some charts."""
+        for source in sources:
+            analytics_executor.cancel(self._job_key(source))
     
     def update_date_range(self, start_date: str, end_date: str):
         """Update the date range and refresh data."""
         self.start_date = start_date
         self.end_date = end_date
         
-        # Refresh data with new date range
-        return self.fetch_analytics_data()
\ No newline at end of file
+        # Queries for the old range are cancelled in the workers; the
+        # date-dependent series are then answered from the rollups
+        self._cancel_jobs("revenue", "activity", "growth")
+        return [
+            AnalyticsState.fetch_revenue_data,
+            AnalyticsState.fetch_user_activity,
+            AnalyticsState.fetch_account_growth,
+        ]
+    
+    def set_period(self, period: str):
+        """Change the grouping of the revenue and activity charts."""
+        self.period = period
+        self._cancel_jobs("revenue", "activity")
+        return [AnalyticsState.fetch_revenue_data, AnalyticsState.fetch_user_activity]
\ No newline at end of file
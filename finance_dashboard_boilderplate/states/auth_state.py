@@ -1,17 +1,40 @@
 import reflex as rx
+import asyncio
+import json
+import time
 from typing import Optional, Dict, Any
 
+from ..services.auth_sessions import (
+    REFRESH_IDLE_TIMEOUT,
+    REFRESH_LEAD,
+    Session,
+    Tokens,
+    refresh_delay,
+    session_cache,
+    token_refresher,
+    token_service,
+)
+
 class AuthState(rx.State):
     """Authentication state for the application."""
     
     # User authentication state
     is_authenticated: bool = False
     user_id: Optional[str] = None
+    org_id: Optional[str] = None
     username: Optional[str] = None
     email: Optional[str] = None
     access_token: Optional[str] = None
     refresh_token: Optional[str] = None
     
+    # Tokens kept in the browser, sent with the client's state on hydration
+    auth_tokens: str = rx.LocalStorage(name="auth_tokens", sync=True)
+    
+    # When the access token expires, and when the client last loaded a page
+    _session_expires_at: float = 0.0
+    _last_active: float = 0.0
+    _refresh_scheduled: bool = False
+    
     # Login form state
     login_email: str = ""
     login_password: str = ""
@@ -44,23 +67,13 @@ class AuthState(rx.State):
             import asyncio
             yield asyncio.sleep(1)
             
-            # For demo purposes, accept any non-empty credentials
-            self.is_authenticated = True
-            self.username = self.login_email.split("@")[0]
-            self.email = self.login_email
-            self.user_id = "user123"
-            self.access_token = "demo_access_token"
-            self.refresh_token = "demo_refresh_token"
-            
-            # Save auth tokens to localStorage
-            token_data = {
-                "access_token": self.access_token,
-                "refresh_token": self.refresh_token,
-                "user_id": self.user_id,
-                "username": self.username,
-                "email": self.email,
-            }
-            rx.set_local_storage("auth_tokens", token_data)
+            # For demo purposes, accept any non-empty credentials, all in one organization
+            tokens = token_service.issue(
+                "user123", self.login_email.split("@")[0], self.login_email, org_id="demo"
+            )
+            # The first page load after login finds the session cached
+            session_cache.add(tokens[0], tokens[2])
+            self._apply_tokens(tokens)
             
             # Redirect to dashboard
             return rx.redirect("/")
@@ -112,35 +125,140 @@ class AuthState(rx.State):
         
         self.reset_processing = False
     
-    def logout(self):
-        """Handle user logout."""
-        # Clear authentication state
+    def _restore_session(self, access_token: str, refresh_token: Optional[str], session: Session):
+        """Sign the client in with a validated session."""
+        self.is_authenticated = True
+        self.user_id = session.user_id
+        self.org_id = session.org_id
+        self.username = session.username
+        self.email = session.email
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self._session_expires_at = session.expires_at
+    
+    def _apply_tokens(self, tokens: Tokens):
+        """Sign the client in with new tokens and save them to localStorage."""
+        self._restore_session(*tokens)
+        token_data = {
+            "access_token": self.access_token,
+            "refresh_token": self.refresh_token,
+            "user_id": self.user_id,
+            "username": self.username,
+            "email": self.email,
+        }
+        self.auth_tokens = json.dumps(token_data)
+    
+    def _clear_session(self):
+        """Sign the client out and forget its saved tokens."""
         self.is_authenticated = False
         self.user_id = None
+        self.org_id = None
         self.username = None
         self.email = None
         self.access_token = None
         self.refresh_token = None
+        self.auth_tokens = ""
+    
+    def logout(self):
+        """Handle user logout."""
+        if self.access_token:
+            session_cache.revoke(self.access_token)
+        if self.refresh_token:
+            token_service.revoke_refresh(self.refresh_token)
         
-        # Clear localStorage
-        rx.clear_local_storage("auth_tokens")
+        # Clear authentication state and localStorage
+        self._clear_session()
         
         # Redirect to login page
         return rx.redirect("/login")
     
     async def check_auth_on_load(self):
-        """Check authentication status when the app loads."""
-        # Try to get auth tokens from localStorage
-        tokens = await rx.get_local_storage("auth_tokens")
+        """Check authentication status when a page loads.
         
-        if tokens:
-            # Restore authentication state
-            self.is_authenticated = True
-            self.user_id = tokens.get("user_id")
-            self.username = tokens.get("username")
-            self.email = tokens.get("email")
-            self.access_token = tokens.get("access_token")
-            self.refresh_token = tokens.get("refresh_token")
+        The saved tokens arrive with the client's state, so no localStorage
+        round trip is needed. Tokens are validated through the session
+        cache, which only asks the backend about tokens it hasn't seen, so
+        navigating between pages of a signed-in session is a dict lookup
+        and the page's data loads start right after it.
+        
+        An expired access token is refreshed here, which only happens to
+        sessions idle long enough for their background refresh to stop.
+        """
+        self._last_active = time.time()
+        if self.is_authenticated and self.access_token:
+            cached, session = session_cache.lookup(self.access_token)
+            if cached and session is not None:
+                return self._schedule_refresh()
+        
+        try:
+            tokens = json.loads(self.auth_tokens) if self.auth_tokens else {}
+        except ValueError:
+            tokens = {}
+        access_token = tokens.get("access_token") or self.access_token
+        refresh_token = tokens.get("refresh_token") or self.refresh_token
+        session = await session_cache.validate(access_token) if access_token else None
+        
+        if session is not None:
+            self._restore_session(access_token, refresh_token, session)
+        elif refresh_token and (refreshed := await token_refresher.refresh(refresh_token)):
+            self._apply_tokens(refreshed)
+        else:
+            # Expired, revoked or unknown; require_login sends the user to /login
+            if self.is_authenticated or self.auth_tokens:
+                self._clear_session()
+            return
+        return self._schedule_refresh()
+    
+    def _schedule_refresh(self):
+        """Start the background token refresh if it isn't running."""
+        if not self._refresh_scheduled and self.refresh_token:
+            self._refresh_scheduled = True
+            return AuthState.keep_session_fresh
+    
+    @rx.event(background=True)
+    async def keep_session_fresh(self):
+        """Refresh the access token shortly before it expires.
+        
+        Each wait is jittered so sessions don't refresh in lockstep, and a
+        refresh already running for the same refresh token, from a page load
+        or another tab, is joined rather than repeated. Runs until the client
+        signs out or stops loading pages for ``REFRESH_IDLE_TIMEOUT`` seconds.
+        """
+        while True:
+            async with self:
+                idle = time.time() - self._last_active > REFRESH_IDLE_TIMEOUT
+                if not self.is_authenticated or not self.refresh_token or idle:
+                    self._refresh_scheduled = False
+                    return
+                refresh_token = self.refresh_token
+                delay = refresh_delay(self._session_expires_at)
+            
+            await asyncio.sleep(delay)
+            async with self:
+                # Skip if signed out or already refreshed while sleeping
+                if not self.is_authenticated or self.refresh_token != refresh_token:
+                    continue
+            
+            try:
+                tokens = await token_refresher.refresh(refresh_token)
+            except Exception as e:
+                print(f"Error refreshing session: {e}")
+                # Try again shortly; a page load would refresh too
+                await asyncio.sleep(REFRESH_LEAD / 2)
+                continue
             
-            # In a real app, you would validate the token with your backend
-            # If invalid, you would clear the state and redirect to login
\ No newline at end of file
+            async with self:
+                if self.refresh_token != refresh_token:
+                    continue
+                if tokens is None:
+                    self._clear_session()
+                    self._refresh_scheduled = False
+                    break
+                self._apply_tokens(tokens)
+        
+        yield rx.redirect("/login")
+    
+    def require_login(self):
+        """Redirect to the login page if the user is not signed in."""
+        if not self.is_authenticated:
+            return rx.redirect("/login")
\ No newline at end of file
@@ -1,45 +1,361 @@
 import reflex as rx
-from typing import List, Dict, Any
+import asyncio
+import functools
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from ..services.budget import budget_engine_for
+from ..services.cache import data_cache
+from ..services.currency import BASE_CURRENCY, CURRENCY_SYMBOLS, RateTable, conversions_for, convert_records
+from ..services.data_sources import get_data_source
+from ..services.goals import goal_projector
+from ..services.ledger import Ledger
+from ..services.live_updates import apply_balances, is_client_connected, live_topic, new_transactions
+from ..services.loader import load_sections
+from ..services.pubsub import broker
+from .auth_state import AuthState
+
+# Overall deadline for loading every dashboard section, in seconds.
+DASHBOARD_LOAD_TIMEOUT = 5.0
+
+# Annual return assumed for goal projections until the user picks another.
+DEFAULT_EXPECTED_RETURN = 0.05
+
+# Seconds between checks that a live dashboard's browser is still connected.
+LIVE_HEARTBEAT = 30.0
+
 
 class DashboardState(rx.State):
     """State for the dashboard page."""
     
-    # Dashboard data
-    accounts: List[Dict[str, Any]] = []
-    transactions: List[Dict[str, Any]] = []
-    budget_categories: List[Dict[str, Any]] = []
-    savings_goals: List[Dict[str, Any]] = []
+    # Accounts as loaded, in their own currencies
+    _accounts: List[Dict[str, Any]] = []
+    
+    # Currency amounts are shown in; the data is kept in the base currency
+    # and converted with the exchange rates
+    currency: str = BASE_CURRENCY
+    _rates: Optional[RateTable] = None
     
     # Loading states
     is_loading_accounts: bool = False
     is_loading_transactions: bool = False
     is_loading_budget: bool = False
     is_loading_goals: bool = False
+    is_loading_rates: bool = False
+    
+    # Sections that missed the load deadline
+    timed_out_sections: List[str] = []
+    
+    # Transactions are kept in a columnar ledger on the backend; only the
+    # visible window is turned into dicts for the client.
+    _ledger: Ledger = Ledger()
+    # Whether the ledger is this session's own copy, which pushed
+    # transactions can be appended to in place
+    _owns_ledger: bool = False
+    transactions_offset: int = 0
+    transactions_limit: int = 5
+    
+    # Budget limits; spending is summed from the ledger by the budget engine
+    _budgets: List[Dict[str, Any]] = []
+    
+    # Month shown by the budget widget as YYYY-MM; empty means the latest
+    # month with spending
+    budget_period: str = ""
+    
+    # Savings goals and the user they belong to, which keys their projections
+    _goals: List[Dict[str, Any]] = []
+    _goals_user_id: Optional[str] = None
+    
+    # What-if scenario for one goal, answered from its cached projection
+    what_if_goal_id: int = 0
+    what_if_contribution: float = 0.0
+    what_if_return: float = DEFAULT_EXPECTED_RETURN
+    
+    # Whether pushed transactions and balances are being applied
+    is_live: bool = False
+    _watching: bool = False
+    
+    def _converts(self) -> bool:
+        """Whether amounts need converting to the display currency."""
+        return self.currency != BASE_CURRENCY and self._rates is not None and self.currency in self._rates
+    
+    def _display_rate(self) -> float:
+        """Units of the display currency per unit of the base currency, at the latest rate."""
+        return self._rates.rate(self.currency) if self._converts() else 1.0
+    
+    @rx.var(cache=True)
+    def currency_symbol(self) -> str:
+        """The symbol of the display currency."""
+        return CURRENCY_SYMBOLS.get(self.currency, "") if self._converts() else CURRENCY_SYMBOLS[BASE_CURRENCY]
+    
+    @rx.var(cache=True)
+    def accounts(self) -> List[Dict[str, Any]]:
+        """The accounts, with balances at today's rates."""
+        if not self._converts():
+            return self._accounts
+        return convert_records(self._accounts, ("balance",), self._rates, self.currency)
+    
+    @rx.var(cache=True)
+    def transactions(self) -> List[Dict[str, Any]]:
+        """The visible window of transactions, most recent first, each at its own day's rate."""
+        window = (
+            self._ledger.view()
+            .sort("date", descending=True)
+            .slice(self.transactions_offset, self.transactions_offset + self.transactions_limit)
+        )
+        transactions = window.to_dicts()
+        if self._converts():
+            # The whole column is converted once per currency, then indexed
+            amounts = conversions_for(self._ledger).amounts(self._ledger, self._rates, self.currency)
+            for transaction, amount in zip(transactions, amounts[window.rows].round(2).tolist()):
+                transaction["amount"] = amount
+        return transactions
+    
+    @rx.var(cache=True)
+    def budget_categories(self) -> List[Dict[str, Any]]:
+        """The budgets with the amount spent in the selected month."""
+        # Totals are kept per ledger and currency, and only catch up on appended rows
+        if self._converts():
+            engine = budget_engine_for(self._ledger, rates=self._rates, currency=self.currency)
+            budgets = convert_records(self._budgets, ("budget",), self._rates, self.currency)
+        else:
+            engine = budget_engine_for(self._ledger)
+            budgets = self._budgets
+        period = self.budget_period or engine.latest_period() or datetime.now().strftime("%Y-%m")
+        return engine.report(budgets, period)
+    
+    def _projection(self, goal: Dict[str, Any]):
+        """Get a goal's projection, simulating it only if the goal changed."""
+        return goal_projector.project(
+            (self._goals_user_id, goal["id"]),
+            goal["target"],
+            goal["current"],
+            goal.get("monthly_contribution", 0),
+            goal.get("deadline"),
+        )
     
-    def fetch_dashboard_data(self):
-        """Fetch all dashboard data on page load."""
-        return [
-            self.fetch_accounts(),
-            self.fetch_transactions(),
-            self.fetch_budget_categories(),
-            self.fetch_savings_goals(),
-        ]
+    @rx.var(cache=True)
+    def savings_goals(self) -> List[Dict[str, Any]]:
+        """The savings goals with their projected completion at the planned contribution."""
+        goals = []
+        for goal in self._goals:
+            outcome = self._projection(goal).scenario(
+                goal.get("monthly_contribution", 0), DEFAULT_EXPECTED_RETURN
+            )
+            goals.append({
+                **goal,
+                "projected_date": outcome["completion_date"],
+                "required_contribution": outcome["required_contribution"],
+                "on_track": outcome["success_probability"] is None or outcome["success_probability"] >= 0.5,
+            })
+        if not self._converts():
+            return goals
+        return convert_records(
+            goals, ("target", "current", "monthly_contribution", "required_contribution"), self._rates, self.currency
+        )
+    
+    @rx.var(cache=True)
+    def goal_what_if(self) -> Dict[str, Any]:
+        """The projected outcome of the selected goal under the what-if inputs."""
+        goal = next((goal for goal in self._goals if goal["id"] == self.what_if_goal_id), None)
+        if goal is None:
+            return {}
+        # Projections are in the base currency; the slider is in the display currency
+        rate = self._display_rate()
+        projection = self._projection(goal)
+        outcome = projection.scenario(self.what_if_contribution / rate, self.what_if_return)
+        return {
+            **outcome,
+            "contribution": round(outcome["contribution"] * rate, 2),
+            "required_contribution": (
+                round(outcome["required_contribution"] * rate, 2)
+                if outcome["required_contribution"] is not None else None
+            ),
+            "max_contribution": round(float(projection.contributions[-1]) * rate, 2),
+        }
+    
+    def select_what_if_goal(self, goal_id: int):
+        """Start a what-if scenario from a goal's planned contribution."""
+        self.what_if_goal_id = goal_id
+        goal = next((goal for goal in self._goals if goal["id"] == goal_id), None)
+        if goal is not None:
+            self.what_if_contribution = round(goal.get("monthly_contribution", 0) * self._display_rate(), 2)
+            self.what_if_return = DEFAULT_EXPECTED_RETURN
+    
+    def set_currency(self, code: str):
+        """Show amounts in another currency."""
+        if code not in CURRENCY_SYMBOLS:
+            return
+        old_rate = self._display_rate()
+        self.currency = code
+        # Keep the what-if contribution worth the same
+        self.what_if_contribution = round(self.what_if_contribution * self._display_rate() / old_rate, 2)
+    
+    def set_what_if_contribution(self, value: List[float]):
+        """Set the what-if monthly contribution from a slider."""
+        self.what_if_contribution = value[0]
+    
+    def set_what_if_return(self, value: List[float]):
+        """Set the what-if annual return, in percent, from a slider."""
+        self.what_if_return = value[0] / 100
+    
+    async def _get_user_id(self) -> Optional[str]:
+        """Get the id of the signed-in user, used to key cached data."""
+        auth = await self.get_state(AuthState)
+        return auth.user_id
+    
+    def _set_ledger(self, ledger: Ledger, owned: bool = False):
+        """Show a ledger.
+        
+        Pushed transactions are appended in place to an ``owned`` ledger,
+        such as one being imported into; any other ledger may be shared
+        with other sessions and is copied before the first append.
+        """
+        self._ledger = ledger
+        self._owns_ledger = owned
+    
+    def _apply_delta(self, delta: Dict[str, Any]):
+        """Apply pushed transactions and balances."""
+        records = new_transactions(self._ledger, delta["transactions"])
+        if records:
+            if not self._owns_ledger:
+                # The loaded ledger may be shared through the data cache, so
+                # copy it once; later deltas are appended to the copy
+                self._ledger = self._ledger.copy()
+                self._owns_ledger = True
+            # Engines keyed by the ledger only catch up on the appended rows
+            self._ledger.extend_records(records)
+            self._ledger = self._ledger
+        if delta["balances"]:
+            self._accounts = apply_balances(self._accounts, delta["balances"])
+    
+    def _is_connected(self) -> bool:
+        """Whether this session's browser is still connected to this worker."""
+        return is_client_connected(self.router.session.client_token)
+    
+    def _apply_section(self, name: str, data: Any):
+        """Store the data loaded for a dashboard section."""
+        if name == "accounts":
+            self._accounts = data
+        elif name == "transactions":
+            self._set_ledger(data)
+        elif name == "budget":
+            self._budgets = data
+        elif name == "goals":
+            self._goals = data
+        elif name == "rates":
+            self._rates = data
+        setattr(self, f"is_loading_{name}", False)
+    
+    @rx.event(background=True)
+    async def fetch_dashboard_data(self):
+        """Fetch all dashboard data on page load.
+        
+        The sections load concurrently and each one is sent to the client
+        as soon as it resolves, so fast widgets don't wait on slow ones.
+        """
+        async with self:
+            self.is_loading_accounts = True
+            self.is_loading_transactions = True
+            self.is_loading_budget = True
+            self.is_loading_goals = True
+            self.is_loading_rates = True
+            self.timed_out_sections = []
+            user_id = await self._get_user_id()
+            self._goals_user_id = user_id
+        
+        source = get_data_source()
+        loaders = {
+            "accounts": functools.partial(
+                data_cache.get, "accounts", functools.partial(source.accounts, user_id), user_id
+            ),
+            "transactions": functools.partial(
+                data_cache.get, "transactions", functools.partial(source.transactions, user_id), user_id
+            ),
+            "budget": functools.partial(
+                data_cache.get, "budget", functools.partial(source.budget_categories, user_id), user_id
+            ),
+            "goals": functools.partial(
+                data_cache.get, "goals", functools.partial(source.savings_goals, user_id), user_id
+            ),
+            "rates": functools.partial(data_cache.get, "fx_rates", source.fx_rates),
+        }
+        async for result in load_sections(loaders, timeout=DASHBOARD_LOAD_TIMEOUT):
+            async with self:
+                if result.ok:
+                    self._apply_section(result.name, result.data)
+                else:
+                    if result.timed_out:
+                        self.timed_out_sections.append(result.name)
+                    else:
+                        print(f"Error fetching {result.name}: {result.error}")
+                    setattr(self, f"is_loading_{result.name}", False)
+    
+    @rx.event(background=True)
+    async def watch_live_updates(self):
+        """Apply transactions and balance changes pushed to this user while the dashboard is open.
+        
+        Each update is a small delta applied to the loaded data, so open
+        dashboards neither poll nor reload. The watch ends when the browser
+        disconnects.
+        """
+        async with self:
+            user_id = await self._get_user_id()
+            if self._watching or user_id is None:
+                return
+            self._watching = True
+            self.is_live = True
+        
+        subscription = broker.subscribe(live_topic(user_id))
+        try:
+            while True:
+                message = await subscription.get(timeout=LIVE_HEARTBEAT)
+                if message is None:
+                    if not self._is_connected():
+                        break
+                    continue
+                
+                if message["type"] != "resync":
+                    async with self:
+                        try:
+                            self._apply_delta(message)
+                            continue
+                        except (KeyError, TypeError, ValueError) as e:
+                            # Reload rather than stop following the user's updates
+                            print(f"Error applying live update: {e}")
+                
+                # Too much changed to send, this session fell behind, or a
+                # delta couldn't be applied
+                source = get_data_source()
+                try:
+                    accounts, ledger = await asyncio.gather(
+                        data_cache.get("accounts", functools.partial(source.accounts, user_id), user_id),
+                        data_cache.get("transactions", functools.partial(source.transactions, user_id), user_id),
+                    )
+                except Exception as e:
+                    # Keep what's shown; the next update tries again
+                    print(f"Error reloading live data: {e}")
+                    continue
+                async with self:
+                    self._accounts = accounts
+                    self._set_ledger(ledger)
+        except Exception as e:
+            print(f"Error applying live updates: {e}")
+        finally:
+            subscription.close()
+            async with self:
+                self._watching = False
+                self.is_live = False
     
     async def fetch_accounts(self):
         """Fetch user accounts."""
         self.is_loading_accounts = True
         
         try:
-            # In a real app, you would fetch from an API
-            # For demo purposes, we'll use mock data
-            import asyncio
-            await asyncio.sleep(0.5)  # Simulate API delay
-            
-            self.accounts = [
-                {"id": 1, "name": "Checking", "balance": 2543.21, "type": "checking"},
-                {"id": 2, "name": "Savings", "balance": 12750.83, "type": "savings"},
-                {"id": 3, "name": "Investment", "balance": 34892.45, "type": "investment"},
-            ]
+            user_id = await self._get_user_id()
+            self._accounts = await data_cache.get(
+                "accounts", functools.partial(get_data_source().accounts, user_id), user_id
+            )
         except Exception as e:
             print(f"Error fetching accounts: {e}")
         
@@ -50,17 +366,10 @@ class DashboardState(rx.State):
         self.is_loading_transactions = True
         
         try:
-            # In a real app, you would fetch from an API
-            import asyncio
-            await asyncio.sleep(0.7)  # Simulate API delay
-            
-            self.transactions = [
-                {"id": 1, "description": "Grocery Store", "amount": -82.45, "date": "2025-03-05", "category": "Food"},
-                {"id": 2, "description": "Salary Deposit", "amount": 3200.00, "date": "2025-03-01", "category": "Income"},
-                {"id": 3, "description": "Electric Bill", "amount": -145.30, "date": "2025-02-28", "category": "Utilities"},
-                {"id": 4, "description": "Restaurant", "amount": -64.20, "date": "2025-02-25", "category": "Dining"},
-                {"id": 5, "description": "Gas Station", "amount": -48.75, "date": "2025-02-23", "category": "Transportation"},
-            ]
+            user_id = await self._get_user_id()
+            self._set_ledger(await data_cache.get(
+                "transactions", functools.partial(get_data_source().transactions, user_id), user_id
+            ))
         except Exception as e:
             print(f"Error fetching transactions: {e}")
         
@@ -71,17 +380,10 @@ class DashboardState(rx.State):
         self.is_loading_budget = True
         
         try:
-            # In a real app, you would fetch from an API
-            import asyncio
-            await asyncio.sleep(0.6)  # Simulate API delay
-            
-            self.budget_categories = [
-                {"id": 1, "name": "Housing", "budget": 1200, "spent": 1150, "color": "blue"},
-                {"id": 2, "name": "Food", "budget": 500, "spent": 420, "color": "green"},
-                {"id": 3, "name": "Transportation", "budget": 300, "spent": 275, "color": "purple"},
-                {"id": 4, "name": "Entertainment", "budget": 200, "spent": 180, "color": "orange"},
-                {"id": 5, "name": "Utilities", "budget": 250, "spent": 230, "color": "red"},
-            ]
+            user_id = await self._get_user_id()
+            self._budgets = await data_cache.get(
+                "budget", functools.partial(get_data_source().budget_categories, user_id), user_id
+            )
         except Exception as e:
             print(f"Error fetching budget categories: {e}")
         
@@ -92,15 +394,10 @@ class DashboardState(rx.State):
         self.is_loading_goals = True
         
         try:
-            # In a real app, you would fetch from an API
-            import asyncio
-            await asyncio.sleep(0.8)  # Simulate API delay
-            
-            self.savings_goals = [
-                {"id": 1, "name": "Emergency Fund", "target": 10000, "current": 6500, "color": "blue"},
-                {"id": 2, "name": "Vacation", "target": 3000, "current": 1200, "color": "green"},
-                {"id": 3, "name": "New Car", "target": 20000, "current": 5000, "color": "purple"},
-            ]
+            self._goals_user_id = await self._get_user_id()
+            self._goals = await data_cache.get(
+                "goals", functools.partial(get_data_source().savings_goals, self._goals_user_id), self._goals_user_id
+            )
         except Exception as e:
             print(f"Error fetching savings goals: {e}")
         
@@ -0,0 +1,136 @@
+import reflex as rx
+import asyncio
+import os
+import uuid
+from typing import List, Optional
+
+from ..services.analytics_jobs import add_ledger_rows
+from ..services.cache import data_cache
+from ..services.importer import FORMATS, ImportProgress, detect_format, prepare_import, write_batch
+from ..services.live_updates import publish_resync
+from .dashboard_state import DashboardState
+from .transactions_state import TransactionsState
+
+# Bytes copied at a time when saving an upload to disk.
+UPLOAD_BLOCK_SIZE = 1 << 20
+
+
+class ImportState(rx.State):
+    """State for importing bank exports into the transactions ledger."""
+    
+    # Import progress
+    is_importing: bool = False
+    import_file_name: str = ""
+    import_percent: int = 0
+    rows_read: int = 0
+    rows_imported: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    # Why rows were rejected, e.g. "2 invalid date, 1 missing amount"
+    rejection_summary: str = ""
+    import_error: Optional[str] = None
+    
+    # Uploaded files waiting to be imported, as (path, original name)
+    _pending_files: List[List[str]] = []
+    
+    def _show_progress(self, progress: ImportProgress):
+        """Copy an import's progress into the frontend vars."""
+        self.import_percent = int(progress.fraction * 100)
+        self.rows_read = progress.rows_read
+        self.rows_imported = progress.rows_imported
+        self.duplicates = progress.duplicates
+        self.rejected = progress.rejected
+        self.rejection_summary = ", ".join(
+            f"{count} {reason}" for reason, count in progress.rejection_reasons.items()
+        )
+    
+    async def handle_upload(self, files: List[rx.UploadFile]):
+        """Save uploaded exports to disk and start importing them."""
+        self.import_error = None
+        upload_dir = rx.get_upload_dir() / "imports"
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        
+        for file in files:
+            try:
+                detect_format(file.filename or "")
+                extension = os.path.splitext(file.filename)[1].lower()
+            except ValueError:
+                self.import_error = f"{file.filename} is not a {', '.join(FORMATS)} file"
+                continue
+            
+            # Copy in blocks so a large export never sits in memory
+            path = upload_dir / f"{uuid.uuid4().hex}{extension}"
+            with open(path, "wb") as out:
+                while block := await file.read(UPLOAD_BLOCK_SIZE):
+                    out.write(block)
+            self._pending_files.append([str(path), file.filename])
+        
+        if self._pending_files and not self.is_importing:
+            return ImportState.run_imports
+    
+    @rx.event(background=True)
+    async def run_imports(self):
+        """Import every pending upload into the session's ledger.
+        
+        Parsing, categorizing and deduping run in a worker thread, one chunk
+        at a time; each chunk is written to the ledger and its progress sent
+        to the client before the next one is read.
+        """
+        async with self:
+            if self.is_importing:
+                return
+            self.is_importing = True
+            dashboard = await self.get_state(DashboardState)
+            if not len(dashboard._ledger):
+                await dashboard.fetch_transactions()
+            # The loaded ledger may be shared through the data cache, so
+            # import into a private copy. Transactions pushed to the
+            # dashboard while the import runs are appended to it too.
+            ledger = dashboard._ledger.copy()
+            dashboard._set_ledger(ledger, owned=True)
+            user_id = await dashboard._get_user_id()
+        
+        while True:
+            async with self:
+                if not self._pending_files:
+                    self.is_importing = False
+                    break
+                path, name = self._pending_files.pop(0)
+                self.import_file_name = name
+            
+            progress = ImportProgress()
+            batches = prepare_import(path, ledger, progress)
+            try:
+                while True:
+                    batch = await asyncio.to_thread(next, batches, None)
+                    if batch is None:
+                        break
+                    async with self:
+                        dashboard = await self.get_state(DashboardState)
+                        start = len(ledger)
+                        write_batch(ledger, batch, progress)
+                        dashboard._set_ledger(ledger, owned=True)
+                        self._show_progress(progress)
+                    add_ledger_rows(ledger.dates[start:start + len(batch)], ledger.amounts[start:start + len(batch)])
+                progress.done = True
+            except Exception as e:
+                print(f"Error importing {name}: {e}")
+                async with self:
+                    self.import_error = f"Could not import {name}: {e}"
+            finally:
+                batches.close()
+                os.remove(path)
+            
+            async with self:
+                self._show_progress(progress)
+        
+        # In a real app, you would write the rows to your database here
+        # For demo purposes, we'll keep the imported ledger in the cache
+        async with self:
+            # Once cached the ledger is shared, so later pushes copy it
+            dashboard = await self.get_state(DashboardState)
+            dashboard._set_ledger(ledger)
+            data_cache.put("transactions", ledger, user_id)
+        # The user's other open dashboards reload the imported ledger
+        publish_resync(user_id)
+        yield TransactionsState.load_transactions
\ No newline at end of file
@@ -0,0 +1,167 @@
+import reflex as rx
+import functools
+import numpy as np
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional
+
+from ..services.cache import data_cache, org_key
+from ..services.data_sources import get_data_source
+from ..services.invoices import STATUSES, InvoiceStore
+from .auth_state import AuthState
+
+class InvoicesState(rx.State):
+    """State for the invoices page.
+    
+    Filters are answered from the invoice store's indexes, and only the
+    visible page of invoices is turned into dicts for the client.
+    """
+    
+    # Visible page
+    rows: List[Dict[str, Any]] = []
+    page_size: int = 50
+    page_number: int = 1
+    total_count: int = 0
+    total_amount: float = 0.0
+    has_next_page: bool = False
+    
+    # Open invoices by days past due
+    aging: List[Dict[str, Any]] = []
+    
+    # Server-side sort
+    sort_key: str = "due_date"
+    sort_descending: bool = False
+    
+    # Server-side filters (empty string means no filter); the status filter
+    # also accepts "overdue"
+    filter_status: str = "open"
+    filter_customer: str = ""
+    filter_min_amount: str = ""
+    filter_max_amount: str = ""
+    filter_bucket: str = ""
+    customers: List[str] = []
+    statuses: List[str] = ["All", "overdue", *STATUSES]
+    
+    # Loading state
+    is_loading: bool = False
+    
+    # The invoices, and the sorted rows matching the filters
+    _store: Optional[InvoiceStore] = None
+    _result: Optional[np.ndarray] = None
+    
+    async def _get_store(self) -> InvoiceStore:
+        """Get the organization's invoices, loading them if needed."""
+        if self._store is None:
+            auth = await self.get_state(AuthState)
+            # A user outside any organization is an organization of one
+            org_id = auth.org_id or auth.user_id
+            self._store = await data_cache.get(
+                "invoices", functools.partial(get_data_source().invoices, org_id), org_key(org_id)
+            )
+            self.customers = ["All", *sorted(self._store.customers.values)]
+        return self._store
+    
+    def _amount(self, value: str) -> Optional[float]:
+        """Parse an amount filter, ignoring anything that isn't a number."""
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
+    
+    def _run_query(self):
+        """Find the invoices matching the filters and show the first page."""
+        status, due_from, due_to = self.filter_status or None, None, None
+        if status == "overdue":
+            status, due_to = "open", (date.today() - timedelta(days=1)).isoformat()
+        bucket = next((bucket for bucket in self.aging if bucket["bucket"] == self.filter_bucket), None)
+        if bucket is not None:
+            # Aging buckets only cover open invoices
+            status, due_from, due_to = "open", bucket["due_from"] or None, bucket["due_to"] or None
+        
+        self._result = self._store.query(
+            status=status,
+            customer=self.filter_customer or None,
+            min_amount=self._amount(self.filter_min_amount),
+            max_amount=self._amount(self.filter_max_amount),
+            due_from=due_from,
+            due_to=due_to,
+            sort=self.sort_key,
+            descending=self.sort_descending,
+        )
+        self.total_count = len(self._result)
+        self.total_amount = round(float(self._store.amounts[self._result].sum()), 2)
+        self.page_number = 1
+        self._show_page()
+    
+    def _show_page(self):
+        """Materialize the current page of the query result."""
+        start = (self.page_number - 1) * self.page_size
+        self.rows = self._store.to_dicts(self._result[start:start + self.page_size])
+        self.has_next_page = start + self.page_size < len(self._result)
+    
+    async def _refresh(self):
+        """Re-run the query after a filter or sort change."""
+        await self._get_store()
+        self._run_query()
+    
+    async def load_invoices(self):
+        """Load the invoices, their aging summary and the first page."""
+        self.is_loading = True
+        yield
+        
+        try:
+            self._store = None
+            store = await self._get_store()
+            self.aging = store.aging()
+            self._run_query()
+        except Exception as e:
+            print(f"Error loading invoices: {e}")
+        
+        self.is_loading = False
+    
+    def next_page(self):
+        """Show the page after the current one."""
+        if self.has_next_page:
+            self.page_number += 1
+            self._show_page()
+    
+    def previous_page(self):
+        """Show the page before the current one."""
+        if self.page_number > 1:
+            self.page_number -= 1
+            self._show_page()
+    
+    async def sort_by(self, key: str):
+        """Sort by a column, toggling the direction if it is already sorted by it."""
+        if key == self.sort_key:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_key = key
+            self.sort_descending = key == "amount"
+        await self._refresh()
+    
+    async def set_filter_status(self, value: str):
+        """Filter by status."""
+        self.filter_status = "" if value == "All" else value
+        self.filter_bucket = ""
+        await self._refresh()
+    
+    async def set_filter_customer(self, value: str):
+        """Filter by customer."""
+        self.filter_customer = "" if value == "All" else value
+        await self._refresh()
+    
+    async def set_filter_min_amount(self, value: str):
+        """Filter out invoices below an amount."""
+        self.filter_min_amount = value
+        await self._refresh()
+    
+    async def set_filter_max_amount(self, value: str):
+        """Filter out invoices above an amount."""
+        self.filter_max_amount = value
+        await self._refresh()
+    
+    async def select_bucket(self, bucket: str):
+        """Show the open invoices in an aging bucket, or all open invoices if it is already selected."""
+        self.filter_bucket = "" if bucket == self.filter_bucket else bucket
+        self.filter_status = "open"
+        await self._refresh()
\ No newline at end of file
@@ -0,0 +1,121 @@
+import reflex as rx
+from typing import List, Dict, Any, Optional
+
+from ..services.live_updates import is_client_connected
+from ..services.notifications import NOTIFICATION_PAGE_SIZE, notification_service, org_topic, user_topic
+from ..services.pubsub import broker
+from .auth_state import AuthState
+
+# Organization every demo user belongs to.
+DEMO_ORG = "demo"
+
+# Seconds between checks that the browser is still connected.
+NOTIFICATIONS_HEARTBEAT = 30.0
+
+_demo_org_seeded = False
+
+def _seed_demo_notifications(user_id: str):
+    """Give a new user the demo notifications."""
+    global _demo_org_seeded
+    notification_service.join(user_id, DEMO_ORG)
+    if not _demo_org_seeded:
+        _demo_org_seeded = True
+        notification_service.broadcast(DEMO_ORG, "New Feature: Budget Tracking", kind="feature")
+        notification_service.broadcast(
+            DEMO_ORG, "Account Alert: Unusual Activity", "A sign-in from a new device was detected.", kind="alert"
+        )
+    notification_service.notify(user_id, "Payment Due: Credit Card", "Your statement balance is due in 5 days.", kind="payment")
+    notification_service.notify(user_id, "Investment Update: +5% Growth", kind="investment")
+    notification_service.notify(user_id, "New Offer: Higher Interest Savings", kind="offer")
+
+class NotificationsState(rx.State):
+    """State for the notifications dropdown.
+    
+    The unread count comes from the service's counters and is pushed to
+    the session as notifications arrive. Items are only loaded when the
+    dropdown is opened, a page at a time.
+    """
+    
+    # Unread badge
+    unread_count: int = 0
+    
+    # Loaded items, newest first, while the dropdown is open
+    items: List[Dict[str, Any]] = []
+    has_more: bool = False
+    is_open: bool = False
+    
+    _user_id: Optional[str] = None
+    _watching: bool = False
+    
+    def _load_items(self, before: Optional[int] = None):
+        """Load a page of notifications, after the loaded ones if ``before`` is given."""
+        # Ask for one extra to know whether there is another page
+        page = notification_service.recent(self._user_id, NOTIFICATION_PAGE_SIZE + 1, before)
+        self.has_more = len(page) > NOTIFICATION_PAGE_SIZE
+        page = page[:NOTIFICATION_PAGE_SIZE]
+        self.items = self.items + page if before is not None else page
+    
+    @rx.event(background=True)
+    async def watch_notifications(self):
+        """Keep the unread count current while the page is open."""
+        async with self:
+            user_id = (await self.get_state(AuthState)).user_id
+            if self._watching or user_id is None:
+                return
+            self._watching = True
+            self._user_id = user_id
+            # For demo purposes, new users start with a few notifications
+            if not notification_service.has_inbox(user_id):
+                _seed_demo_notifications(user_id)
+            self.unread_count = notification_service.unread_count(user_id)
+        
+        # In a real app, the organization would come from the user's membership
+        subscription = broker.subscribe(user_topic(user_id), org_topic(DEMO_ORG))
+        try:
+            while True:
+                message = await subscription.get(timeout=NOTIFICATIONS_HEARTBEAT)
+                if message is None:
+                    if not is_client_connected(self.router.session.client_token):
+                        break
+                    continue
+                async with self:
+                    self.unread_count = notification_service.unread_count(user_id)
+                    if self.is_open:
+                        self._load_items()
+        except Exception as e:
+            print(f"Error watching notifications: {e}")
+        finally:
+            subscription.close()
+            async with self:
+                self._watching = False
+    
+    def set_open(self, is_open: bool):
+        """Load the newest notifications when the dropdown opens."""
+        self.is_open = is_open
+        if not is_open or self._user_id is None:
+            return
+        self._load_items()
+    
+    def load_more(self):
+        """Load the next page of older notifications."""
+        if self._user_id is not None and self.items:
+            self._load_items(before=self.items[-1]["id"])
+    
+    def mark_read(self, notification_id: int):
+        """Mark one notification read."""
+        if self._user_id is None:
+            return
+        notification_service.mark_read(self._user_id, notification_id)
+        self.unread_count = notification_service.unread_count(self._user_id)
+        self.items = [
+            {**item, "read": True} if item["id"] == notification_id else item
+            for item in self.items
+        ]
+    
+    def mark_all_read(self):
+        """Mark every notification read."""
+        if self._user_id is None:
+            return
+        notification_service.mark_all_read(self._user_id)
+        self.unread_count = 0
+        self.items = [{**item, "read": True} for item in self.items]
\ No newline at end of file
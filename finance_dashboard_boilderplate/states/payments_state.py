@@ -0,0 +1,153 @@
+import reflex as rx
+import asyncio
+import functools
+from typing import List, Dict, Any, Optional
+
+from ..services.cache import data_cache, org_key
+from ..services.data_sources import get_data_source
+from ..services.ledger import LedgerView
+from ..services.reconciliation import MATCH_METHODS, ReconciliationResult, reconcile
+from .auth_state import AuthState
+from .dashboard_state import DashboardState
+
+class PaymentsState(rx.State):
+    """State for the payments page.
+    
+    Payments are reconciled against the organization's open invoices and
+    the bank transactions on the dashboard. Only the first rows of each
+    list are turned into dicts for the client.
+    """
+    
+    # Counts and totals from the last reconciliation
+    summary: Dict[str, Any] = {}
+    
+    # Which list is shown, and its first rows
+    views: List[str] = ["matched", "unmatched payments", "unpaid invoices", "unmatched deposits"]
+    view: str = "unmatched payments"
+    rows: List[Dict[str, Any]] = []
+    row_limit: int = 50
+    
+    # Loading state
+    is_loading: bool = False
+    applied_count: int = 0
+    
+    # The last reconciliation, and the organization it was run for
+    _result: Optional[ReconciliationResult] = None
+    _org_id: Optional[str] = None
+    
+    def _show_view(self):
+        """Materialize the first rows of the selected list.
+        
+        Every list is shown in the same table, so rows are normalized to
+        ``date``, ``party``, ``reference``, ``amount`` and ``note`` keys.
+        """
+        result = self._result
+        if result is None:
+            self.rows = []
+            return
+        
+        limit = self.row_limit
+        if self.view == "matched":
+            payments = result.payments.to_dicts(result.payment_rows[:limit])
+            invoice_ids = result.invoices.ids[result.invoice_rows[:limit]].tolist()
+            methods = result.methods[:limit].tolist()
+            self.rows = [
+                {
+                    "date": payment["date"],
+                    "party": payment["payer"],
+                    "reference": payment["reference"],
+                    "amount": payment["amount"],
+                    "note": f"INV-{invoice_id} by {MATCH_METHODS[method]}",
+                }
+                for payment, invoice_id, method in zip(payments, invoice_ids, methods)
+            ]
+        elif self.view == "unmatched payments":
+            self.rows = [
+                {
+                    "date": payment["date"],
+                    "party": payment["payer"],
+                    "reference": payment["reference"],
+                    "amount": payment["amount"],
+                    "note": "",
+                }
+                for payment in result.payments.to_dicts(result.unmatched_payments()[:limit])
+            ]
+        elif self.view == "unpaid invoices":
+            self.rows = [
+                {
+                    "date": invoice["due_date"],
+                    "party": invoice["customer"],
+                    "reference": f"INV-{invoice['id']}",
+                    "amount": invoice["amount"],
+                    "note": f"{invoice['days_overdue']} days overdue" if invoice["days_overdue"] else "",
+                }
+                for invoice in result.invoices.to_dicts(result.unpaid_invoices()[:limit])
+            ]
+        elif self.view == "unmatched deposits" and result.ledger:
+            self.rows = [
+                {
+                    "date": deposit["date"],
+                    "party": deposit["description"],
+                    "reference": "",
+                    "amount": deposit["amount"],
+                    "note": deposit["category"],
+                }
+                for deposit in LedgerView(result.ledger, result.unmatched_deposits()[:limit]).to_dicts()
+            ]
+        else:
+            self.rows = []
+    
+    async def load_payments(self):
+        """Load payments, invoices and bank transactions, and reconcile them."""
+        self.is_loading = True
+        self.applied_count = 0
+        yield
+        
+        try:
+            auth = await self.get_state(AuthState)
+            # A user outside any organization is an organization of one
+            user_id, org_id = auth.user_id, auth.org_id or auth.user_id
+            self._org_id = org_id
+            source = get_data_source()
+            # Invoices and payments belong to the organization, so every member shares one load
+            payments, invoices = await asyncio.gather(
+                data_cache.get("payments", functools.partial(source.payments, org_id), org_key(org_id)),
+                data_cache.get("invoices", functools.partial(source.invoices, org_id), org_key(org_id)),
+            )
+            # Use the transactions the dashboard already loaded, if it has
+            ledger = (await self.get_state(DashboardState))._ledger
+            if not len(ledger):
+                ledger = await data_cache.get(
+                    "transactions", functools.partial(source.transactions, user_id), user_id
+                )
+            
+            self._result = await asyncio.to_thread(reconcile, payments, invoices, ledger)
+            self.summary = self._result.summary()
+            self._show_view()
+        except Exception as e:
+            print(f"Error reconciling payments: {e}")
+        
+        self.is_loading = False
+    
+    def set_view(self, view: str):
+        """Show another list."""
+        self.view = view
+        self._show_view()
+    
+    def mark_invoices_paid(self):
+        """Mark the invoices payments were matched to as paid.
+        
+        The cached invoices and payments are shared by every session, so
+        the changes are made on copies that then replace them in the cache.
+        Applied payments are not matched again.
+        """
+        result = self._result
+        if result is None or not len(result.invoice_rows):
+            return
+        
+        # In a real app, this would post the payments to the billing API
+        invoices = result.invoices.copy()
+        self.applied_count = invoices.set_status(result.paid_invoice_ids(), "paid")
+        data_cache.put("invoices", invoices, org_key(self._org_id))
+        data_cache.put("payments", result.applied(), org_key(self._org_id))
+        return PaymentsState.load_payments
\ No newline at end of file
@@ -0,0 +1,144 @@
+import reflex as rx
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..services.ledger import Ledger, LedgerView
+from .dashboard_state import DashboardState
+
+class TransactionsState(rx.State):
+    """State for the transactions page.
+    
+    Only one page of rows is held in frontend state. Pages are addressed
+    with keyset cursors on (sort column, id), so moving through the history
+    never re-sends or re-scans earlier pages.
+    """
+    
+    # Visible page
+    rows: List[Dict[str, Any]] = []
+    page_size: int = 50
+    page_number: int = 1
+    total_count: int = 0
+    has_next_page: bool = False
+    
+    # Server-side sort
+    sort_key: str = "date"
+    sort_descending: bool = True
+    
+    # Server-side filters (empty string means no filter)
+    filter_category: str = ""
+    filter_search: str = ""
+    filter_start_date: str = ""
+    filter_end_date: str = ""
+    categories: List[str] = []
+    
+    # Loading state
+    is_loading: bool = False
+    
+    # Filtered and sorted view, rebuilt when the filters, sort or ledger change
+    _view: Optional[LedgerView] = None
+    _view_size: int = 0
+    
+    # Cursor that starts each visited page; None starts the first page
+    _page_cursors: List[Optional[Tuple[Any, int]]] = []
+    
+    async def _get_ledger(self) -> Ledger:
+        """Get the session's ledger, loading it if needed."""
+        dashboard = await self.get_state(DashboardState)
+        if not len(dashboard._ledger):
+            await dashboard.fetch_transactions()
+        return dashboard._ledger
+    
+    async def _get_view(self) -> LedgerView:
+        """Get the filtered and sorted view, rebuilding it if stale."""
+        ledger = await self._get_ledger()
+        if self._view is None or self._view.ledger is not ledger or self._view_size != len(ledger):
+            self._view = (
+                ledger.view()
+                .filter(
+                    category=self.filter_category or None,
+                    start_date=self.filter_start_date or None,
+                    end_date=self.filter_end_date or None,
+                    search=self.filter_search or None,
+                )
+                .sort(self.sort_key, descending=self.sort_descending)
+            )
+            self._view_size = len(ledger)
+            self.categories = ["All", *sorted(ledger.categories.values)]
+            self.total_count = len(self._view)
+        return self._view
+    
+    async def _load_page(self, cursor: Optional[Tuple[Any, int]]):
+        """Load the page that starts after a cursor."""
+        view = await self._get_view()
+        if cursor is not None:
+            view = view.after(self.sort_key, cursor[0], cursor[1], descending=self.sort_descending)
+        
+        # Fetch one extra row to know whether another page follows
+        page = view.slice(0, self.page_size + 1).to_dicts()
+        self.has_next_page = len(page) > self.page_size
+        self.rows = page[:self.page_size]
+    
+    async def _reset(self):
+        """Drop the cached view and go back to the first page."""
+        self._view = None
+        self._page_cursors = [None]
+        self.page_number = 1
+        await self._load_page(None)
+    
+    async def load_transactions(self):
+        """Load the first page of transactions."""
+        self.is_loading = True
+        yield
+        
+        try:
+            await self._reset()
+        except Exception as e:
+            print(f"Error loading transactions: {e}")
+        
+        self.is_loading = False
+    
+    async def next_page(self):
+        """Load the page after the current one."""
+        if not self.has_next_page or not self.rows:
+            return
+        last = self.rows[-1]
+        cursor = (last[self.sort_key], last["id"])
+        self._page_cursors.append(cursor)
+        self.page_number += 1
+        await self._load_page(cursor)
+    
+    async def previous_page(self):
+        """Load the page before the current one."""
+        if self.page_number <= 1:
+            return
+        self._page_cursors.pop()
+        self.page_number -= 1
+        await self._load_page(self._page_cursors[-1])
+    
+    async def sort_by(self, key: str):
+        """Sort by a column, toggling the direction if it is already sorted by it."""
+        if key == self.sort_key:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_key = key
+            self.sort_descending = key in ("date", "amount")
+        await self._reset()
+    
+    async def set_filter_category(self, value: str):
+        """Filter by category."""
+        self.filter_category = "" if value == "All" else value
+        await self._reset()
+    
+    async def set_filter_search(self, value: str):
+        """Filter by description text."""
+        self.filter_search = value
+        await self._reset()
+    
+    async def set_filter_start_date(self, value: str):
+        """Filter out transactions before a date."""
+        self.filter_start_date = value
+        await self._reset()
+    
+    async def set_filter_end_date(self, value: str):
+        """Filter out transactions after a date."""
+        self.filter_end_date = value
+        await self._reset()
\ No newline at end of file
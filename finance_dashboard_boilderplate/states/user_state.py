@@ -1,33 +1,146 @@
 import reflex as rx
-from typing import Dict, Optional
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, Type
 
-class NotificationSettings:
+from ..services.currency import CURRENCY_SYMBOLS, currency_code, currency_label
+from ..services.settings_store import SettingsChanges, settings_store
+from .auth_state import AuthState
+from .dashboard_state import DashboardState
+
+class Flags:
+    """Named boolean settings packed into the bits of one integer.
+    
+    State vars hold the integer, so a change is a single reassignment that
+    Reflex always sees, and the delta sent to the client is one small number.
+    Subclasses list their fields in ``FIELDS`` and the ones that are on by
+    default in ``DEFAULTS``; each field is readable and writable as an
+    attribute.
+    """
+    
+    __slots__ = ("bits",)
+    
+    FIELDS: Tuple[str, ...] = ()
+    DEFAULTS: Tuple[str, ...] = ()
+    _masks: Dict[str, int] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._masks = {field: 1 << i for i, field in enumerate(cls.FIELDS)}
+        for field, mask in cls._masks.items():
+            setattr(cls, field, property(
+                lambda self, mask=mask: bool(self.bits & mask),
+                lambda self, value, mask=mask: self._set_mask(mask, value),
+            ))
+    
+    def __init__(self, bits: Optional[int] = None, **values: bool):
+        """Initialize the settings.
+        
+        Args:
+            bits: The packed settings; defaults to ``DEFAULTS``.
+            **values: Fields to override.
+        """
+        self.bits = self.default_bits() if bits is None else bits
+        for field, value in values.items():
+            self[field] = value
+    
+    @classmethod
+    def default_bits(cls) -> int:
+        """Get the packed default settings.
+        
+        Returns:
+            The bits of the fields that are on by default.
+        """
+        return sum(cls._masks[field] for field in cls.DEFAULTS)
+    
+    @classmethod
+    def mask(cls, field: str) -> int:
+        """Get the bit of a field.
+        
+        Args:
+            field: The field name.
+        
+        Returns:
+            The field's bit.
+        """
+        return cls._masks[field]
+    
+    @classmethod
+    def var(cls, bits: rx.Var, field: str) -> rx.Var:
+        """Read a field from a packed state var on the client.
+        
+        Args:
+            bits: The state var holding the packed settings.
+            field: The field name.
+        
+        Returns:
+            A boolean var.
+        """
+        return (bits.to(int) // cls._masks[field]) % 2 == 1
+    
+    def _set_mask(self, mask: int, value: bool):
+        self.bits = self.bits | mask if value else self.bits & ~mask
+    
+    def __getitem__(self, field: str) -> bool:
+        return bool(self.bits & self._masks[field])
+    
+    def __setitem__(self, field: str, value: bool):
+        self._set_mask(self._masks[field], value)
+    
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and other.bits == self.bits
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()})"
+    
+    def as_dict(self) -> Dict[str, bool]:
+        """Get the settings as a dict.
+        
+        Returns:
+            Every field's value keyed by name.
+        """
+        return {field: bool(self.bits & mask) for field, mask in self._masks.items()}
+    
+    def changed_fields(self, bits: int) -> List[str]:
+        """Get the fields that differ from another packed value.
+        
+        Args:
+            bits: The packed settings to compare with, such as the last saved ones.
+        
+        Returns:
+            The names of the fields that differ.
+        """
+        changed = self.bits ^ bits
+        return [field for field, mask in self._masks.items() if changed & mask]
+
+class NotificationSettings(Flags):
     """Notification settings for a user."""
     
-    def __init__(
-        self,
-        account_activity: bool = True,
-        new_features: bool = True,
-        marketing: bool = False,
-    ):
-        self.account_activity = account_activity
-        self.new_features = new_features
-        self.marketing = marketing
+    __slots__ = ()
+    
+    FIELDS = ("account_activity", "new_features", "marketing")
+    DEFAULTS = ("account_activity", "new_features")
 
-class PrivacySettings:
+class PrivacySettings(Flags):
     """Privacy settings for a user."""
     
-    def __init__(
-        self,
-        share_usage_data: bool = True,
-        allow_recommendations: bool = True,
-        profile_visible: bool = True,
-        show_activity: bool = True,
-    ):
-        self.share_usage_data = share_usage_data
-        self.allow_recommendations = allow_recommendations
-        self.profile_visible = profile_visible
-        self.show_activity = show_activity
+    __slots__ = ()
+    
+    FIELDS = ("share_usage_data", "allow_recommendations", "profile_visible", "show_activity")
+    DEFAULTS = FIELDS
+
+# The packed settings vars of UserState and the type of each.
+SETTINGS_TYPES: Dict[str, Type[Flags]] = {
+    "email_notifications": NotificationSettings,
+    "push_notifications": NotificationSettings,
+    "privacy": PrivacySettings,
+}
+
+def _default_settings() -> Dict[str, int]:
+    """Get the packed default of every settings var."""
+    return {name: settings_type.default_bits() for name, settings_type in SETTINGS_TYPES.items()}
+
+# Seconds without further changes before settings are written to storage.
+SETTINGS_WRITE_DEBOUNCE = 1.0
 
 class UserState(rx.State):
     """User state for the application."""
@@ -41,18 +154,175 @@ class UserState(rx.State):
     # User preferences
     language: str = "English"
     currency: str = "USD ($)"
+    currencies: List[str] = [currency_label(code) for code in CURRENCY_SYMBOLS]
     two_factor_enabled: bool = False
     
-    # Notification settings
-    email_notifications: NotificationSettings = NotificationSettings()
-    push_notifications: NotificationSettings = NotificationSettings()
+    # Notification settings, packed by NotificationSettings
+    email_notifications: int = NotificationSettings.default_bits()
+    push_notifications: int = NotificationSettings.default_bits()
+    
+    # Privacy settings, packed by PrivacySettings
+    privacy: int = PrivacySettings.default_bits()
+    
+    # Packed settings as last saved, to tell which fields changed since
+    _saved_settings: Dict[str, int] = _default_settings()
+    
+    # Set when a batch of settings changes is rejected or can't be saved
+    settings_error: Optional[str] = None
     
-    # Privacy settings
-    privacy: PrivacySettings = PrivacySettings()
+    # Bumped on every settings change, so the writer can wait for a quiet spell
+    _settings_version: int = 0
+    _settings_write_scheduled: bool = False
     
     # UI state
     is_delete_account_modal_open: bool = False
     
+    def get_settings(self, name: str) -> Flags:
+        """Unpack a settings var.
+        
+        Args:
+            name: One of ``SETTINGS_TYPES``.
+        
+        Returns:
+            The settings.
+        """
+        return SETTINGS_TYPES[name](getattr(self, name))
+    
+    def _set_setting(self, name: str, field: str, value: bool):
+        """Change one field of a settings var."""
+        return self.apply_settings([{"setting": name, "field": field, "value": value}])
+    
+    def apply_settings(self, changes: List[Dict[str, Any]]):
+        """Apply a batch of settings changes in one event.
+        
+        Each change is a dict with ``setting`` (one of ``SETTINGS_TYPES``),
+        ``field`` and a boolean ``value``. The batch is applied only if every
+        change is valid, each settings var is assigned at most once, and the
+        result is written to storage once changes stop arriving for
+        ``SETTINGS_WRITE_DEBOUNCE`` seconds.
+        
+        Args:
+            changes: The changes, applied in order.
+        """
+        if not isinstance(changes, list):
+            self.settings_error = f"Invalid settings changes: {changes}"
+            return
+        updated: Dict[str, Flags] = {}
+        for change in changes:
+            # The batch comes from the client, so check shapes before any lookup
+            if not isinstance(change, dict):
+                self.settings_error = f"Invalid settings change: {change}"
+                return
+            name, field, value = change.get("setting"), change.get("field"), change.get("value")
+            settings_type = SETTINGS_TYPES.get(name) if isinstance(name, str) else None
+            if (
+                settings_type is None
+                or not isinstance(field, str)
+                or field not in settings_type.FIELDS
+                or not isinstance(value, bool)
+            ):
+                self.settings_error = f"Invalid settings change: {change}"
+                return
+            if name not in updated:
+                updated[name] = self.get_settings(name)
+            updated[name][field] = value
+        
+        if self.settings_error is not None:
+            self.settings_error = None
+        changed = False
+        for name, settings in updated.items():
+            # Only touch vars whose bits changed, so unchanged ones aren't resent
+            if settings.bits != getattr(self, name):
+                setattr(self, name, settings.bits)
+                changed = True
+        if not changed:
+            return
+        self._settings_version += 1
+        if not self._settings_write_scheduled:
+            self._settings_write_scheduled = True
+            return UserState.write_settings
+    
+    def _settings_changes(self) -> SettingsChanges:
+        """Get the fields changed since the last save, as a mask and values per settings var."""
+        changes = {}
+        for name in SETTINGS_TYPES:
+            bits = getattr(self, name)
+            mask = bits ^ self._saved_settings[name]
+            if mask:
+                changes[name] = (mask, bits)
+        return changes
+    
+    @rx.event(background=True)
+    async def write_settings(self):
+        """Write changed settings to storage once they stop changing.
+        
+        Toggles made within the debounce window of each other are coalesced
+        into a single write, which carries only the dirty fields.
+        """
+        async with self:
+            version = self._settings_version
+        
+        while True:
+            await asyncio.sleep(SETTINGS_WRITE_DEBOUNCE)
+            async with self:
+                if self._settings_version != version:
+                    # Still changing; wait for a quiet spell
+                    version = self._settings_version
+                    continue
+                changes = self._settings_changes()
+                if not changes:
+                    self._settings_write_scheduled = False
+                    return
+                written = {name: getattr(self, name) for name in SETTINGS_TYPES}
+                user_id = (await self.get_state(AuthState)).user_id
+            
+            try:
+                settings_store.write(user_id, changes, _default_settings())
+            except Exception as e:
+                print(f"Error saving settings: {e}")
+                async with self:
+                    self.settings_error = "Your settings could not be saved."
+                    self._settings_write_scheduled = False
+                return
+            
+            async with self:
+                self._saved_settings = written
+                if self._settings_version == version:
+                    self._settings_write_scheduled = False
+                    return
+                # Changed during the write; save those changes too
+                version = self._settings_version
+    
+    async def load_settings(self):
+        """Load the user's saved settings, unless unsaved changes are pending."""
+        if self._settings_write_scheduled:
+            return
+        user_id = (await self.get_state(AuthState)).user_id
+        saved = settings_store.load(user_id)
+        if saved is None:
+            return
+        for name in SETTINGS_TYPES:
+            if name in saved and saved[name] != getattr(self, name):
+                setattr(self, name, saved[name])
+        self._mark_settings_saved()
+    
+    def dirty_settings(self) -> Dict[str, List[str]]:
+        """Get the settings fields that changed since they were last saved.
+        
+        Returns:
+            The changed field names, keyed by settings var.
+        """
+        dirty = {}
+        for name in SETTINGS_TYPES:
+            changed = self.get_settings(name).changed_fields(self._saved_settings[name])
+            if changed:
+                dirty[name] = changed
+        return dirty
+    
+    def _mark_settings_saved(self):
+        """Record the current settings as saved."""
+        self._saved_settings = {name: getattr(self, name) for name in SETTINGS_TYPES}
+    
     def save_profile(self):
         """Save user profile changes."""
         # In a real app, you would send this to an API
@@ -68,51 +338,55 @@ class UserState(rx.State):
         self.language = value
     
     def set_currency(self, value: str):
-        """Set user currency preference."""
-        self.currency = value
+        """Set user currency preference, and show dashboard amounts in it."""
+        code = currency_code(value)
+        if code is None:
+            return
+        self.currency = currency_label(code)
+        return DashboardState.set_currency(code)
     
     # Email notification toggles
     def toggle_email_account_activity(self, value: bool):
         """Toggle email notifications for account activity."""
-        self.email_notifications.account_activity = value
+        return self._set_setting("email_notifications", "account_activity", value)
     
     def toggle_email_new_features(self, value: bool):
         """Toggle email notifications for new features."""
-        self.email_notifications.new_features = value
+        return self._set_setting("email_notifications", "new_features", value)
     
     def toggle_email_marketing(self, value: bool):
         """Toggle email notifications for marketing."""
-        self.email_notifications.marketing = value
+        return self._set_setting("email_notifications", "marketing", value)
     
     # Push notification toggles
     def toggle_push_account_activity(self, value: bool):
         """Toggle push notifications for account activity."""
-        self.push_notifications.account_activity = value
+        return self._set_setting("push_notifications", "account_activity", value)
     
     def toggle_push_new_features(self, value: bool):
         """Toggle push notifications for new features."""
-        self.push_notifications.new_features = value
+        return self._set_setting("push_notifications", "new_features", value)
     
     def toggle_push_marketing(self, value: bool):
         """Toggle push notifications for marketing."""
-        self.push_notifications.marketing = value
+        return self._set_setting("push_notifications", "marketing", value)
     
     # Privacy toggles
     def toggle_share_usage_data(self, value: bool):
         """Toggle sharing usage data."""
-        self.privacy.share_usage_data = value
+        return self._set_setting("privacy", "share_usage_data", value)
     
     def toggle_allow_recommendations(self, value: bool):
         """Toggle allowing personalized recommendations."""
-        self.privacy.allow_recommendations = value
+        return self._set_setting("privacy", "allow_recommendations", value)
     
     def toggle_profile_visible(self, value: bool):
         """Toggle profile visibility."""
-        self.privacy.profile_visible = value
+        return self._set_setting("privacy", "profile_visible", value)
     
     def toggle_show_activity(self, value: bool):
         """Toggle showing activity status."""
-        self.privacy.show_activity = value
+        return self._set_setting("privacy", "show_activity", value)
     
     def download_data(self):
         """Download user data."""
@@ -0,0 +1,75 @@
+import csv
+from datetime import date, timedelta
+
+from finance_dashboard_boilderplate.services import importer
+from finance_dashboard_boilderplate.services.importer import import_file
+from finance_dashboard_boilderplate.services.ledger import Ledger
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Date", "Amount", "Description", "Id"])
+        writer.writerows(rows)
+    return str(path)
+
+
+def run_import(path, ledger, chunk_size=1000):
+    *_, progress = import_file(path, ledger, chunk_size=chunk_size)
+    return progress
+
+
+def test_repeated_rows_are_kept(tmp_path):
+    path = write_csv(tmp_path / "export.csv", [
+        ["2025-03-01", "-4.50", "Coffee", ""],
+        ["2025-03-01", "-4.50", "Coffee", ""],
+        ["2025-03-02", "-4.50", "Coffee", ""],
+    ])
+    ledger = Ledger()
+    progress = run_import(path, ledger)
+    assert progress.rows_imported == 3
+    assert progress.duplicates == 0
+    assert len(ledger) == 3
+
+
+def test_reimporting_a_file_adds_nothing(tmp_path):
+    path = write_csv(tmp_path / "export.csv", [
+        ["2025-03-01", "-4.50", "Coffee", ""],
+        ["2025-03-01", "-4.50", "Coffee", ""],
+        ["2025-03-05", "2500.00", "Salary", ""],
+    ])
+    ledger = Ledger()
+    run_import(path, ledger)
+    progress = run_import(path, ledger, chunk_size=1)
+    assert progress.rows_imported == 0
+    assert progress.duplicates == 3
+    assert len(ledger) == 3
+
+
+def test_repeated_ids_are_dropped(tmp_path):
+    path = write_csv(tmp_path / "export.csv", [
+        ["2025-03-01", "-4.50", "Coffee", "TX1"],
+        ["2025-03-01", "-4.50", "Coffee", "TX2"],
+        ["2025-03-01", "-4.50", "Coffee", "TX1"],
+        ["2025-03-01", "-4.50", "Coffee", "TX2"],
+    ])
+    ledger = Ledger()
+    progress = run_import(path, ledger, chunk_size=3)
+    assert progress.rows_imported == 2
+    assert progress.duplicates == 2
+
+
+def test_window_moves_with_the_file(tmp_path):
+    start = date(2024, 1, 1)
+    rows = [[(start + timedelta(days=day)).isoformat(), "-4.50", "Coffee", f"TX{day}"] for day in range(365)]
+    path = write_csv(tmp_path / "export.csv", rows + rows[-5:])
+    ledger = Ledger()
+    deduplicator = importer.Deduplicator(ledger)
+    batches = importer.categorize(
+        importer.normalize(importer.read_batches(path, importer.ImportProgress(), None, 10), importer.ImportProgress())
+    )
+    kept = 0
+    for batch in deduplicator(batches, importer.ImportProgress()):
+        kept += len(batch)
+        assert len(deduplicator.id_hashes) <= 10 + 2 * importer.DEDUPE_WINDOW_DAYS
+    assert kept == 365
@@ -0,0 +1,34 @@
+import numpy as np
+
+from finance_dashboard_boilderplate.services.invoices import InvoiceStore
+from finance_dashboard_boilderplate.services.reconciliation import Payments, earliest_fit_join, reconcile
+
+
+def test_equal_amounts_match_fully():
+    left, right = earliest_fit_join(
+        np.full(100, 4900), np.full(100, 20000), np.full(100, 4900), np.full(100, 20003), 0, 60
+    )
+    assert len(left) == 100
+    assert len(set(right.tolist())) == 100
+
+
+def test_subscription_invoices_reconcile_fully():
+    invoices = InvoiceStore.from_records([
+        {
+            "id": i + 1,
+            "customer": "Acme",
+            "amount": 49.0,
+            "issue_date": "2025-03-01",
+            "due_date": "2025-03-31",
+            "status": "open",
+        }
+        for i in range(100)
+    ])
+    payments = Payments.from_records([
+        {"id": i + 1, "amount": 49.0, "date": "2025-03-10", "payer": "Acme", "reference": ""}
+        for i in range(100)
+    ])
+    summary = reconcile(payments, invoices).summary()
+    assert summary["matched_by_amount"] == 100
+    assert summary["unmatched_payments"] == 0
+    assert summary["unpaid_invoices"] == 0